@@ -0,0 +1,95 @@
+"""Synthetic Kedro projects used by the pipeline generation benchmarks"""
+import random
+from unittest.mock import MagicMock
+
+import pytest
+from kedro.pipeline import Pipeline, node
+
+from kedro_kubeflow.config import PluginConfig
+from tests.common import MinimalConfigMixin
+
+pytest.importorskip("pytest_benchmark")
+
+PIPELINE_SIZES = [10, 100, 1000, 5000]
+
+
+def _process(*inputs):
+    return inputs[0]  # pragma: no cover
+
+
+def synthetic_pipeline(size: int, seed: int = 0) -> Pipeline:
+    """Layered DAG of `size` nodes with fan-out of up to 8 children (layers
+    grow up to 50 nodes) and fan-in of 1 to 4 parents from the previous layer.
+    Every node reads one parameter."""
+    rng = random.Random(seed)
+    nodes = []
+    previous_layer = ["input"]
+    while len(nodes) < size:
+        width = min(max(len(previous_layer) * 2, 1), 50, size - len(nodes))
+        layer = []
+        for _ in range(width):
+            index = len(nodes)
+            inputs = rng.sample(previous_layer, k=min(len(previous_layer), rng.randint(1, 4)))
+            nodes.append(
+                node(
+                    _process,
+                    inputs + [f"params:param_{index % 20}"],
+                    f"dataset_{index}",
+                    name=f"node_{index}",
+                    tags=[f"group_{index % 10}"],
+                )
+            )
+            layer.append(f"dataset_{index}")
+        previous_layer = layer
+    return Pipeline(nodes)
+
+
+def synthetic_catalog(pipeline: Pipeline, local_ratio: float = 0.5, seed: int = 0) -> dict:
+    """Catalog declaring every dataset as a file (as datasets are passed
+    between pods), a share of them on the local file system and the rest on
+    the (in-memory, offline) remote one."""
+    rng = random.Random(seed)
+    catalog = {"input": {"type": "pandas.CSVDataset", "filepath": "data/01_raw/input.csv"}}
+    for dataset in sorted(pipeline.all_outputs()):
+        prefix = "" if rng.random() < local_ratio else "memory://bucket/"
+        catalog[dataset] = {
+            "type": "pandas.ParquetDataset",
+            "filepath": f"{prefix}data/02_intermediate/{dataset}.pq",
+        }
+    return catalog
+
+
+class SyntheticProject(MinimalConfigMixin):
+    def __init__(self, size: int):
+        self.size = size
+        self.pipelines = {"pipeline": synthetic_pipeline(size)}
+        config_loader = MagicMock()
+        config_loader.get.return_value = synthetic_catalog(self.pipelines["pipeline"])
+        self.context = type(
+            "obj",
+            (object,),
+            {
+                "env": "benchmarks",
+                "params": {f"param_{i}": i for i in range(20)},
+                "config_loader": config_loader,
+            },
+        )
+
+    def config(self, node_merge_strategy: str) -> PluginConfig:
+        return PluginConfig(
+            **self.minimal_config(
+                {
+                    "host": "http://benchmarks",
+                    "run_config": {
+                        "node_merge_strategy": node_merge_strategy,
+                        "volume": {"size": "1Gi"},
+                        "resources": {"__default__": {"cpu": "500m", "memory": "1Gi"}},
+                    },
+                }
+            )
+        )
+
+
+@pytest.fixture(scope="module", params=PIPELINE_SIZES, ids=lambda size: f"{size}-nodes")
+def project(request):
+    return SyntheticProject(request.param)
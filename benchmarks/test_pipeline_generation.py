@@ -0,0 +1,82 @@
+"""Wall time and peak memory of pipeline generation and compilation.
+
+Run with `pytest benchmarks` (requires `pytest-benchmark`), results can be
+saved and compared between plugin versions with `--benchmark-autosave` and
+`--benchmark-compare`. Peak memory of a single run is stored in `extra_info`.
+"""
+import os
+import tracemalloc
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import kfp
+import pytest
+from kfp.compiler import Compiler
+
+from kedro_kubeflow.generators.grouped_pipeline_generator import (
+    GroupedPipelineGenerator,
+)
+from kedro_kubeflow.generators.one_pod_pipeline_generator import (
+    OnePodPipelineGenerator,
+)
+from kedro_kubeflow.generators.pod_per_node_pipeline_generator import (
+    PodPerNodePipelineGenerator,
+)
+
+GENERATORS = {
+    "none": PodPerNodePipelineGenerator,
+    "full": OnePodPipelineGenerator,
+    "grouped": GroupedPipelineGenerator,
+}
+
+
+def rounds_for(size):
+    return max(1, min(10, 1000 // size))
+
+
+def record_peak_memory(benchmark, target):
+    tracemalloc.start()
+    try:
+        target()
+        benchmark.extra_info["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture(autouse=True)
+def registered_pipelines(project):
+    with patch("kedro.framework.project.pipelines", new=project.pipelines):
+        yield
+
+
+@pytest.mark.parametrize("strategy", GENERATORS.keys())
+def test_generate_pipeline(benchmark, project, strategy):
+    generator = GENERATORS[strategy](project.config(strategy), "benchmarks", project.context)
+
+    def generate():
+        pipeline = generator.generate_pipeline("pipeline", "benchmarks-image", "IfNotPresent")
+        with kfp.dsl.Pipeline(None) as dsl_pipeline:
+            pipeline()
+        return dsl_pipeline
+
+    record_peak_memory(benchmark, generate)
+    dsl_pipeline = benchmark.pedantic(generate, rounds=rounds_for(project.size))
+    benchmark.extra_info["ops"] = len(dsl_pipeline.ops)
+
+
+@pytest.mark.parametrize("strategy", GENERATORS.keys())
+def test_compile(benchmark, project, strategy):
+    generator = GENERATORS[strategy](project.config(strategy), "benchmarks", project.context)
+
+    with TemporaryDirectory() as output_dir:
+        output = os.path.join(output_dir, "pipeline.yaml")
+
+        def compile():
+            Compiler().compile(
+                generator.generate_pipeline("pipeline", "benchmarks-image", "IfNotPresent"),
+                output,
+            )
+
+        record_peak_memory(benchmark, compile)
+        benchmark.pedantic(compile, rounds=rounds_for(project.size))
+        benchmark.extra_info["output_size_bytes"] = os.path.getsize(output)
@@ -1,7 +1,11 @@
+import base64
 import html
+import json
 import logging
 import os
 import re
+import time
+from pathlib import Path
 from urllib.parse import urlsplit, urlunsplit
 
 import requests
@@ -10,11 +14,94 @@ IAP_CLIENT_ID = "IAP_CLIENT_ID"
 DEX_USERNAME = "DEX_USERNAME"
 DEX_PASSWORD = "DEX_PASSWORD"
 
+# tokens are refreshed when they are about to expire in less than that [in seconds]
+TOKEN_REFRESH_MARGIN = 300
+# lifetime assumed for Dex sessions when the cookie does not specify it [in seconds]
+DEX_SESSION_TTL = 3600
+
+
+def jwt_expiry(token):
+    """Reads expiration time from the (unverified) payload of JWT token"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class InMemoryTokenCache(object):
+    """Keeps obtained tokens with their expiration time in the memory of the process"""
+
+    def __init__(self):
+        self._tokens = {}
+
+    def get(self, key):
+        entry = self._tokens.get(key)
+        if entry and entry["expires_at"] - TOKEN_REFRESH_MARGIN > time.time():
+            return entry["token"]
+        return None
+
+    def put(self, key, token, expires_at):
+        self._tokens[key] = {"token": token, "expires_at": expires_at}
+
+    def invalidate(self, key):
+        self._tokens.pop(key, None)
+
+
+class FileTokenCache(InMemoryTokenCache):
+    """Token cache persisted in a file readable only by the current user,
+    so the tokens can be reused by subsequent CLI invocations"""
+
+    log = logging.getLogger(__name__)
+
+    def __init__(self, path=None):
+        super().__init__()
+        cache_home = os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+        self.path = Path(path or Path(cache_home) / "kedro-kubeflow" / "tokens.json")
+        try:
+            with open(self.path) as f:
+                self._tokens = json.load(f)
+        except (OSError, ValueError):
+            self._tokens = {}
+
+    def put(self, key, token, expires_at):
+        super().put(key, token, expires_at)
+        self._save()
+
+    def invalidate(self, key):
+        super().invalidate(key)
+        self._save()
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            now = time.time()
+            valid = {k: v for k, v in self._tokens.items() if v["expires_at"] > now}
+            with os.fdopen(os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+                json.dump(valid, f)
+        except OSError as e:
+            self.log.warning("Failed to store token in %s: %s", self.path, e)
+
 
 class AuthHandler(object):
 
     log = logging.getLogger(__name__)
 
+    def __init__(self, token_cache=None):
+        self.token_cache = token_cache
+
+    def _cached(self, key):
+        return self.token_cache.get(key) if self.token_cache is not None else None
+
+    def _store(self, key, token, expires_at):
+        if self.token_cache is not None and token and expires_at:
+            self.token_cache.put(key, token, expires_at)
+
+    def _invalidate(self, key):
+        if self.token_cache is not None:
+            self.token_cache.invalidate(key)
+
     def obtain_id_token(self):
         from google.auth.exceptions import DefaultCredentialsError
         from google.auth.transport.requests import Request
@@ -28,6 +115,11 @@ class AuthHandler(object):
             self.log.debug("No IAP_CLIENT_ID provided, skipping custom IAP authentication")
             return jwt_token
 
+        cache_key = f"iap:{client_id}:{os.environ.get('GOOGLE_APPLICATION_CREDENTIALS', '')}"
+        if (jwt_token := self._cached(cache_key)) is not None:
+            self.log.debug("Using cached JWT token for IAP proxy authentication.")
+            return jwt_token
+
         try:
             self.log.debug("Attempt to get IAP token for %s." + client_id)
             jwt_token = id_token.fetch_id_token(Request(), client_id)
@@ -46,6 +138,7 @@ class AuthHandler(object):
         except Exception as e:
             self.log.error("Failed to obtain IAP access token. " + str(e))
         finally:
+            self._store(cache_key, jwt_token, jwt_expiry(jwt_token) if jwt_token else None)
             return jwt_token
 
     # DEX supports Resource Owner Password Credentials Grant only for LDAP connectors.
@@ -59,6 +152,15 @@ class AuthHandler(object):
             self.log.debug("Skipping DEX authentication due to missing env variables")
             return None
 
+        cache_key = f"dex:{kfp_api}:{os.environ[DEX_USERNAME]}"
+        if (session := self._cached(cache_key)) is not None:
+            if self._is_dex_session_accepted(kfp_api, session):
+                self.log.debug("Using cached DEX authservice session.")
+                return session
+            # e.g. revoked or expired earlier than its cookie said
+            self.log.info("Cached DEX authservice session was rejected, logging in again.")
+            self._invalidate(cache_key)
+
         s = requests.Session()
         kfp_url_parts = urlsplit(kfp_api)
 
@@ -98,4 +200,21 @@ class AuthHandler(object):
         }
 
         s.post(login_url, headers=headers, data=data)
-        return s.cookies.get_dict()["authservice_session"]
+        session = s.cookies.get_dict()["authservice_session"]
+        expires_at = next((c.expires for c in s.cookies if c.name == "authservice_session" and c.expires), None)
+        self._store(cache_key, session, expires_at or time.time() + DEX_SESSION_TTL)
+        return session
+
+    def _is_dex_session_accepted(self, kfp_api, session):
+        """Checks the session with a cheap KFP API call, which is rejected with
+        401 or a redirect to the login page when the session is not valid"""
+        try:
+            r = requests.get(
+                f"{kfp_api.rstrip('/')}/apis/v1beta1/healthz",
+                cookies={"authservice_session": session},
+                allow_redirects=False,
+            )
+        except requests.RequestException as e:
+            self.log.debug("Failed to check cached DEX authservice session: %s", e)
+            return True
+        return r.status_code != 401 and not r.is_redirect
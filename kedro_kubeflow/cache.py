@@ -0,0 +1,37 @@
+import logging
+import os
+import shutil
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+PACKAGE_SUFFIXES = (".tar.gz", ".tgz", ".zip")
+
+
+class CompiledPipelineCache(object):
+    """On-disk cache of compiled pipeline packages, keyed by the fingerprint
+    of everything the compiled definition depends on."""
+
+    log = logging.getLogger(__name__)
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def _entry(self, key, output):
+        suffix = next((s for s in PACKAGE_SUFFIXES if str(output).endswith(s)), ".yaml")
+        return self.path / f"{key}{suffix}"
+
+    def get(self, key, output) -> bool:
+        entry = self._entry(key, output)
+        if not entry.exists():
+            return False
+        shutil.copyfile(entry, output)
+        self.log.info("Reused compiled pipeline from cache: %s", entry)
+        return True
+
+    def put(self, key, output):
+        entry = self._entry(key, output)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(dir=entry.parent, delete=False) as f:
+            with open(output, "rb") as compiled:
+                shutil.copyfileobj(compiled, f)
+        os.replace(f.name, entry)
@@ -1,3 +1,4 @@
+import json
 import logging
 import os
 import webbrowser
@@ -5,9 +6,7 @@ from pathlib import Path
 
 import click
 
-from .auth import AuthHandler
-from .config import PluginConfig
-from .context_helper import ContextHelper
+from .utils import clean_name, is_mlflow_enabled
 
 LOG = logging.getLogger(__name__)
 WAIT_TIMEOUT = 24 * 60 * 60
@@ -17,6 +16,37 @@ def format_params(params: list):
     return dict((p[: p.find(":")], p[p.find(":") + 1 :]) for p in params)
 
 
+def param_pairs(params) -> dict:
+    if len(params) % 2:
+        raise click.UsageError(f"Parameters must be given as name and value pairs, got: {' '.join(params)}")
+    return dict(zip(params[::2], params[1::2]))
+
+
+def all_pipeline_names():
+    from kedro.framework.project import pipelines  # NOQA
+
+    return list(pipelines.keys())
+
+
+def output_for_pipeline(output, pipeline):
+    path = Path(output)
+    return str(path.with_name(f"{path.stem}-{clean_name(pipeline)}{path.suffix}"))
+
+
+def enable_profiling(ctx, output):
+    from .profiling import profiler
+
+    def emit_report():
+        click.echo(profiler.summary(), err=True)
+        if output:
+            profiler.write(output)
+            click.echo(f"Profile saved to {output}", err=True)
+        profiler.stop()
+
+    profiler.start()
+    ctx.call_on_close(emit_report)
+
+
 @click.group("Kubeflow")
 def commands():
     """Kedro plugin adding support for Kubeflow Pipelines"""
@@ -32,10 +62,27 @@ def commands():
     default=lambda: os.environ.get("KEDRO_ENV", "local"),
     help="Environment to use.",
 )
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Print wall time and peak memory of the command phases.",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write the profile to a JSON file (speedscope format if the name ends with .speedscope.json).",
+)
 @click.pass_obj
 @click.pass_context
-def kubeflow_group(ctx, metadata, env):
+def kubeflow_group(ctx, metadata, env, profile, profile_output):
     """Interact with Kubeflow Pipelines"""
+    from .context_helper import ContextHelper
+
+    if profile or profile_output:
+        enable_profiling(ctx, profile_output)
+
     ctx.ensure_object(dict)
     ctx.obj["context_helper"] = ContextHelper.init(
         metadata,
@@ -158,14 +205,36 @@ def ui(ctx) -> None:
     "--output",
     type=str,
     default="pipeline.yml",
-    help="Pipeline YAML definition file.",
+    help="Pipeline YAML definition file. With --all, the name of each pipeline is appended to the file name.",
+)
+@click.option(
+    "--all",
+    "all_pipelines",
+    is_flag=True,
+    default=False,
+    help="Compile all registered pipelines in parallel.",
+)
+@click.option(
+    "--max-workers",
+    type=int,
+    default=None,
+    help="Maximum number of pipelines compiled concurrently with --all.",
 )
 @click.pass_context
-def compile(ctx, image, pipeline, output) -> None:
+def compile(ctx, image, pipeline, output, all_pipelines, max_workers) -> None:
     """Translates Kedro pipeline into YAML file with Kubeflow Pipeline definition"""
     context_helper = ctx.obj["context_helper"]
     config = context_helper.config.run_config
 
+    if all_pipelines:
+        context_helper.kfp_client.compile_all(
+            outputs={name: output_for_pipeline(output, name) for name in all_pipeline_names()},
+            image_pull_policy=config.image_pull_policy,
+            image=image if image else config.image,
+            max_workers=max_workers,
+        )
+        return
+
     context_helper.kfp_client.compile(
         pipeline=pipeline,
         image_pull_policy=config.image_pull_policy,
@@ -189,12 +258,35 @@ def compile(ctx, image, pipeline, output) -> None:
     help="Name of pipeline to upload",
     default="__default__",
 )
+@click.option(
+    "--all",
+    "all_pipelines",
+    is_flag=True,
+    default=False,
+    help="Upload all registered pipelines, compiling and uploading them in parallel.",
+)
+@click.option(
+    "--max-workers",
+    type=int,
+    default=None,
+    help="Maximum number of pipelines compiled and uploaded concurrently with --all.",
+)
 @click.pass_context
-def upload_pipeline(ctx, image, pipeline) -> None:
+def upload_pipeline(ctx, image, pipeline, all_pipelines, max_workers) -> None:
     """Uploads pipeline to Kubeflow server"""
     context_helper = ctx.obj["context_helper"]
     config = context_helper.config.run_config
 
+    if all_pipelines:
+        context_helper.kfp_client.upload_all(
+            pipeline_names=all_pipeline_names(),
+            image=image if image else config.image,
+            image_pull_policy=config.image_pull_policy,
+            env=context_helper.env,
+            max_workers=max_workers,
+        )
+        return
+
     context_helper.kfp_client.upload(
         pipeline_name=pipeline,
         image=image if image else config.image,
@@ -267,12 +359,151 @@ def schedule(
     )
 
 
+@kubeflow_group.command()
+@click.option(
+    "-p",
+    "--pipeline",
+    "pipeline",
+    type=str,
+    help="Name of the pipeline whose datasets are measured",
+    default="__default__",
+)
+@click.option(
+    "--history",
+    type=str,
+    default=None,
+    help="JSON file with recorded dataset sizes. Defaults to volume.size_history from the config.",
+)
+@click.option(
+    "--intermediate-data",
+    type=str,
+    default=None,
+    help="Directory with the intermediate data of a run, like data/kubeflow-intermediate/<run id> "
+    "copied from the pipeline volume, to record sizes of memory datasets passed between pods.",
+)
+@click.pass_context
+def record_dataset_sizes(ctx, pipeline, history, intermediate_data) -> None:
+    """Records sizes of the local files of the pipeline datasets, used to estimate the volume size"""
+    from kedro.framework.project import pipelines  # NOQA
+
+    from .generators.catalog_index import CatalogIndex
+    from .generators.volume_size import (
+        measure_datasets,
+        measure_intermediate_datasets,
+        record_size_history,
+    )
+
+    context_helper = ctx.obj["context_helper"]
+    volume_config = context_helper.config.run_config.volume
+    history = history or (volume_config.size_history if volume_config else None)
+    if not history:
+        raise click.ClickException("Provide --history or configure volume.size_history")
+
+    context = context_helper.context
+    # paths of the catalog and of the options are relative to the project directory
+    root = str(context.project_path)
+    catalog_index = CatalogIndex(context.config_loader.get("catalog"))
+    datasets = pipelines[pipeline].datasets()
+    sizes = measure_datasets(catalog_index, datasets, root)
+    if intermediate_data:
+        sizes.update(measure_intermediate_datasets(catalog_index, datasets, os.path.join(root, intermediate_data)))
+    history = os.path.join(root, history)
+    record_size_history(history, sizes)
+    click.echo(f"Recorded sizes of {len(sizes)} datasets in {history}")
+
+
+@kubeflow_group.command()
+@click.option(
+    "--usage",
+    "usage_files",
+    type=str,
+    multiple=True,
+    required=True,
+    help="CSV or JSON file with peak cpu and memory usage of the steps or pods of previous runs.",
+)
+@click.option(
+    "--workflow",
+    "workflow_files",
+    type=str,
+    multiple=True,
+    help="Argo workflow JSON file (kubectl get workflow -o json) mapping pod names to steps.",
+)
+@click.option(
+    "-o",
+    "--output",
+    type=str,
+    default="conf/base/kubeflow-tuned-resources.yml",
+    help="Config overlay file with the recommended resources.",
+)
+@click.option("--cpu-percentile", type=float, default=90, help="Percentile of the observed CPU peaks to request.")
+@click.option("--cpu-margin", type=float, default=1.2, help="Multiplier of the CPU usage.")
+@click.option("--memory-margin", type=float, default=1.3, help="Multiplier of the highest memory usage.")
+def tune_resources(usage_files, workflow_files, output, cpu_percentile, cpu_margin, memory_margin) -> None:
+    """Recommends resources of the steps from the usage observed in previous runs"""
+    from .resource_tuning import load_usage, recommend_resources, write_overlay
+
+    usage = load_usage(usage_files, workflow_files)
+    resources = recommend_resources(usage, cpu_percentile, cpu_margin, memory_margin)
+    write_overlay(output, resources)
+    for step, step_resources in resources.items():
+        click.echo(f"{step}: cpu {step_resources['cpu']}, memory {step_resources['memory']}")
+    click.echo(f"Resources of {len(resources)} steps saved to {output}")
+
+
+@kubeflow_group.command()
+@click.option(
+    "-p",
+    "--pipeline",
+    "pipeline",
+    type=str,
+    help="Name of the pipeline to analyze",
+    default="__default__",
+)
+@click.option(
+    "--workflow",
+    "workflow_files",
+    type=str,
+    multiple=True,
+    help="Argo workflow JSON of a previous run (kubectl get workflow -o json) to estimate step durations.",
+)
+@click.option("--durations", type=str, default=None, help="JSON file mapping step names to durations in seconds.")
+@click.option("--json", "as_json", is_flag=True, default=False, help="Print the report as JSON.")
+@click.pass_context
+def analyze(ctx, pipeline, workflow_files, durations, as_json) -> None:
+    """Reports parallelism, critical path and peak resource requests of the pipeline steps"""
+    from kedro.framework.project import pipelines  # NOQA
+
+    from .generators.analysis import (
+        analyze_steps,
+        format_report,
+        mean_durations,
+        pipeline_steps,
+        step_requests,
+        workflow_durations,
+    )
+
+    run_config = ctx.obj["context_helper"].config.run_config
+    runs = []
+    for path in workflow_files:
+        with open(path) as f:
+            runs.append(workflow_durations(json.load(f)))
+    if durations:
+        with open(durations) as f:
+            runs.append(json.load(f))
+
+    steps, step_dependencies = pipeline_steps(pipeline, pipelines[pipeline].node_dependencies, run_config)
+    report = analyze_steps(step_dependencies, step_requests(run_config, steps), mean_durations(runs))
+    click.echo(json.dumps(report, indent=2, default=str) if as_json else format_report(report))
+
+
 @kubeflow_group.command()
 @click.argument("kfp_url", type=str)
 @click.option("--with-github-actions", is_flag=True, default=False)
 @click.pass_context
 def init(ctx, kfp_url: str, with_github_actions: bool):
     """Initializes configuration for the plugin"""
+    from .config import PluginConfig
+
     context_helper = ctx.obj["context_helper"]
     project_name = context_helper.context.project_path.name
     if with_github_actions:
@@ -312,37 +543,200 @@ def init(ctx, kfp_url: str, with_github_actions: bool):
 def mlflow_start(ctx, kubeflow_run_id: str, output: str):
     import mlflow  # NOQA
 
+    run = mlflow.start_run(
+        experiment_id=_mlflow_experiment_id(ctx.obj["context_helper"]),
+        nested=False,
+    )
+    mlflow.set_tag("kubeflow_run_id", kubeflow_run_id)
+    with open(output, "w") as f:
+        f.write(run.info.run_id)
+    click.echo(f"Started run: {run.info.run_id}")
+
+
+def _mlflow_experiment_id(context_helper) -> str:
+    import mlflow  # NOQA
+
+    from .auth import AuthHandler
+
     token = AuthHandler().obtain_id_token()
     if token:
         os.environ["MLFLOW_TRACKING_TOKEN"] = token
         LOG.info("Configuring MLFLOW_TRACKING_TOKEN")
 
     try:
-        kedro_context = ctx.obj["context_helper"].context
+        kedro_context = context_helper.context
         mlflow_conf = kedro_context.mlflow
     except AttributeError:
         raise click.ClickException("Could not read MLFlow config")
 
-    run = mlflow.start_run(
-        experiment_id=mlflow.get_experiment_by_name(mlflow_conf.tracking.experiment.name).experiment_id,
-        nested=False,
+    return mlflow.get_experiment_by_name(mlflow_conf.tracking.experiment.name).experiment_id
+
+
+def find_mlflow_run(context_helper, kubeflow_run_id: str):
+    """Id of the MLflow run started by `mlflow-start` in the Kubeflow run, if any"""
+    import mlflow  # NOQA
+
+    runs = mlflow.search_runs(
+        experiment_ids=[_mlflow_experiment_id(context_helper)],
+        filter_string=f"tags.kubeflow_run_id = '{kubeflow_run_id}'",
+        output_format="list",
     )
-    mlflow.set_tag("kubeflow_run_id", kubeflow_run_id)
-    with open(output, "w") as f:
-        f.write(run.info.run_id)
-    click.echo(f"Started run: {run.info.run_id}")
+    return runs[0].info.run_id if runs else None
 
 
-@kubeflow_group.command(hidden=True)
-@click.argument("pvc_name", type=str)
-def delete_pipeline_volume(pvc_name: str):
+def incluster_core_api():
     import kubernetes.config  # NOQA
 
     kubernetes.config.load_incluster_config()
     current_namespace = open("/var/run/secrets/kubernetes.io/serviceaccount/namespace").read()
+    return kubernetes.client.CoreV1Api(), current_namespace
+
+
+@kubeflow_group.command(hidden=True, context_settings={"ignore_unknown_options": True})
+@click.option("--pipeline", type=str, required=True)
+@click.option("--nodes", type=str, default=None, help="Comma separated names of the nodes to run")
+@click.argument("params", type=str, nargs=-1)
+@click.pass_context
+def run_node(ctx, pipeline: str, nodes: str, params) -> None:
+    """Runs Kedro nodes in a pod, with the pipeline parameters given as name and value pairs"""
+    import yaml
+    from kedro.framework.cli.utils import split_node_names
+
+    from .profiling import profile_phase
+
+    extra_params = {name: yaml.load(value, Loader=yaml.FullLoader) for name, value in param_pairs(params).items()}
+    # default node names contain commas in the lists of their inputs and outputs
+    node_names = split_node_names(ctx, None, nodes) if nodes else None
+
+    with ctx.obj["context_helper"].create_session(extra_params) as session, profile_phase("kedro.session.run"):
+        session.run(pipeline_name=pipeline, node_names=node_names)
+
+
+@kubeflow_group.command(hidden=True, context_settings={"ignore_unknown_options": True})
+@click.option("--pipeline", type=str, required=True)
+@click.option("--stage", type=int, required=True, help="Index of the stage to run")
+@click.option("--image", type=str, required=True)
+@click.option("--image-pull-policy", type=str, default="IfNotPresent")
+@click.option("--run-id", type=str, required=True, help="Id of the run of the first stage")
+@click.option("--volume", type=str, default=None, help="Pipeline volume created by the first stage")
+@click.option("--mlflow-run-id", type=str, default=None, help="MLflow run started by the first stage")
+@click.option("--status", type=str, required=True, help="Status of the previous stage")
+@click.option("--failures", type=str, default=None, help="Failed steps of the previous stage, as JSON")
+@click.argument("params", type=str, nargs=-1)
+@click.pass_context
+def run_next_stage(
+    ctx,
+    pipeline: str,
+    stage: int,
+    image: str,
+    image_pull_policy: str,
+    run_id: str,
+    volume: str,
+    mlflow_run_id: str,
+    status: str,
+    failures: str,
+    params,
+) -> None:
+    """Starts the run of the next stage of a pipeline split into stages, or
+    ends the chain of runs if the previous stage did not succeed. All stages
+    log to the MLflow run of the first stage, found by its Kubeflow run id
+    after the first stage (exit handlers cannot read outputs of the steps)."""
+    import yaml
+
+    context_helper = ctx.obj["context_helper"]
+    config = context_helper.config.run_config
+    parameters = param_pairs(params)
+
+    if status == "Succeeded":
+        if mlflow_run_id is None and is_mlflow_enabled():
+            mlflow_run_id = find_mlflow_run(context_helper, run_id)
+        context_helper.kfp_client.run_stage(
+            pipeline=pipeline,
+            image=image,
+            image_pull_policy=image_pull_policy,
+            stage=stage,
+            run_id=run_id,
+            volume_name=volume,
+            mlflow_run_id=mlflow_run_id,
+            experiment_name=config.experiment_name,
+            experiment_namespace=None,
+            run_name=config.run_name,
+            parameters=parameters,
+        )
+        return
+
+    click.echo(f"Stage {stage} of pipeline {pipeline} finished with status {status}, not starting the next stage")
+    if volume and not config.volume.keep:
+        core_api, current_namespace = incluster_core_api()
+        core_api.delete_namespaced_persistent_volume_claim(volume, current_namespace)
+        click.echo(f"Volume removed: {volume}")
+    if config.on_exit_pipeline:
+        # the same parameters as the on exit pipeline of a pipeline not split into stages
+        exit_params = {**parameters, "status": status, **({"failures": failures} if failures is not None else {})}
+        extra_params = {name: yaml.load(value, Loader=yaml.FullLoader) for name, value in exit_params.items()}
+        with context_helper.create_session(extra_params) as session:
+            session.run(pipeline_name=config.on_exit_pipeline)
+
 
-    kubernetes.client.CoreV1Api().delete_namespaced_persistent_volume_claim(
+@kubeflow_group.command(hidden=True)
+@click.argument("pvc_name", type=str)
+def delete_pipeline_volume(pvc_name: str):
+    core_api, current_namespace = incluster_core_api()
+    core_api.delete_namespaced_persistent_volume_claim(
         pvc_name,
         current_namespace,
     )
     click.echo(f"Volume removed: {pvc_name}")
+
+
+@kubeflow_group.command(hidden=True)
+@click.argument("owner", type=str)
+@click.argument("claims", type=str, nargs=-1, required=True)
+@click.option("--size", type=str, required=True, help="Size of the claims created if missing")
+@click.option("--access-mode", "access_modes", type=str, multiple=True, default=["ReadWriteOnce"])
+@click.option("--storage-class", type=str, default=None)
+@click.option("--timeout", type=int, default=3600, help="Seconds to wait for a free claim")
+@click.option("--output", type=str, default="/tmp/volume_claim")
+def lock_pipeline_volume(owner: str, claims, size: str, access_modes, storage_class: str, timeout: int, output: str):
+    import kubernetes.client  # NOQA
+
+    from .volume_claims import acquire_claim, claim_spec
+
+    core_api, current_namespace = incluster_core_api()
+    claim = acquire_claim(
+        core_api,
+        current_namespace,
+        list(claims),
+        owner,
+        claim_spec(size, list(access_modes), storage_class),
+        timeout,
+        workflows_api=kubernetes.client.CustomObjectsApi(),
+    )
+    with open(output, "w") as f:
+        f.write(claim)
+    click.echo(f"Volume locked: {claim}")
+
+
+@kubeflow_group.command(hidden=True)
+@click.argument("owner", type=str)
+@click.argument("claims", type=str, nargs=-1, required=True)
+def unlock_pipeline_volume(owner: str, claims):
+    from .volume_claims import release_claims
+
+    core_api, current_namespace = incluster_core_api()
+    claim = release_claims(core_api, current_namespace, list(claims), owner)
+    click.echo(f"Volume unlocked: {claim}" if claim else f"No volume locked by {owner}")
+
+
+@kubeflow_group.command(hidden=True)
+@click.argument("paths", type=str, nargs=-1)
+@click.option("--source", type=str, required=True, help="Directory with the data shipped in the image")
+@click.option("--target", type=str, required=True, help="Mount point of the pipeline volume")
+@click.option("--max-workers", type=int, default=None, help="Number of parallel copies")
+@click.option("--remove", type=str, multiple=True, help="Path in the target to remove before copying")
+def sync_data_volume(paths, source: str, target: str, max_workers: int, remove):
+    from .volume_sync import remove_paths, sync_paths
+
+    remove_paths(target, remove)
+    copied, skipped = sync_paths(source, target, paths, max_workers)
+    click.echo(f"Data volume synchronized: {copied} files copied, {skipped} up to date")
@@ -3,12 +3,15 @@ import os
 from collections import defaultdict
 from enum import Enum
 from importlib import import_module
-from typing import Any, Dict, List, Optional, Type, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Type, Union
 
-from kubernetes import client as k8s_client
-from kubernetes.client import V1Volume
 from pydantic import BaseModel, validator
 
+from .quantities import normalize_resource, parse_quantity
+
+if TYPE_CHECKING:
+    from kubernetes.client import V1Volume
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_CONFIG_TEMPLATE = """
@@ -58,6 +61,12 @@ run_config:
   # intermediate results in the MLMD
   # store_kedro_outputs_as_kfp_artifacts: True
 
+  # Set to true to share one Argo template between the steps differing only
+  # by the Kedro nodes they run, which makes the compiled workflow of large
+  # pipelines several times smaller. Steps with different resources,
+  # tolerations, retry policy or kfp artifacts keep separate templates
+  # deduplicate_templates: False
+
   # Strategy used to generate Kubeflow pipeline nodes from Kedro nodes
   # Available strategies:
   #  * none (default) - nodes in Kedro pipeline are mapped to separate nodes
@@ -70,8 +79,52 @@ run_config:
   #           This strategy mitigate potential performance issues with `none` strategy
   #           but at the cost of degraded user experience within Kubeflow UI: a graph
   #           is collapsed to one node.
+  #  * grouped - linear chains of Kedro nodes are mapped to one node in Kubeflow
+  #              pipelines. This strategy keeps the graph visible in Kubeflow UI
+  #              while reducing the number of pods started by the pipeline.
   # node_merge_strategy: none
 
+  # Optional mapping of Kubeflow pipeline node names to Kedro tags, used by
+  # `none` and `grouped` strategies. All Kedro nodes tagged with any of the
+  # listed tags are run in a single pod. Sections like resources, tolerations
+  # or affinity can refer to the group by its name
+  # node_grouping:
+  #   model_training: [training]
+
+  # Set to true to keep datasets produced and consumed only by nodes run in the
+  # same pod in memory, even if they are declared as files in the catalog.
+  # Datasets kept in memory are not saved, so they are not available after the run
+  # keep_group_datasets_in_memory: False
+
+  # Memory datasets passed between pods (also the ones missing in the catalog)
+  # are saved as Parquet (data frames) or pickle files on the pipeline volume,
+  # or under this prefix (e.g. gs://bucket/kedro-kubeflow) if set. Compilation
+  # fails if such datasets exist, but neither volume nor prefix is configured
+  # intermediate_data_prefix: gs://bucket/intermediate
+
+  # Optional cache of compiled pipelines, keyed by a fingerprint of the Kedro
+  # pipeline, catalog, parameters and this configuration. Unchanged pipelines
+  # are not compiled again by compile, upload-pipeline and run-once commands
+  # compilation_cache:
+  #   path: .kedro_kubeflow/cache
+
+  # Budget of the compiled workflow size. Kubernetes objects are limited to
+  # 1.5MiB by etcd, and Argo adds the status of the steps to the workflow
+  # object while it runs. compile, upload-pipeline and run-once commands
+  # warn about (or fail on) workflows exceeding the budget before sending them
+  # workflow_size:
+  #   budget: 1Mi
+  #   on_exceeded: warn
+
+  # Optional split of pipelines too large for one Argo workflow into stages
+  # fitting the workflow_size budget (and of at most max_steps steps, if set),
+  # run one after another as separate runs sharing the pipeline volume. The
+  # last step of every stage submits the next one, so the pods need access to
+  # the Kubeflow Pipelines API. Not available with full node merge strategy
+  # nor volume claims
+  # stages:
+  #   max_steps: 500
+
   # Optional volume specification
   volume:
 
@@ -80,18 +133,27 @@ run_config:
     storageclass: null # default
 
     # The size of the volume that is created. Applicable for some storage
-    # classes
+    # classes. Use "auto" to estimate the size from the local data directory
+    # copied to the volume (only the files of the input datasets with
+    # copy_inputs_only) and the sizes recorded in size_history (with
+    # `kedro kubeflow record-dataset-sizes`), multiplied by size_headroom
     size: 1Gi
+    # size_history: .kedro_kubeflow/dataset_sizes.json
+    # size_headroom: 1.5
 
     # Access mode of the volume used to exchange data. ReadWriteMany is
     # preferred, but it is not supported on some environements (like GKE)
     # Default value: ReadWriteOnce
     # access_modes: [ReadWriteMany]
 
-    # Flag indicating if the data-volume-init step (copying raw data to the
-    # fresh volume) should be skipped
+    # Flag indicating if the data-volume-init step (copying the data directory
+    # to the fresh volume) should be skipped
     skip_init: False
 
+    # Flag making the data-volume-init step copy only the local input datasets
+    # of the pipeline instead of the whole data directory
+    copy_inputs_only: False
+
     # Allows to specify user executing pipelines within containers
     # Default: root user (to avoid issues with volumes in GKE)
     owner: 0
@@ -100,6 +162,13 @@ run_config:
     # kept after the pipeline is deleted
     keep: False
 
+    # Names of persistent volume claims reused between runs instead of
+    # creating a new volume for every run. Each run locks one free claim
+    # from the list (waiting up to lock_timeout seconds if all are in use),
+    # missing claims are created with the settings above
+    # claims: [kedro-data-0, kedro-data-1]
+    # lock_timeout: 3600
+
   # Optional section allowing adjustment of the resources
   # reservations and limits for the nodes
   resources:
@@ -118,6 +187,16 @@ run_config:
     tensorflow_step:
       nvidia.com/gpu: 1
 
+    # Values above are used both as requests and limits. Bursty nodes can
+    # set them separately, or derive limits from requests with a ratio
+    # feature_engineering:
+    #   requests:
+    #     cpu: 500m
+    #   limits:
+    #     memory: 4Gi
+    #   limit_ratio:
+    #     cpu: 4
+
     # Default settings for the nodes
     __default__:
       cpu: 1
@@ -175,6 +254,37 @@ class DefaultConfigDict(defaultdict):
 
 
 class ResourceConfig(dict):
+    BLOCKS = ("requests", "limits", "limit_ratio")
+
+    @classmethod
+    def normalize_entry(cls, node: str, entry: dict) -> dict:
+        """Validates resource names and quantities of the node entry, so typos
+        fail when the config is loaded instead of at pod creation."""
+
+        def normalize(resources: dict) -> dict:
+            return {
+                resource: None if value is None else normalize_resource(resource, value)
+                for resource, value in resources.items()
+            }
+
+        try:
+            if not isinstance(entry, dict):
+                raise ValueError(f"Expected a mapping of resources, got {entry!r}")
+            normalized = normalize({key: value for key, value in entry.items() if key not in cls.BLOCKS})
+            for block in ("requests", "limits"):
+                if block in entry:
+                    normalized[block] = normalize(entry[block] or {})
+            if "limit_ratio" in entry:
+                normalized["limit_ratio"] = {}
+                for resource, ratio in (entry["limit_ratio"] or {}).items():
+                    normalize_resource(resource, 0)
+                    if ratio is not None and (not isinstance(ratio, (int, float)) or ratio <= 0):
+                        raise ValueError(f"Limit ratio of {resource} must be a positive number: {ratio}")
+                    normalized["limit_ratio"][resource] = ratio
+        except ValueError as e:
+            raise ValueError(f"Invalid resources of {node}: {e}")
+        return normalized
+
     def __getitem__(self, key):
         defaults: dict = super().get("__default__")
         this: dict = super().get(key, {})
@@ -182,6 +292,60 @@ class ResourceConfig(dict):
         updated_defaults.update(this)
         return updated_defaults
 
+    def requirements(self, key) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Requests and limits of the node, layered over `__default__`.
+
+        Plain entries (like `cpu: 500m`) set both the request and the limit,
+        `requests` and `limits` blocks set them separately and `limit_ratio`
+        derives limits from the requests, unless a limit is set explicitly
+        at the same or a more specific level. A `null` value removes the
+        request or limit inherited from `__default__`. A request raised above
+        the limit inherited from `__default__` raises the limit as well.
+
+        Raises ValueError if a request exceeds the limit set at the same level,
+        as Kubernetes rejects such pods.
+        """
+        from .quantities import parse_quantity, scale_quantity
+
+        requests, limits, ratios = {}, {}, {}
+        for level in ("__default__", key):
+            entry = super().get(level) or {}
+            plain = {resource: value for resource, value in entry.items() if resource not in self.BLOCKS}
+            explicit_limits = {**plain, **(entry.get("limits") or {})}
+            requests.update(plain)
+            limits.update(explicit_limits)
+            requests.update(entry.get("requests") or {})
+            for resource in explicit_limits:
+                ratios.pop(resource, None)
+            ratios.update(entry.get("limit_ratio") or {})
+            for resource, value in (entry.get("requests") or {}).items():
+                inherited_limit = None if resource in explicit_limits else limits.get(resource)
+                if value is not None and inherited_limit is not None:
+                    if parse_quantity(value) > parse_quantity(inherited_limit):
+                        limits[resource] = value
+
+        for resource, ratio in ratios.items():
+            if ratio is not None and requests.get(resource) is not None:
+                limits[resource] = scale_quantity(requests[resource], ratio)
+
+        requests = {resource: value for resource, value in requests.items() if value is not None}
+        limits = {resource: value for resource, value in limits.items() if value is not None}
+        exceeding = [
+            f"{resource} {value} > {limits[resource]}"
+            for resource, value in requests.items()
+            if resource in limits and parse_quantity(value) > parse_quantity(limits[resource])
+        ]
+        if exceeding:
+            raise ValueError(f"Requests of {key} exceed limits: {', '.join(exceeding)}")
+        return requests, limits
+
+    def validate_requirements(self):
+        for node in self:
+            try:
+                self.requirements(node)
+            except ValueError as e:
+                raise ValueError(f"Invalid resources of {node}: {e}")
+
 
 class TolerationConfig(BaseModel):
     key: str
@@ -199,15 +363,51 @@ class RetryPolicyConfig(BaseModel):
 class VolumeConfig(BaseModel):
     storageclass: Optional[str] = None
     size: str = "1Gi"
+    size_history: Optional[str] = None
+    size_headroom: float = 1.5
     access_modes: List[str] = ["ReadWriteOnce"]
     skip_init: bool = False
+    copy_inputs_only: bool = False
     keep: bool = False
     owner: int = 0
+    claims: List[str] = []
+    lock_timeout: int = 3600
+
+
+class StagesConfig(BaseModel):
+    max_steps: Optional[int] = None
+
+    @validator("max_steps")
+    def _validate_max_steps(cls, value):
+        if value is not None and value < 1:
+            raise ValueError(f"Stages must have at least one step, got max_steps: {value}")
+        return value
+
+
+class CompilationCacheConfig(BaseModel):
+    path: str = ".kedro_kubeflow/cache"
+
+
+class WorkflowSizeActionEnum(str, Enum):
+    warn = "warn"
+    fail = "fail"
+
+
+class WorkflowSizeConfig(BaseModel):
+    budget: str = "1Mi"
+    on_exceeded: WorkflowSizeActionEnum = WorkflowSizeActionEnum.warn
+
+    @validator("budget")
+    def _validate_budget(cls, value):
+        if parse_quantity(value) <= 0:
+            raise ValueError(f"Workflow size budget must be positive: {value}")
+        return value
 
 
 class NodeMergeStrategyEnum(str, Enum):
     none = "none"
     full = "full"
+    grouped = "grouped"
 
 
 class ObjectKwargs(BaseModel):
@@ -219,11 +419,13 @@ class ExtraVolumeConfig(BaseModel):
     volume: Dict[str, Union[ObjectKwargs, List[ObjectKwargs], Any]]
     mount_path: str
 
-    def as_v1volume(self) -> V1Volume:
+    def as_v1volume(self) -> "V1Volume":
         return self._construct_v1_volume(self.volume)
 
     @staticmethod
     def _resolve_cls(cls_name):
+        from kubernetes import client as k8s_client
+
         if hasattr(k8s_client, cls_name):
             return getattr(k8s_client, cls_name, None)
         else:
@@ -245,6 +447,8 @@ class ExtraVolumeConfig(BaseModel):
 
     @classmethod
     def _construct_v1_volume(cls, value: dict):
+        from kubernetes.client import V1Volume
+
         return V1Volume(**{k: ExtraVolumeConfig._construct(v) for k, v in value.items()})
 
     @validator("volume")
@@ -294,10 +498,11 @@ class RunConfig(BaseModel):
     def _validate_resources(cls, value):
         default = ResourceConfig({"__default__": {"cpu": "500m", "memory": "1024Mi"}})
         if isinstance(value, dict):
-            default.update(value)
+            default.update({node: ResourceConfig.normalize_entry(node, entry) for node, entry in value.items()})
         elif value is not None:
             logger.error(f"Unknown type for resource config {type(value)}")
             raise TypeError(f"Unknown type for resource config {type(value)}")
+        default.validate_requirements()
         return default
 
     @validator("retry_policy", always=True)
@@ -316,6 +521,15 @@ class RunConfig(BaseModel):
     def _validate_affinity(cls, value):
         return RunConfig._create_default_dict_with(value, None, AffinityConfig)
 
+    @validator("stages")
+    def _validate_stages(cls, value, values):
+        if value is not None:
+            if values.get("node_merge_strategy") == NodeMergeStrategyEnum.full:
+                raise ValueError("Stages cannot be used with full node merge strategy, which runs a single step")
+            if values.get("volume") is not None and values["volume"].claims:
+                raise ValueError("Stages cannot be used with volume claims, which are locked by a single run")
+        return value
+
     image: str
     image_pull_policy: str = "IfNotPresent"
     root: Optional[str]
@@ -331,15 +545,35 @@ class RunConfig(BaseModel):
     affinity: Optional[Dict[str, Any]] = None
     wait_for_completion: bool = False
     store_kedro_outputs_as_kfp_artifacts: bool = True
+    deduplicate_templates: bool = False
     max_cache_staleness: Optional[str] = None
     ttl: int = 3600 * 24 * 7
     on_exit_pipeline: Optional[str] = None
     node_merge_strategy: NodeMergeStrategyEnum = NodeMergeStrategyEnum.none
+    node_grouping: Dict[str, List[str]] = {}
+    compilation_cache: Optional[CompilationCacheConfig] = None
+    workflow_size: WorkflowSizeConfig = WorkflowSizeConfig()
+    stages: Optional[StagesConfig] = None
+    keep_group_datasets_in_memory: bool = False
+    intermediate_data_prefix: Optional[str] = None
 
 
 class PluginConfig(BaseModel):
     host: str
     run_config: RunConfig
+    # written by `kedro kubeflow tune-resources` to kubeflow-tuned-resources.yml
+    tuned_resources: Dict[str, Dict[str, Any]] = {}
+
+    @validator("tuned_resources")
+    def _apply_tuned_resources(cls, value, values):
+        run_config = values.get("run_config")
+        if run_config is not None:
+            for step, resources in value.items():
+                # explicitly configured resources take precedence
+                resources = ResourceConfig.normalize_entry(step, resources)
+                run_config.resources[step] = {**resources, **dict.get(run_config.resources, step, {})}
+            run_config.resources.validate_requirements()
+        return value
 
     @staticmethod
     def sample_config(**kwargs):
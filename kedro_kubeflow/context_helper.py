@@ -1,6 +1,6 @@
 import os
 from functools import cached_property, lru_cache
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict
 
 from kedro import __version__ as kedro_version
 from kedro.config import (
@@ -13,7 +13,10 @@ from omegaconf import DictConfig, OmegaConf
 from omegaconf.resolvers import oc
 from semver import VersionInfo
 
-from .config import PluginConfig
+from .profiling import profile_phase
+
+if TYPE_CHECKING:
+    from .config import PluginConfig
 
 
 class EnvTemplatedConfigLoader(OmegaConfigLoader):
@@ -82,7 +85,11 @@ class ContextHelper(object):
     @property
     @lru_cache()
     def session(self):
-        return KedroSession.create(self._metadata.project_path, env=self._env)
+        return self.create_session()
+
+    def create_session(self, extra_params: Dict[str, Any] = None) -> KedroSession:
+        with profile_phase("kedro.session.create"):
+            return KedroSession.create(self._metadata.project_path, env=self._env, extra_params=extra_params)
 
     @property
     def env(self):
@@ -90,11 +97,20 @@ class ContextHelper(object):
 
     @property
     def context(self):
-        return self.session.load_context()
+        session = self.session
+        with profile_phase("kedro.session.load_context"):
+            return session.load_context()
 
     @cached_property
-    def config(self) -> PluginConfig:
-        cl: AbstractConfigLoader = self.context.config_loader
+    def config(self) -> "PluginConfig":
+        context = self.context
+        with profile_phase("plugin.config"):
+            return self._load_config(context)
+
+    def _load_config(self, context) -> "PluginConfig":
+        from .config import PluginConfig
+
+        cl: AbstractConfigLoader = context.config_loader
         try:
             if self.CONFIG_KEY not in cl.config_patterns.keys():
                 cl.config_patterns.update(
@@ -136,13 +152,16 @@ CONFIG_LOADER_ARGS = {
     @property
     @lru_cache()
     def kfp_client(self):
-        from .kfpclient import KubeflowClient
-
-        return KubeflowClient(
-            self.config,
-            self.project_name,
-            self.context,
-        )
+        with profile_phase("kfp.import"):
+            from .kfpclient import KubeflowClient
+
+        config, context = self.config, self.context
+        with profile_phase("kfp.client.init"):
+            return KubeflowClient(
+                config,
+                self.project_name,
+                context,
+            )
 
     @staticmethod
     def init(metadata, env):
@@ -0,0 +1,90 @@
+import pickle
+from typing import Any, Dict
+
+import fsspec
+from fsspec.core import split_protocol
+
+try:
+    from kedro.io import AbstractDataset
+except ImportError:  # Kedro < 0.19
+    from kedro.io import AbstractDataSet as AbstractDataset
+
+PICKLE_PROTOCOL = 5
+PARQUET_SUFFIX = ".parquet"
+PICKLE_SUFFIX = ".pkl"
+
+
+def _parquet_errors() -> tuple:
+    """Errors of writing data frames that cannot be stored as Parquet, like
+    object columns of mixed types, which are pickled instead"""
+    errors = (ImportError, ValueError, TypeError)
+    try:
+        from pyarrow.lib import ArrowException
+
+        return errors + (ArrowException,)
+    except ImportError:
+        return errors
+
+
+def _is_dataframe(data) -> bool:
+    # avoids importing pandas if the pipeline does not use it
+    return type(data).__name__ == "DataFrame" and type(data).__module__.startswith("pandas")
+
+
+class IntermediateDataset(AbstractDataset):
+    """Dataset storing data passed between nodes run in separate pods.
+
+    pandas DataFrames are saved as Parquet files (if `pyarrow` or `fastparquet`
+    is installed and the frame can be converted), any other object is pickled
+    with protocol 5. The format
+    is reflected in the file extension, so the data can be loaded back
+    without any extra metadata.
+    """
+
+    def __init__(self, path: str):
+        self._path = path.rstrip("/")
+        protocol, _ = split_protocol(self._path)
+        self._fs = fsspec.filesystem(protocol or "file")
+
+    @property
+    def _parquet_path(self):
+        return self._path + PARQUET_SUFFIX
+
+    @property
+    def _pickle_path(self):
+        return self._path + PICKLE_SUFFIX
+
+    def _load(self) -> Any:
+        if self._fs.exists(self._parquet_path):
+            import pandas as pd
+
+            with self._fs.open(self._parquet_path, "rb") as f:
+                return pd.read_parquet(f)
+        with self._fs.open(self._pickle_path, "rb") as f:
+            return pickle.load(f)
+
+    def _save(self, data: Any) -> None:
+        self._fs.makedirs(self._fs._parent(self._path), exist_ok=True)
+        if _is_dataframe(data):
+            try:
+                with self._fs.open(self._parquet_path, "wb") as f:
+                    data.to_parquet(f)
+                self._remove(self._pickle_path)
+                return
+            except _parquet_errors():
+                # a partially written file would be preferred over the pickle by _load
+                self._remove(self._parquet_path)
+        with self._fs.open(self._pickle_path, "wb") as f:
+            pickle.dump(data, f, protocol=PICKLE_PROTOCOL)
+        self._remove(self._parquet_path)
+
+    def _remove(self, path):
+        # a retried node could have saved the data in the other format before
+        if self._fs.exists(path):
+            self._fs.rm(path)
+
+    def _exists(self) -> bool:
+        return self._fs.exists(self._parquet_path) or self._fs.exists(self._pickle_path)
+
+    def _describe(self) -> Dict[str, Any]:
+        return dict(path=self._path)
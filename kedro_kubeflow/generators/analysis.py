@@ -0,0 +1,175 @@
+"""Parallelism and critical path of the Kubeflow Pipelines steps (`kedro kubeflow analyze`)"""
+import statistics
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Set, Tuple
+
+from kedro.pipeline.node import Node
+from tabulate import tabulate
+
+from ..config import NodeMergeStrategyEnum, RunConfig
+from ..quantities import format_total, parse_quantity
+from ..utils import workflow_step_name
+from .grouping import group_nodes
+from .utils import _config_key, step_op_name
+
+
+def pipeline_steps(
+    pipeline_name: str, node_dependencies: Dict[Node, Set[Node]], run_config: RunConfig
+) -> Tuple[Dict[str, List[Node]], Dict[str, Set[str]]]:
+    """Steps the pipeline is compiled into with the configured node merge strategy"""
+    if run_config.node_merge_strategy == NodeMergeStrategyEnum.full:
+        return {pipeline_name: list(node_dependencies)}, {pipeline_name: set()}
+    return group_nodes(
+        node_dependencies,
+        run_config.node_grouping,
+        fuse_chains=run_config.node_merge_strategy == NodeMergeStrategyEnum.grouped,
+    )
+
+
+def step_requests(run_config: RunConfig, steps) -> Dict[str, Dict[str, Decimal]]:
+    resources = run_config.resources
+    return {
+        step: {
+            resource: parse_quantity(value)
+            for resource, value in resources.requirements(_config_key(resources, step_op_name(step), step))[0].items()
+        }
+        for step in steps
+    }
+
+
+def workflow_durations(workflow: dict) -> Dict[str, float]:
+    """Wall time in seconds of the finished steps of an Argo workflow
+    (as exported with `kubectl get workflow -o json`)."""
+
+    def parse(timestamp):
+        return datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ")
+
+    durations = defaultdict(float)
+    for node in workflow.get("status", {}).get("nodes", {}).values():
+        if node.get("type") == "Pod" and node.get("startedAt") and node.get("finishedAt"):
+            # attempts of a retried step add up to its wall time
+            step = workflow_step_name(node)
+            durations[step] += (parse(node["finishedAt"]) - parse(node["startedAt"])).total_seconds()
+    return dict(durations)
+
+
+def mean_durations(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    samples = defaultdict(list)
+    for run in runs:
+        for step, duration in run.items():
+            samples[step].append(duration)
+    return {step: statistics.mean(values) for step, values in samples.items()}
+
+
+def _levels(step_dependencies: Dict[str, Set[str]]) -> Dict[str, int]:
+    levels = {}
+    remaining = {step: set(dependencies) for step, dependencies in step_dependencies.items()}
+    level = 0
+    while remaining:
+        ready = [step for step, dependencies in remaining.items() if not dependencies - levels.keys()]
+        if not ready:
+            raise ValueError("Cannot analyze steps, dependencies contain a cycle")
+        for step in ready:
+            levels[step] = level
+            del remaining[step]
+        level += 1
+    return levels
+
+
+def _peak(intervals: List[Tuple[float, float, Dict[str, Decimal]]]) -> Tuple[int, Dict[str, Decimal]]:
+    # step finishing at the time another one starts frees its resources first
+    events = sorted(
+        [(start, 1, index) for index, (start, _, _) in enumerate(intervals)]
+        + [(finish, 0, index) for index, (_, finish, _) in enumerate(intervals)]
+    )
+    running, max_running = 0, 0
+    current, peak = defaultdict(Decimal), defaultdict(Decimal)
+    for _, starting, index in events:
+        sign = 1 if starting else -1
+        running += sign
+        for resource, value in intervals[index][2].items():
+            current[resource] += sign * value
+            peak[resource] = max(peak[resource], current[resource])
+        max_running = max(max_running, running)
+    return max_running, dict(peak)
+
+
+def analyze_steps(
+    step_dependencies: Dict[str, Set[str]],
+    requests: Dict[str, Dict[str, Decimal]],
+    durations: Optional[Dict[str, float]] = None,
+) -> dict:
+    """Simulates the run of the steps with unlimited cluster capacity: every
+    step starts as soon as its dependencies finish. Without duration estimates
+    every step takes one time unit, so the run proceeds level by level; steps
+    missing in the estimates take the median of the known durations.
+    """
+    levels = _levels(step_dependencies)
+    durations = durations or {}
+    # estimates taken from Argo workflows are keyed by the op names of the steps
+    known = {
+        step: durations[key] for step in levels for key in dict.fromkeys([step, step_op_name(step)]) if key in durations
+    }
+    default_duration = statistics.median(known.values()) if known else 1.0
+
+    finish, previous = {}, {}
+    for step in sorted(levels, key=levels.get):
+        start = max((finish[dependency] for dependency in step_dependencies[step]), default=0.0)
+        previous[step] = max(step_dependencies[step], key=lambda dependency: finish[dependency], default=None)
+        finish[step] = start + known.get(step, default_duration)
+
+    critical_path = []
+    step = max(finish, key=finish.get, default=None)
+    while step is not None:
+        critical_path.append(step)
+        step = previous[step]
+
+    max_pods, peak_requests = _peak(
+        [(finish[step] - known.get(step, default_duration), finish[step], requests.get(step, {})) for step in levels]
+    )
+    width = defaultdict(int)
+    for level in levels.values():
+        width[level] += 1
+
+    return {
+        "steps": len(levels),
+        "level_widths": [width[level] for level in sorted(width)],
+        "critical_path": critical_path[::-1],
+        "max_concurrent_pods": max_pods,
+        "peak_requests": peak_requests,
+        "total_requests": {
+            resource: sum(step_requests.get(resource, Decimal(0)) for step_requests in requests.values())
+            for resource in {resource for step_requests in requests.values() for resource in step_requests}
+        },
+        "wall_time_s": max(finish.values(), default=0.0) if known else None,
+        "steps_without_estimates": sorted(set(levels) - known.keys()) if known else [],
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"Steps: {report['steps']}, levels: {len(report['level_widths'])}, "
+        f"max concurrent pods: {report['max_concurrent_pods']}",
+        "",
+        tabulate(enumerate(report["level_widths"]), headers=["Level", "Steps"]),
+        "",
+        f"Critical path ({len(report['critical_path'])} steps): {' -> '.join(report['critical_path'])}",
+        "",
+        tabulate(
+            [
+                [resource, format_total(resource, report["peak_requests"][resource]), format_total(resource, total)]
+                for resource, total in sorted(report["total_requests"].items())
+            ],
+            headers=["Resource", "Requested at peak", "Requested by all steps"],
+        ),
+    ]
+    if report["wall_time_s"] is not None:
+        lines += ["", f"Predicted wall time: {timedelta(seconds=round(report['wall_time_s']))}"]
+        if report["steps_without_estimates"]:
+            lines.append(
+                f"Steps without duration estimates (median duration assumed): "
+                f"{', '.join(report['steps_without_estimates'])}"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,96 @@
+"""Lookup of Kedro datasets storage, including datasets matched by dataset factories"""
+import re
+from typing import Dict, Optional
+
+from .utils import is_local_fs
+
+MEMORY_DATASET_TYPES = ("MemoryDataset", "MemoryDataSet", "SharedMemoryDataset", "SharedMemoryDataSet")
+
+
+def _pattern_specificity(pattern: str) -> int:
+    return len(re.sub(r"\{.*?\}", "", pattern))
+
+
+def _resolve_config(config, values: Dict[str, str]):
+    if isinstance(config, dict):
+        return {key: _resolve_config(value, values) for key, value in config.items()}
+    if isinstance(config, (list, tuple)):
+        return [_resolve_config(value, values) for value in config]
+    if isinstance(config, str) and "}" in config:
+        return config.format_map(values)
+    return config
+
+
+class CatalogIndex(object):
+    """Index of the catalog configuration answering where each dataset is stored.
+
+    Explicitly declared datasets are indexed when the index is built, names
+    matching dataset factory patterns are resolved on first lookup (following
+    Kedro rules: the most specific pattern wins) and remembered, so every
+    lookup after that is a dictionary access.
+    """
+
+    def __init__(self, catalog: Dict[str, dict]):
+        catalog = catalog or {}
+        self._patterns = sorted(
+            (name for name in catalog if "{" in name),
+            key=lambda pattern: (-_pattern_specificity(pattern), -pattern.count("{"), pattern),
+        )
+        self._catalog = catalog
+        self._configs: Dict[str, Optional[dict]] = {
+            name: config
+            for name, config in catalog.items()
+            if "{" not in name and not name.startswith("_") and isinstance(config, dict)
+        }
+        self._local_paths: Dict[str, Optional[str]] = {name: self._local_path(name) for name in self._configs}
+
+    def config(self, dataset: str) -> Optional[dict]:
+        """Catalog entry of the dataset (resolved if it comes from a dataset
+        factory) or None if the dataset is not declared in the catalog."""
+        if dataset not in self._configs:
+            self._configs[dataset] = self._match(dataset)
+        return self._configs[dataset]
+
+    def is_declared(self, dataset: str) -> bool:
+        return self.config(dataset) is not None
+
+    def is_memory(self, dataset: str) -> bool:
+        """Checks if the dataset lives only in the memory of the process running
+        the node, which is also the case for datasets missing in the catalog."""
+        config = self.config(dataset)
+        if config is None:
+            return True
+        return str(config.get("type", "")).split(".")[-1] in MEMORY_DATASET_TYPES
+
+    def local_filepath(self, dataset: str) -> Optional[str]:
+        """Path of the dataset if it is stored in a file on the local file
+        system, None for remote and non-file datasets."""
+        if dataset not in self._local_paths:
+            self._local_paths[dataset] = self._local_path(dataset)
+        return self._local_paths[dataset]
+
+    def local_data_path(self, dataset: str) -> Optional[str]:
+        """Local path read or written by the dataset: path of the file or the
+        directory of partitioned datasets, None for remote and non-file datasets."""
+        config = self.config(dataset) or {}
+        path = config.get("filepath", config.get("path"))
+        return path if isinstance(path, str) and is_local_fs(path) else None
+
+    def _local_path(self, dataset: str) -> Optional[str]:
+        config = self.config(dataset)
+        if config is None or "filepath" not in config or not is_local_fs(config["filepath"]):
+            return None
+        return config["filepath"]
+
+    def _match(self, dataset: str) -> Optional[dict]:
+        if not self._patterns:
+            return None
+
+        # dataset factories (and `parse` among Kedro dependencies) come with Kedro 0.18.12
+        from parse import parse
+
+        for pattern in self._patterns:
+            result = parse(pattern, dataset)
+            if result:
+                return _resolve_config(self._catalog[pattern], result.named)
+        return None
@@ -0,0 +1,20 @@
+from typing import Dict, List, Set, Tuple
+
+from kedro.pipeline.node import Node
+
+from .grouping import group_nodes
+from .pod_per_node_pipeline_generator import PodPerNodePipelineGenerator
+
+
+class GroupedPipelineGenerator(PodPerNodePipelineGenerator):
+    """Generator running linear chains of Kedro nodes within a single pod,
+    in addition to grouping the nodes by tags configured in `node_grouping`."""
+
+    def _group_nodes(
+        self, node_dependencies: Dict[Node, Set[Node]]
+    ) -> Tuple[Dict[str, List[Node]], Dict[str, Set[str]]]:
+        return group_nodes(
+            node_dependencies,
+            self.run_config.node_grouping,
+            fuse_chains=True,
+        )
@@ -0,0 +1,157 @@
+"""Grouping of Kedro nodes into Kubeflow Pipelines steps"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from kedro.pipeline.node import Node
+
+
+def _toposorted(node_dependencies: Dict[Node, Set[Node]]) -> List[Node]:
+    remaining = {node: set(parents) for node, parents in node_dependencies.items()}
+    ordered = []
+    while remaining:
+        ready = sorted((node for node, parents in remaining.items() if not parents), key=lambda n: n.name)
+        if not ready:
+            raise ValueError("Cannot sort nodes, dependencies contain a cycle")
+        for node in ready:
+            del remaining[node]
+        for parents in remaining.values():
+            parents.difference_update(ready)
+        ordered.extend(ready)
+    return ordered
+
+
+def _tag_groups(nodes: List[Node], node_grouping: Dict[str, List[str]]) -> Dict[Node, str]:
+    owners = {}
+    for group, tags in node_grouping.items():
+        for node in nodes:
+            if not node.tags.intersection(tags):
+                continue
+            if node in owners:
+                raise ValueError(f"Node {node.name} matches tags of more than one group: {owners[node]}, {group}")
+            owners[node] = group
+    return owners
+
+
+def _ensure_acyclic(group_dependencies: Dict[str, Set[str]]):
+    remaining = {group: set(parents) for group, parents in group_dependencies.items()}
+    while remaining:
+        ready = {group for group, parents in remaining.items() if not parents}
+        if not ready:
+            raise ValueError("Node grouping creates a cycle between groups: " + ", ".join(sorted(remaining.keys())))
+        for group in ready:
+            del remaining[group]
+        for parents in remaining.values():
+            parents.difference_update(ready)
+
+
+def group_nodes(
+    node_dependencies: Dict[Node, Set[Node]],
+    node_grouping: Dict[str, List[str]] = None,
+    fuse_chains: bool = False,
+) -> Tuple[Dict[str, List[Node]], Dict[str, Set[str]]]:
+    """Splits Kedro nodes into groups, each of them run as one Kubeflow Pipelines step.
+
+    Nodes tagged with any of the tags listed in `node_grouping` are put into the
+    group of the matching name. If `fuse_chains` is set, remaining nodes forming
+    a linear chain (node with a single parent that has no other children) are
+    merged into one group named after the first node of the chain. Every other
+    node forms a group on its own, named after the node.
+
+    :param node_dependencies: mapping of Kedro nodes to their parents
+    :param node_grouping: mapping of group names to Kedro tags
+    :param fuse_chains: flag indicating if linear chains of nodes should be merged
+    :return: groups of nodes (in topological order) and dependencies between groups
+    """
+    nodes = _toposorted(node_dependencies)
+    owners = _tag_groups(nodes, node_grouping or {})
+    tagged = set(owners.keys())
+
+    children = defaultdict(set)
+    for node, parents in node_dependencies.items():
+        for parent in parents:
+            children[parent].add(node)
+
+    for node in nodes:
+        if node in owners:
+            continue
+        parents = node_dependencies[node]
+        if fuse_chains and len(parents) == 1:
+            (parent,) = parents
+            if parent not in tagged and len(children[parent]) == 1:
+                owners[node] = owners[parent]
+                continue
+        if node.name in (node_grouping or {}):
+            raise ValueError(f"Group name {node.name} collides with the name of a node outside of the group")
+        owners[node] = node.name
+
+    groups: Dict[str, List[Node]] = defaultdict(list)
+    group_dependencies: Dict[str, Set[str]] = {}
+    for node in nodes:
+        group = owners[node]
+        groups[group].append(node)
+        group_dependencies.setdefault(group, set()).update(
+            owners[parent] for parent in node_dependencies[node] if owners[parent] != group
+        )
+
+    _ensure_acyclic(group_dependencies)
+    return dict(groups), group_dependencies
+
+
+def group_datasets(groups: Dict[str, List[Node]]) -> Dict[str, Tuple[str, Set[str]]]:
+    """Finds datasets passed between nodes of the pipeline.
+
+    :param groups: groups of nodes, as returned by `group_nodes`
+    :return: mapping of datasets produced and consumed by the nodes to the
+        group producing them and the groups consuming them
+    """
+    producers = {output: group for group, nodes in groups.items() for node in nodes for output in node.outputs}
+    consumers: Dict[str, Set[str]] = defaultdict(set)
+    for group, nodes in groups.items():
+        for node in nodes:
+            for dataset in node.inputs:
+                if dataset in producers:
+                    consumers[dataset].add(group)
+    return {dataset: (producers[dataset], consumers[dataset]) for dataset in sorted(consumers)}
+
+
+def split_into_stages(
+    group_dependencies: Dict[str, Set[str]],
+    max_steps: Optional[int] = None,
+    step_sizes: Optional[Dict[str, int]] = None,
+    budget: Optional[int] = None,
+) -> List[List[str]]:
+    """Splits groups into stages run one after another. Stages are consecutive
+    slices of a topological order of the groups, so every group depends only
+    on groups of the same or earlier stages. A stage ends before the group
+    that would exceed `max_steps` groups or `budget` bytes of the steps of the
+    stage; a group larger than the budget gets a stage of its own.
+
+    :param group_dependencies: dependencies between groups, as returned by `group_nodes`
+    :param max_steps: maximum number of groups in a stage
+    :param step_sizes: sizes of the steps running the groups in the workflow
+    :param budget: maximum sum of the sizes of the steps of a stage
+    :return: names of the groups of every stage
+    """
+    remaining = {group: set(parents) for group, parents in group_dependencies.items()}
+    ordered = []
+    while remaining:
+        ready = [group for group, parents in remaining.items() if not parents]
+        if not ready:
+            raise ValueError("Cannot split groups into stages, dependencies contain a cycle")
+        for group in ready:
+            del remaining[group]
+        for parents in remaining.values():
+            parents.difference_update(ready)
+        ordered.extend(ready)
+
+    stages, size = [[]], 0
+    for group in ordered:
+        step_size = (step_sizes or {}).get(group, 0)
+        full = max_steps is not None and len(stages[-1]) >= max_steps
+        too_large = budget is not None and size + step_size > budget
+        if stages[-1] and (full or too_large):
+            stages.append([])
+            size = 0
+        stages[-1].append(group)
+        size += step_size
+    return stages
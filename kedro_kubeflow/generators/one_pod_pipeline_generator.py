@@ -3,16 +3,18 @@ import logging
 from kedro.framework.context import KedroContext
 from kfp import dsl
 
+from ..profiling import profile_phase
 from ..utils import clean_name
+from .catalog_index import CatalogIndex
 from .utils import (
-    create_arguments_from_parameters,
-    create_command_using_params_dumper,
     create_container_environment,
     create_pipeline_exit_handler,
+    create_run_node_arguments,
     customize_op,
-    is_local_fs,
     maybe_add_params,
     merge_namespaced_params_to_dict,
+    node_parameters,
+    pipeline_fingerprint,
 )
 
 
@@ -25,6 +27,18 @@ class OnePodPipelineGenerator(object):
         dsl.ContainerOp._DISABLE_REUSABLE_COMPONENT_WARNING = True
         self.run_config = config.run_config
         self.catalog = context.config_loader.get("catalog")
+        self.catalog_index = CatalogIndex(self.catalog)
+
+    def fingerprint(self, pipeline, image, image_pull_policy):
+        return pipeline_fingerprint(
+            self.project_name,
+            self.run_config,
+            self.context,
+            self.catalog,
+            pipeline,
+            image,
+            image_pull_policy,
+        )
 
     def generate_pipeline(self, pipeline, image, image_pull_policy):
         merged_params = merge_namespaced_params_to_dict(self.context.params)
@@ -32,6 +46,8 @@ class OnePodPipelineGenerator(object):
         @dsl.pipeline(self.project_name, self.run_config.description)
         @maybe_add_params(merged_params)
         def convert_kedro_pipeline_to_kfp() -> None:
+            from kedro.framework.project import pipelines  # NOQA
+
             dsl.get_pipeline_conf().set_ttl_seconds_after_finished(self.run_config.ttl)
             with create_pipeline_exit_handler(
                 pipeline,
@@ -39,31 +55,35 @@ class OnePodPipelineGenerator(object):
                 image_pull_policy,
                 self.run_config,
                 self.context,
-            ):
-                self._build_kfp_op(pipeline, merged_params, image, image_pull_policy)
+            ), profile_phase("generator.build_ops"):
+                self._build_kfp_op(
+                    pipeline,
+                    node_parameters(pipelines[pipeline].nodes, merged_params.keys()),
+                    pipelines[pipeline].all_outputs(),
+                    image,
+                    image_pull_policy,
+                )
 
         return convert_kedro_pipeline_to_kfp
 
     def _build_kfp_op(
         self,
         pipeline,
-        params,
+        parameter_names,
+        outputs,
         image,
         image_pull_policy,
     ) -> dsl.ContainerOp:
         container_op = dsl.ContainerOp(
             name=clean_name(pipeline),
             image=image,
-            command=create_command_using_params_dumper(
-                "kedro " "run " f"--env {self.context.env} " f"--pipeline {pipeline} " f"--config config.yaml"
-            ),
-            arguments=create_arguments_from_parameters(params.keys()),
+            command=["kedro"],
+            arguments=create_run_node_arguments(self.context.env, pipeline, parameter_names),
             container_kwargs={"env": create_container_environment()},
             file_outputs={
-                output: f"/home/kedro/{self.catalog[output]['filepath']}"
-                for output in self.catalog
-                if "filepath" in self.catalog[output]
-                and is_local_fs(self.catalog[output]["filepath"])
+                output: f"/home/kedro/{filepath}"
+                for output in sorted(outputs)
+                if (filepath := self.catalog_index.local_filepath(output))
                 and self.run_config.store_kedro_outputs_as_kfp_artifacts
             },
         )
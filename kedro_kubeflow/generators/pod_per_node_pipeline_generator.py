@@ -1,41 +1,90 @@
 import logging
-from typing import Dict, Set
+import os
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
 
 import kubernetes.client as k8s
 from kedro.framework.context import KedroContext
 from kedro.pipeline.node import Node
 from kfp import dsl
+from kfp.compiler import Compiler
 
+from ..hooks import (
+    IN_MEMORY_DATASETS_ENV,
+    INTERMEDIATE_DATA_PATH_ENV,
+    INTERMEDIATE_DATASETS_ENV,
+)
+from ..profiling import profile_phase
+from ..quantities import parse_quantity
 from ..utils import clean_name, is_mlflow_enabled
+from ..workflow_size import serialized_size
+from .catalog_index import CatalogIndex
+from .grouping import group_datasets, group_nodes, split_into_stages
 from .utils import (
-    create_arguments_from_parameters,
-    create_command_using_params_dumper,
     create_container_environment,
+    create_next_stage_exit_handler,
     create_pipeline_exit_handler,
+    create_run_node_arguments,
     customize_op,
-    is_local_fs,
     maybe_add_params,
     merge_namespaced_params_to_dict,
+    node_parameters,
+    pipeline_fingerprint,
+    pipeline_volume_name,
+    step_op_name,
 )
+from .volume_size import AUTO_SIZE, estimate_volume_size, load_size_history
+
+# directory of the pipeline volume with data passed between pods
+VOLUME_INTERMEDIATE_DIR = "kubeflow-intermediate"
 
 
 class PodPerNodePipelineGenerator(object):
     log = logging.getLogger(__name__)
 
-    def __init__(self, config, project_name, context):
+    def __init__(self, config, project_name, context, compiler_class=Compiler):
+        """`compiler_class` is the compiler of the pipeline, used to measure
+        the steps of pipelines split into stages."""
         self.project_name = project_name
+        self.compiler_class = compiler_class
         self.context: KedroContext = context
         dsl.ContainerOp._DISABLE_REUSABLE_COMPONENT_WARNING = True
         self.run_config = config.run_config
         self.catalog = context.config_loader.get("catalog")
+        self.catalog_index = CatalogIndex(self.catalog)
 
     def configure_max_cache_staleness(self, kfp_ops):
         if self.run_config.max_cache_staleness not in [None, ""]:
             for _, op in kfp_ops.items():
                 op.execution_options.caching_strategy.max_cache_staleness = self.run_config.max_cache_staleness
 
-    def generate_pipeline(self, pipeline, image, image_pull_policy):
+    def fingerprint(self, pipeline, image, image_pull_policy):
+        from kedro.framework.project import pipelines  # NOQA
+
+        return pipeline_fingerprint(
+            self.project_name,
+            self.run_config,
+            self.context,
+            self.catalog,
+            pipeline,
+            image,
+            image_pull_policy,
+            volume_size=self._volume_size(pipelines[pipeline].nodes) if self.run_config.volume else None,
+        )
+
+    def generate_pipeline(
+        self, pipeline, image, image_pull_policy, stage=0, run_id=None, volume_name=None, mlflow_run_id=None
+    ):
+        """Generates the Kubeflow pipeline of the Kedro pipeline. Pipelines split
+        into stages (`run_config.stages`) are generated one stage at a time: the
+        first stage creates the volume and the MLflow run, next stages get the
+        id of the first run (used to store intermediate data), the name of the
+        volume and the id of the MLflow run. Stage `None` generates the whole
+        pipeline, regardless of the stages config."""
         merged_params = merge_namespaced_params_to_dict(self.context.params)
+        split = stage is not None and self.run_config.stages is not None
+        step_sizes = self._measure_steps(pipeline, image, image_pull_policy) if split else None
+        stage = stage or 0
 
         @dsl.pipeline(
             name=self.project_name,
@@ -48,49 +97,179 @@ class PodPerNodePipelineGenerator(object):
             from kedro.framework.project import pipelines  # NOQA
 
             dsl.get_pipeline_conf().set_ttl_seconds_after_finished(self.run_config.ttl)
-            node_dependencies = pipelines[pipeline].node_dependencies
-            with create_pipeline_exit_handler(
-                pipeline,
-                image,
-                image_pull_policy,
-                self.run_config,
-                self.context,
-            ):
+            with profile_phase("generator.group_nodes"):
+                groups, group_dependencies = self._group_nodes(pipelines[pipeline].node_dependencies)
+                in_memory_datasets, intermediate_datasets = self._plan_datasets(groups)
+                stages = self._split_into_stages(group_dependencies, step_sizes) if split else [list(groups)]
+                if stage >= len(stages):
+                    raise ValueError(f"Pipeline {pipeline} has {len(stages)} stages, there is no stage {stage + 1}")
+            if stage == len(stages) - 1:
+                exit_handler = create_pipeline_exit_handler(
+                    pipeline,
+                    image,
+                    image_pull_policy,
+                    self.run_config,
+                    self.context,
+                    volume_name=volume_name,
+                )
+            else:
+                exit_handler = create_next_stage_exit_handler(
+                    pipeline,
+                    stage + 1,
+                    image,
+                    image_pull_policy,
+                    self.run_config,
+                    self.context,
+                    run_id or dsl.RUN_ID_PLACEHOLDER,
+                    volume_name or pipeline_volume_name(pipeline),
+                    merged_params.keys(),
+                    mlflow_run_id=mlflow_run_id,
+                )
+            with exit_handler, profile_phase("generator.build_ops"):
                 kfp_ops = self._build_kfp_ops(
                     pipeline,
                     merged_params,
-                    node_dependencies,
+                    groups,
+                    in_memory_datasets,
+                    intermediate_datasets,
                     image,
                     image_pull_policy,
+                    steps=stages[stage],
+                    run_id=run_id,
+                    volume_name=volume_name,
+                    mlflow_run_id=mlflow_run_id,
                 )
 
                 self.configure_max_cache_staleness(kfp_ops)
-                for node, dependencies in node_dependencies.items():
-                    for dependency in dependencies:
-                        kfp_ops[node.name].after(kfp_ops[dependency.name])
+                for group in stages[stage]:
+                    for dependency in group_dependencies[group]:
+                        # dependencies from earlier stages are finished before the stage starts
+                        if dependency in kfp_ops:
+                            kfp_ops[group].after(kfp_ops[dependency])
 
         return convert_kedro_pipeline_to_kfp
 
+    def _group_nodes(
+        self, node_dependencies: Dict[Node, Set[Node]]
+    ) -> Tuple[Dict[str, List[Node]], Dict[str, Set[str]]]:
+        """Split Kedro nodes into groups run as separate kfp steps. Nodes are run
+        in separate steps, unless tagged with tags configured in `node_grouping`."""
+        return group_nodes(node_dependencies, self.run_config.node_grouping)
+
+    def _split_into_stages(
+        self, group_dependencies: Dict[str, Set[str]], step_sizes: Tuple[int, Dict[str, int]]
+    ) -> List[List[str]]:
+        """Splits the steps into stages fitting the workflow size budget, each
+        stage taking the size of the workflow without the steps and the sizes
+        of its steps, as measured in the whole pipeline."""
+        base_size, sizes = step_sizes
+        return split_into_stages(
+            group_dependencies,
+            self.run_config.stages.max_steps,
+            sizes,
+            int(parse_quantity(self.run_config.workflow_size.budget)) - base_size,
+        )
+
+    def _measure_steps(self, pipeline, image, image_pull_policy) -> Tuple[int, Dict[str, int]]:
+        """Compiles the whole pipeline, to find the size of the workflow without
+        the steps running the nodes, and the size of every step: its DAG task
+        and its share of the template, which can be shared by several steps
+        (`deduplicate_templates`)."""
+        from kedro.framework.project import pipelines  # NOQA
+
+        with profile_phase("generator.measure_steps"):
+            workflow = self.compiler_class()._create_workflow(
+                self.generate_pipeline(pipeline, image, image_pull_policy, stage=None)
+            )
+        groups, _ = self._group_nodes(pipelines[pipeline].node_dependencies)
+        templates = {template["name"]: template for template in workflow["spec"]["templates"]}
+        tasks = {
+            task["name"]: task
+            for template in templates.values()
+            for task in (template.get("dag") or {}).get("tasks", [])
+        }
+        runs = defaultdict(int)
+        for task in tasks.values():
+            runs[task["template"]] += 1
+        names = {group: step_op_name(group) for group in groups}
+        sizes = {
+            group: serialized_size(tasks[name])
+            + serialized_size(templates[tasks[name]["template"]]) // runs[tasks[name]["template"]]
+            for group, name in names.items()
+            if name in tasks and tasks[name]["template"] in templates
+        }
+        # steps renamed by kfp to keep the names unique are counted as the largest step
+        largest = max(sizes.values(), default=0)
+        sizes = {group: sizes.get(group, largest) for group in groups}
+        return serialized_size(workflow) - sum(sizes.values()), sizes
+
+    def _plan_datasets(self, groups: Dict[str, List[Node]]) -> Tuple[Dict[str, Set[str]], Dict[str, Set[str]]]:
+        """Finds datasets that need to be overridden in the catalog of each group:
+        datasets kept in memory within the group (if enabled in the config) and
+        memory datasets passed between groups, which have to be persisted, as
+        separate pods cannot share memory.
+
+        Raises ValueError if memory datasets are passed between groups, but
+        there is no volume nor `intermediate_data_prefix` to persist them.
+        """
+        in_memory = defaultdict(set)
+        intermediate = defaultdict(set)
+        for dataset, (producer, consumers) in group_datasets(groups).items():
+            if consumers == {producer}:
+                if self.run_config.keep_group_datasets_in_memory and not self.catalog_index.is_memory(dataset):
+                    in_memory[producer].add(dataset)
+            elif self.catalog_index.is_memory(dataset):
+                for group in consumers | {producer}:
+                    intermediate[group].add(dataset)
+
+        if intermediate and self._intermediate_data_path() is None:
+            crossing = sorted(set.union(*intermediate.values()))
+            raise ValueError(
+                "Memory datasets cannot be passed between nodes run in separate pods, declare them "
+                "in the catalog with a file based dataset type or configure a volume or "
+                "intermediate_data_prefix to persist them: " + ", ".join(crossing)
+            )
+        return in_memory, intermediate
+
+    def _intermediate_data_path(self, run_id=None):
+        run_id = run_id or dsl.RUN_ID_PLACEHOLDER
+        if self.run_config.intermediate_data_prefix:
+            return f"{self.run_config.intermediate_data_prefix.rstrip('/')}/{run_id}"
+        if self.run_config.volume is not None:
+            return f"data/{VOLUME_INTERMEDIATE_DIR}/{run_id}"
+        return None
+
     def _build_kfp_ops(
         self,
         pipeline,
         params,
-        node_dependencies: Dict[Node, Set[Node]],
+        groups: Dict[str, List[Node]],
+        in_memory_datasets: Dict[str, Set[str]],
+        intermediate_datasets: Dict[str, Set[str]],
         image,
         image_pull_policy,
+        steps: List[str] = None,
+        run_id=None,
+        volume_name=None,
+        mlflow_run_id=None,
     ) -> Dict[str, dsl.ContainerOp]:
-        """Build kfp container graph from Kedro node dependencies."""
+        """Build kfp container graph from groups of Kedro nodes. Only the groups
+        listed in `steps` (all by default) are run, reusing the volume named
+        `volume_name` and the MLflow run `mlflow_run_id` if given."""
         kfp_ops = {}
 
-        node_volumes = (
-            self._setup_volumes(f"{pipeline}-data-volume", image, image_pull_policy)
-            if self.run_config.volume is not None
-            else {}
-        )
+        if self.run_config.volume is None:
+            node_volumes = {}
+        elif volume_name:
+            node_volumes = {"/home/kedro/data": dsl.PipelineVolume(name="data-volume", pvc=volume_name)}
+        else:
+            node_volumes = self._setup_volumes(f"{pipeline}-data-volume", groups, image, image_pull_policy)
 
         nodes_env = create_container_environment()
 
-        if is_mlflow_enabled():
+        if is_mlflow_enabled() and mlflow_run_id:
+            nodes_env.append(k8s.V1EnvVar(name="MLFLOW_RUN_ID", value=mlflow_run_id))
+        elif is_mlflow_enabled():
             kfp_ops["mlflow-start-run"] = customize_op(
                 dsl.ContainerOp(
                     name="mlflow-start-run",
@@ -117,43 +296,117 @@ class PodPerNodePipelineGenerator(object):
                 )
             )
 
-        for node in node_dependencies:
-            name = clean_name(node.name)
-            kfp_ops[node.name] = customize_op(
+        for group in groups if steps is None else steps:
+            nodes = groups[group]
+            kfp_ops[group] = customize_op(
                 dsl.ContainerOp(
-                    name=name,
+                    name=clean_name(group),
                     image=image,
-                    command=create_command_using_params_dumper(
-                        "kedro "
-                        "run "
-                        f"--env {self.context.env} "
-                        f"--pipeline {pipeline} "
-                        f"--nodes {node.name} "
-                        f"--config config.yaml"
+                    command=["kedro"],
+                    arguments=create_run_node_arguments(
+                        self.context.env,
+                        pipeline,
+                        node_parameters(nodes, params.keys()),
+                        node_names=[node.name for node in nodes],
                     ),
-                    arguments=create_arguments_from_parameters(params.keys()),
                     pvolumes=node_volumes,
-                    container_kwargs={"env": nodes_env},
+                    container_kwargs={
+                        "env": self._group_env(
+                            nodes_env, in_memory_datasets[group], intermediate_datasets[group], run_id
+                        )
+                    },
                     file_outputs={
-                        output: "/home/kedro/" + self.catalog[output]["filepath"]
+                        output: "/home/kedro/" + filepath
+                        for node in nodes
                         for output in node.outputs
-                        if output in self.catalog
-                        and "filepath" in self.catalog[output]
-                        and is_local_fs(self.catalog[output]["filepath"])
+                        if (filepath := self.catalog_index.local_filepath(output))
+                        and output not in in_memory_datasets[group]
                         and self.run_config.store_kedro_outputs_as_kfp_artifacts
                     },
                 ),
                 image_pull_policy,
                 self.run_config,
+                group_name=group,
             )
 
         return kfp_ops
 
-    def _setup_volumes(self, volume_name, image, image_pull_policy):
+    def _group_env(self, nodes_env, in_memory_datasets: Set[str], intermediate_datasets: Set[str], run_id=None):
+        group_env = list(nodes_env)
+        if in_memory_datasets:
+            group_env.append(k8s.V1EnvVar(name=IN_MEMORY_DATASETS_ENV, value=",".join(sorted(in_memory_datasets))))
+        if intermediate_datasets:
+            group_env.append(k8s.V1EnvVar(name=INTERMEDIATE_DATASETS_ENV, value=",".join(sorted(intermediate_datasets))))
+            group_env.append(k8s.V1EnvVar(name=INTERMEDIATE_DATA_PATH_ENV, value=self._intermediate_data_path(run_id)))
+        return group_env
+
+    def _volume_data_paths(self, groups: Dict[str, List[Node]]) -> List[str]:
+        """Paths (relative to the data directory) of the local datasets read by
+        the pipeline, that need to be copied from the image to the volume."""
+        nodes = [node for group_nodes in groups.values() for node in group_nodes]
+        outputs = {output for node in nodes for output in node.outputs}
+        inputs = {dataset for node in nodes for dataset in node.inputs} - outputs
+        paths = (self.catalog_index.local_data_path(dataset) for dataset in inputs)
+        return sorted({path[len("data/") :] for path in paths if path and path.startswith("data/")})
+
+    def _volume_size(self, nodes: List[Node]) -> str:
+        volume_config = self.run_config.volume
+        if volume_config.size != AUTO_SIZE:
+            return volume_config.size
+        # paths of the catalog and of the history are relative to the project directory
+        root = str(self.context.project_path)
+        history = os.path.join(root, volume_config.size_history) if volume_config.size_history else None
+        size = estimate_volume_size(
+            self.catalog_index,
+            (dataset for node in nodes for dataset in node.inputs + node.outputs),
+            load_size_history(history),
+            volume_config.size_headroom,
+            root,
+            copy_data_directory=not volume_config.copy_inputs_only,
+        )
+        self.log.info("Estimated size of the pipeline volume: %s", size)
+        return size
+
+    def _lock_volume(self, size, image, image_pull_policy) -> dsl.PipelineVolume:
+        volume_config = self.run_config.volume
+        storage_class = ["--storage-class", volume_config.storageclass] if volume_config.storageclass else []
+        lock = customize_op(
+            dsl.ContainerOp(
+                name="data-volume-lock",
+                image=image,
+                command=["kedro"],
+                arguments=[
+                    "kubeflow",
+                    "--env",
+                    self.context.env,
+                    "lock-pipeline-volume",
+                    "--size",
+                    size,
+                    *[arg for mode in volume_config.access_modes for arg in ("--access-mode", mode)],
+                    *storage_class,
+                    "--timeout",
+                    str(volume_config.lock_timeout),
+                    "--output",
+                    "/tmp/volume_claim",
+                    "{{workflow.name}}",
+                    *volume_config.claims,
+                ],
+                file_outputs={"claim": "/tmp/volume_claim"},
+            ),
+            image_pull_policy,
+            self.run_config,
+        )
+        # the lock must be taken by every run, never reused from the cache
+        lock.execution_options.caching_strategy.max_cache_staleness = "P0D"
+        volume = dsl.PipelineVolume(name="data-volume", pvc=lock.outputs["claim"])
+        volume.dependent_names = [lock.name]
+        return volume
+
+    def _create_volume(self, volume_name, size) -> dsl.PipelineVolume:
         vop = dsl.VolumeOp(
             name="data-volume-create",
             resource_name=volume_name,
-            size=self.run_config.volume.size,
+            size=size,
             modes=self.run_config.volume.access_modes,
             storage_class=self.run_config.volume.storageclass,
         )
@@ -163,27 +416,37 @@ class PodPerNodePipelineGenerator(object):
                 "pipelines.kubeflow.org/max_cache_staleness",
                 self.run_config.max_cache_staleness,
             )
+        return vop.volume
+
+    def _setup_volumes(self, volume_name, groups: Dict[str, List[Node]], image, image_pull_policy):
+        reuse_claims = bool(self.run_config.volume.claims)
+        size = self._volume_size([node for nodes in groups.values() for node in nodes])
+        volume = (
+            self._lock_volume(size, image, image_pull_policy) if reuse_claims else self._create_volume(volume_name, size)
+        )
 
         if self.run_config.volume.skip_init:
-            return {"/home/kedro/data": vop.volume}
+            return {"/home/kedro/data": volume}
         else:
             volume_init = customize_op(
                 dsl.ContainerOp(
                     name="data-volume-init",
                     image=image,
-                    command=["sh", "-c"],
+                    command=["kedro"],
                     arguments=[
-                        " ".join(
-                            [
-                                "cp",
-                                "--verbose",
-                                "-r",
-                                "/home/kedro/data/*",
-                                "/home/kedro/datavolume",
-                            ]
-                        )
+                        "kubeflow",
+                        "--env",
+                        self.context.env,
+                        "sync-data-volume",
+                        "--source",
+                        "/home/kedro/data",
+                        "--target",
+                        "/home/kedro/datavolume",
+                        # intermediate data of previous runs on a reused volume
+                        *(["--remove", VOLUME_INTERMEDIATE_DIR] if reuse_claims else []),
+                        *(self._volume_data_paths(groups) if self.run_config.volume.copy_inputs_only else ["."]),
                     ],
-                    pvolumes={"/home/kedro/datavolume": vop.volume},
+                    pvolumes={"/home/kedro/datavolume": volume},
                 ),
                 image_pull_policy,
                 self.run_config,
@@ -0,0 +1,99 @@
+"""Sharing of one Argo template between Kubeflow steps running Kedro nodes
+with the same container spec"""
+import hashlib
+import json
+from collections import defaultdict
+from copy import deepcopy
+from typing import Dict, List, Tuple
+
+from kfp.compiler import Compiler
+
+from ..hooks import IN_MEMORY_DATASETS_ENV, INTERMEDIATE_DATASETS_ENV
+
+NODES_PARAMETER = "kedro-nodes"
+# environment of the step varying between steps, passed as inputs of the shared template
+STEP_ENV_PARAMETERS = {
+    IN_MEMORY_DATASETS_ENV: "kedro-in-memory-datasets",
+    INTERMEDIATE_DATASETS_ENV: "kedro-intermediate-datasets",
+}
+
+
+def _input(name: str) -> str:
+    return "{{inputs.parameters.%s}}" % name
+
+
+def _parameterize(template: dict) -> Tuple[dict, Dict[str, str]]:
+    """Template with the step specific values replaced with input parameters,
+    and the values of these parameters"""
+    template = deepcopy(template)
+    container = template["container"]
+    args = container["args"]
+    index = args.index("--nodes") + 1
+    values = {NODES_PARAMETER: args[index]}
+    args[index] = _input(NODES_PARAMETER)
+    for env in container.get("env", []):
+        if env["name"] in STEP_ENV_PARAMETERS:
+            values[STEP_ENV_PARAMETERS[env["name"]]] = env["value"]
+            env["value"] = _input(STEP_ENV_PARAMETERS[env["name"]])
+    del template["name"]
+    template.setdefault("inputs", {}).setdefault("parameters", []).extend({"name": name} for name in values)
+    return template, values
+
+
+def _is_node_step(template: dict) -> bool:
+    args = (template.get("container") or {}).get("args") or []
+    return "run-node" in args and "--nodes" in args
+
+
+def deduplicate_templates(workflow: dict) -> int:
+    """Replaces templates of steps running Kedro nodes, which differ only by
+    the names of the nodes and the datasets configured in the environment,
+    with one template taking these values as input parameters. Steps with
+    different resources, tolerations, retry policy or output artifacts keep
+    separate templates.
+
+    :return: number of removed templates
+    """
+    templates = workflow["spec"]["templates"]
+    names = {template["name"] for template in templates}
+    shared: Dict[str, List[Tuple[str, Dict[str, str]]]] = defaultdict(list)
+    shared_templates = {}
+    for template in templates:
+        if _is_node_step(template):
+            parameterized, values = _parameterize(template)
+            key = json.dumps(parameterized, sort_keys=True)
+            shared[key].append((template["name"], values))
+            shared_templates[key] = parameterized
+
+    replaced = {}
+    for key, steps in shared.items():
+        if len(steps) < 2:
+            continue
+        name = "run-nodes-" + hashlib.sha256(key.encode()).hexdigest()[:10]
+        if name in names:
+            raise ValueError(f"Cannot deduplicate templates, template {name} already exists")
+        shared_templates[key]["name"] = name
+        for step, values in steps:
+            replaced[step] = (name, values)
+        templates.append(shared_templates[key])
+
+    for template in templates:
+        for task in (template.get("dag") or {}).get("tasks", []):
+            if task["template"] in replaced:
+                name, values = replaced[task["template"]]
+                task["template"] = name
+                task.setdefault("arguments", {}).setdefault("parameters", []).extend(
+                    {"name": parameter, "value": value} for parameter, value in values.items()
+                )
+
+    workflow["spec"]["templates"] = [template for template in templates if template["name"] not in replaced]
+    return len(replaced) - len(set(name for name, _ in replaced.values()))
+
+
+class DeduplicatingCompiler(Compiler):
+    """Compiler sharing templates between steps running Kedro nodes"""
+
+    def _create_workflow(self, *args, **kwargs):
+        workflow = super()._create_workflow(*args, **kwargs)
+        deduplicate_templates(workflow)
+        return workflow
@@ -1,18 +1,20 @@
 import contextlib
+import hashlib
 import itertools
 import json
 import os
-from functools import reduce, wraps
+from functools import lru_cache, reduce, wraps
 from inspect import Parameter, signature
 
-import fsspec
 import kubernetes.client as k8s
-from fsspec.implementations.local import LocalFileSystem
+from fsspec.core import split_protocol
 from kfp import dsl
 from kfp.compiler._k8s_helper import sanitize_k8s_name
 
+from .. import __version__ as plugin_version
 from ..auth import IAP_CLIENT_ID
 from ..config import RunConfig
+from ..utils import clean_name, is_mlflow_enabled
 
 
 def ensure_json_serializable(value):
@@ -91,45 +93,113 @@ def create_container_environment():
     return env_vars
 
 
-def create_command_using_params_dumper(command):
-    return [
-        "bash",
-        "-c",
-        "python -c 'import yaml, sys;"
-        "load=lambda e: yaml.load(e, Loader=yaml.FullLoader);"
-        "params=dict(zip(sys.argv[1::2], [load(e) for e in sys.argv[2::2]]));"
-        'f=open("config.yaml", "w");'
-        'yaml.dump({"run": {"params": params}}, f)\' "$@" &&' + command,
-    ]
+def pipeline_fingerprint(
+    project_name, run_config, context, catalog, pipeline, image, image_pull_policy, volume_size=None
+):
+    """Hash of everything the compiled Kubeflow pipeline depends on: node graph,
+    catalog, parameters, plugin configuration and the compile-time environment."""
+    import kfp
+    from kedro.framework.project import pipelines
+
+    def node_graph(pipeline):
+        return sorted(
+            [node.name, node.inputs, node.outputs, sorted(node.tags), sorted(parent.name for parent in parents)]
+            for node, parents in pipeline.node_dependencies.items()
+        )
+
+    # the parameters passed to the on exit handler depend on its nodes
+    on_exit_pipeline = pipelines.get(run_config.on_exit_pipeline) if run_config.on_exit_pipeline else None
+    fingerprint = {
+        "versions": [plugin_version, kfp.__version__],
+        "project_name": project_name,
+        "run_config": run_config.dict(),
+        "env": context.env,
+        "params": context.params,
+        "catalog": catalog,
+        "pipeline": pipeline,
+        "nodes": node_graph(pipelines[pipeline]),
+        "on_exit_nodes": node_graph(on_exit_pipeline) if on_exit_pipeline is not None else None,
+        "image": image,
+        "image_pull_policy": image_pull_policy,
+        "container_env": [(e.name, e.value) for e in create_container_environment()],
+        "mlflow_enabled": is_mlflow_enabled(),
+        # estimated from the sizes of local files when the volume size is "auto"
+        "volume_size": volume_size,
+    }
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def node_parameters(nodes, parameter_names):
+    """Names of the pipeline parameters used by the nodes, in the order of
+    `parameter_names`. `params:a.b` inputs use the top level parameter `a`,
+    `parameters` input uses all of them."""
+    used = set()
+    for node in nodes:
+        for dataset in node.inputs:
+            if dataset == "parameters":
+                return list(parameter_names)
+            if dataset.startswith("params:"):
+                used.add(dataset[len("params:") :].split(".", 1)[0])
+    return [name for name in parameter_names if name in used]
+
+
+def create_run_node_arguments(env, pipeline, parameter_names, node_names=None):
+    """Arguments of `kedro kubeflow run-node`, running the nodes in the same
+    interpreter, with the pipeline parameters passed as name and value pairs."""
+    nodes = ["--nodes", ",".join(node_names)] if node_names else []
+    return ["kubeflow", "--env", env, "run-node", "--pipeline", pipeline, *nodes, "--"] + list(
+        itertools.chain(*[[param, dsl.PipelineParam(param)] for param in parameter_names])
+    )
+
 
+def step_op_name(step):
+    """Name of the kfp op (and of the Argo template and task) running the step,
+    also the key of the step in the config, unless the step name is present"""
+    return sanitize_k8s_name(clean_name(step))
 
-def create_arguments_from_parameters(paramter_names):
-    return ["_"] + list(itertools.chain(*[[param, dsl.PipelineParam(param)] for param in paramter_names]))
 
+def pipeline_volume_name(pipeline):
+    """Name of the volume created by the run of the pipeline"""
+    return "{{workflow.name}}-" + sanitize_k8s_name(f"{pipeline}-data-volume")
 
-def create_pipeline_exit_handler(pipeline, image, image_pull_policy, run_config, context):
-    enable_volume_cleaning = run_config.volume is not None and not run_config.volume.keep
 
-    if not enable_volume_cleaning and not run_config.on_exit_pipeline:
+def create_pipeline_exit_handler(pipeline, image, image_pull_policy, run_config, context, volume_name=None):
+    # reused claims are kept, but have to be unlocked for the next runs
+    enable_volume_unlocking = run_config.volume is not None and bool(run_config.volume.claims)
+    enable_volume_cleaning = run_config.volume is not None and not run_config.volume.keep and not enable_volume_unlocking
+
+    if not enable_volume_cleaning and not enable_volume_unlocking and not run_config.on_exit_pipeline:
         return contextlib.nullcontext()
 
     commands = []
 
+    if enable_volume_unlocking:
+        commands.append("kedro kubeflow unlock-pipeline-volume {{workflow.name}} " + " ".join(run_config.volume.claims))
+
     if enable_volume_cleaning:
-        commands.append(
-            "kedro kubeflow delete-pipeline-volume " "{{workflow.name}}-" + sanitize_k8s_name(f"{pipeline}-data-volume")
-        )
+        commands.append("kedro kubeflow delete-pipeline-volume " + (volume_name or pipeline_volume_name(pipeline)))
 
     if run_config.on_exit_pipeline:
-        commands.append(
-            "kedro run " "--config config.yaml " f"--env {context.env} " f"--pipeline {run_config.on_exit_pipeline}"
-        )
+        # parameters are passed as name and value pairs in the arguments of the script
+        commands.append(f'kedro kubeflow --env {context.env} run-node --pipeline {run_config.on_exit_pipeline} -- "$@"')
+
+    parameter_names = merge_namespaced_params_to_dict(context.params).keys()
+    if run_config.on_exit_pipeline:
+        from kedro.framework.project import pipelines
+
+        on_exit_pipeline = pipelines.get(run_config.on_exit_pipeline)
+        if on_exit_pipeline is not None:
+            parameter_names = node_parameters(on_exit_pipeline.nodes, parameter_names)
+    else:
+        parameter_names = []
 
     exit_container_op = dsl.ContainerOp(
         name="on-exit",
         image=image,
-        command=create_command_using_params_dumper(";".join(commands)),
-        arguments=create_arguments_from_parameters(context.params.keys())
+        command=["bash", "-c", ";".join(commands)],
+        # the first argument is the name of the script ($0)
+        arguments=["_"]
+        + list(itertools.chain(*[[param, dsl.PipelineParam(param)] for param in parameter_names]))
         + [
             "status",
             "{{workflow.status}}",
@@ -145,6 +215,59 @@ def create_pipeline_exit_handler(pipeline, image, image_pull_policy, run_config,
     return dsl.ExitHandler(customize_op(exit_container_op, image_pull_policy, run_config))
 
 
+def create_next_stage_exit_handler(
+    pipeline,
+    stage,
+    image,
+    image_pull_policy,
+    run_config,
+    context,
+    run_id,
+    volume_name,
+    parameter_names,
+    mlflow_run_id=None,
+):
+    """Exit handler of a stage of the pipeline split into stages, submitting
+    the run of the next stage if the stage succeeded. Otherwise the chain
+    ends, so the volume is removed and the on exit pipeline is run."""
+    volume = ["--volume", volume_name] if run_config.volume is not None else []
+    mlflow_run = ["--mlflow-run-id", mlflow_run_id] if mlflow_run_id else []
+    exit_container_op = dsl.ContainerOp(
+        name="on-exit",
+        image=image,
+        command=["kedro"],
+        arguments=[
+            "kubeflow",
+            "--env",
+            context.env,
+            "run-next-stage",
+            "--pipeline",
+            pipeline,
+            "--stage",
+            str(stage),
+            "--image",
+            image,
+            "--image-pull-policy",
+            image_pull_policy,
+            "--run-id",
+            run_id,
+            *volume,
+            *mlflow_run,
+            "--status",
+            "{{workflow.status}}",
+            "--failures",
+            "{{workflow.failures}}",
+            "--",
+        ]
+        + list(itertools.chain(*[[param, dsl.PipelineParam(param)] for param in parameter_names])),
+        container_kwargs={"env": create_container_environment()},
+    )
+    # the next stage has to be submitted by every run
+    exit_container_op.execution_options.caching_strategy.max_cache_staleness = "P0D"
+
+    return dsl.ExitHandler(customize_op(exit_container_op, image_pull_policy, run_config))
+
+
 def dict_to_v1affinity(affinity_dict):
     def convert_node_affinity(na):
         if not na:
@@ -168,35 +291,48 @@ def dict_to_v1affinity(affinity_dict):
     )
 
 
-def customize_op(op, image_pull_policy, run_config: RunConfig):
+def _config_key(config, op_name, group_name):
+    return group_name if group_name is not None and group_name in config else op_name
+
+
+def customize_op(op, image_pull_policy, run_config: RunConfig, group_name=None):
+    """Applies node specific settings from the run config to the op. Settings
+    are looked up by the name of the group of Kedro nodes run by the op (if
+    present in the config), falling back to the op name."""
     op.container.set_image_pull_policy(image_pull_policy)
     if run_config.volume and run_config.volume.owner is not None:
         op.container.set_security_context(k8s.V1SecurityContext(run_as_user=run_config.volume.owner))
 
-    resources = run_config.resources[op.name]
+    requests, limits = run_config.resources.requirements(_config_key(run_config.resources, op.name, group_name))
     op.container.resources = k8s.V1ResourceRequirements(
-        limits=resources,
-        requests=resources,
+        limits=limits,
+        requests=requests,
     )
 
-    if retry_policy := run_config.retry_policy[op.name]:
+    if retry_policy := run_config.retry_policy[_config_key(run_config.retry_policy, op.name, group_name)]:
         op.set_retry(policy="Always", **retry_policy.dict())
 
-    for toleration in run_config.tolerations[op.name]:
+    for toleration in run_config.tolerations[_config_key(run_config.tolerations, op.name, group_name)]:
         op.add_toleration(k8s.V1Toleration(**toleration.dict()))
 
-    if run_config.affinity.is_set_for(op.name):
-        affinity_dict = run_config.affinity.get_for(op.name)
+    affinity_key = _config_key(run_config.affinity, op.name, group_name)
+    if run_config.affinity.is_set_for(affinity_key):
+        affinity_dict = run_config.affinity.get_for(affinity_key)
         if affinity_dict:
             affinity_obj = dict_to_v1affinity(affinity_dict)
             op.add_affinity(affinity_obj)
 
-    if extra_volumes := run_config.extra_volumes[op.name]:
+    if extra_volumes := run_config.extra_volumes[_config_key(run_config.extra_volumes, op.name, group_name)]:
         op.add_pvolumes({ev.mount_path: dsl.PipelineVolume(volume=ev.as_v1volume()) for ev in extra_volumes})
     return op
 
 
-def is_local_fs(filepath):
+LOCAL_PROTOCOLS = ("file", "local")
+
 
-    file_open = fsspec.open(filepath)
-    return isinstance(file_open.fs, LocalFileSystem)
+@lru_cache(maxsize=None)
+def is_local_fs(filepath):
+    """Checks if the path points to the local file system, based on the
+    protocol of the URL only - no file system object is created."""
+    protocol, _ = split_protocol(filepath)
+    return protocol is None or protocol in LOCAL_PROTOCOLS
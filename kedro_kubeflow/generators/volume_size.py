@@ -0,0 +1,101 @@
+"""Estimation of the pipeline volume size from the catalog and dataset sizes recorded in previous runs"""
+import json
+import math
+import os
+from typing import Dict, Iterable, Optional
+
+from .catalog_index import CatalogIndex
+
+AUTO_SIZE = "auto"
+MIN_SIZE_GI = 1
+
+
+def path_size(path: str) -> int:
+    """Size of the file or of all files in the directory, 0 if the path does not exist"""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _volume_path(catalog_index: CatalogIndex, dataset: str) -> Optional[str]:
+    path = catalog_index.local_data_path(dataset)
+    return path if path and path.startswith("data/") else None
+
+
+def measure_datasets(catalog_index: CatalogIndex, datasets: Iterable[str], root: str = "") -> Dict[str, int]:
+    """Sizes of the datasets stored in existing local files under the data
+    directory, which is the mount point of the pipeline volume. Paths of the
+    catalog are relative to `root`, the project directory."""
+    return {
+        dataset: path_size(path)
+        for dataset in datasets
+        if (volume_path := _volume_path(catalog_index, dataset))
+        and os.path.exists(path := os.path.join(root, volume_path))
+    }
+
+
+def measure_intermediate_datasets(
+    catalog_index: CatalogIndex, datasets: Iterable[str], data_path: str
+) -> Dict[str, int]:
+    """Sizes of the memory datasets passed between pods, stored by a run in
+    the directory of its intermediate data (`data/kubeflow-intermediate/<run
+    id>` on the pipeline volume)."""
+    from ..datasets import PARQUET_SUFFIX, PICKLE_SUFFIX
+
+    sizes = {}
+    for dataset in datasets:
+        if catalog_index.is_memory(dataset):
+            path = os.path.join(data_path, dataset)
+            if size := path_size(path + PARQUET_SUFFIX) + path_size(path + PICKLE_SUFFIX):
+                sizes[dataset] = size
+    return sizes
+
+
+def load_size_history(path: Optional[str]) -> Dict[str, int]:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def record_size_history(path: str, sizes: Dict[str, int]):
+    """Merges the sizes into the history file, keeping the largest size seen for every dataset"""
+    history = load_size_history(path)
+    for dataset, size in sizes.items():
+        history[dataset] = max(history.get(dataset, 0), size)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(history, f, indent=2, sort_keys=True)
+
+
+def estimate_volume_size(
+    catalog_index: CatalogIndex,
+    datasets: Iterable[str],
+    history: Dict[str, int],
+    headroom: float,
+    root: str = "",
+    copy_data_directory: bool = False,
+) -> str:
+    """Size of the volume fitting the datasets stored on it (local files under
+    the data directory and memory datasets persisted between pods), with a
+    headroom factor, in whole gibibytes.
+
+    Every dataset counts with the larger of its current local size and the
+    size recorded in the history, so outputs missing locally are covered by
+    the history of previous runs. Paths of the catalog are relative to
+    `root`, the project directory.
+
+    With `copy_data_directory` the whole local data directory is copied to
+    the volume, so its size is counted instead of the local files of the
+    datasets, which it contains.
+    """
+    datasets = [
+        dataset
+        for dataset in set(datasets)
+        if _volume_path(catalog_index, dataset) or (catalog_index.is_memory(dataset) and dataset in history)
+    ]
+    local_sizes = measure_datasets(catalog_index, datasets, root)
+    total = sum(max(local_sizes.get(dataset, 0), history.get(dataset, 0)) for dataset in datasets)
+    if copy_data_directory:
+        total += path_size(os.path.join(root, "data")) - sum(local_sizes.values())
+    return f"{max(MIN_SIZE_GI, math.ceil(total * headroom / 2**30))}Gi"
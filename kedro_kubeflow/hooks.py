@@ -3,21 +3,40 @@ import os
 from kedro.framework.hooks import hook_impl
 from kedro.io import DataCatalog
 
+try:
+    from kedro.io import MemoryDataset
+except ImportError:  # Kedro < 0.19
+    from kedro.io import MemoryDataSet as MemoryDataset
+
 from kedro_kubeflow.utils import is_mlflow_enabled
 
-from .auth import AuthHandler
+from .auth import AuthHandler, InMemoryTokenCache
+
+IN_MEMORY_DATASETS_ENV = "KEDRO_KUBEFLOW_IN_MEMORY_DATASETS"
+INTERMEDIATE_DATASETS_ENV = "KEDRO_KUBEFLOW_INTERMEDIATE_DATASETS"
+INTERMEDIATE_DATA_PATH_ENV = "KEDRO_KUBEFLOW_INTERMEDIATE_DATA_PATH"
 
 
 class MlflowIapAuthHook:
     """Allows authentication trough IAP proxy the same way as kubeflow pipelines"""
 
-    @hook_impl
-    def after_catalog_created(self, catalog: DataCatalog, **kwargs) -> None:
+    def __init__(self):
+        self.token_cache = InMemoryTokenCache()
 
-        token = AuthHandler().obtain_id_token()
+    def _set_tracking_token(self):
+        token = AuthHandler(token_cache=self.token_cache).obtain_id_token()
         if token:
             os.environ["MLFLOW_TRACKING_TOKEN"] = token
 
+    @hook_impl
+    def after_catalog_created(self, catalog: DataCatalog, **kwargs) -> None:
+        self._set_tracking_token()
+
+    @hook_impl
+    def before_node_run(self) -> None:
+        # refreshes the token only if the cached one is about to expire
+        self._set_tracking_token()
+
 
 class MlflowTagsHook:
     """Adds `kubeflow_run_id` to MLFlow tags based on environment variables"""
@@ -31,5 +50,35 @@ class MlflowTagsHook:
                 mlflow.set_tag("kubeflow_run_id", os.environ["KUBEFLOW_RUN_ID"])
 
 
+class InMemoryDatasetsHook:
+    """Replaces datasets listed (comma separated) in the environment variable
+    with memory datasets, used for datasets passed between nodes of one pod"""
+
+    @hook_impl
+    def after_catalog_created(self, catalog: DataCatalog, **kwargs) -> None:
+        for dataset in filter(None, os.getenv(IN_MEMORY_DATASETS_ENV, "").split(",")):
+            catalog.add(dataset, MemoryDataset(), replace=True)
+
+
+class IntermediateDatasetsHook:
+    """Replaces memory datasets passed between pods, listed (comma separated)
+    in the environment variable, with datasets persisted under the path given
+    by another variable"""
+
+    @hook_impl
+    def after_catalog_created(self, catalog: DataCatalog, **kwargs) -> None:
+        datasets = list(filter(None, os.getenv(INTERMEDIATE_DATASETS_ENV, "").split(",")))
+        if not datasets:
+            return
+
+        from .datasets import IntermediateDataset
+
+        path = os.environ[INTERMEDIATE_DATA_PATH_ENV].rstrip("/")
+        for dataset in datasets:
+            catalog.add(dataset, IntermediateDataset(f"{path}/{dataset}"), replace=True)
+
+
 mlflow_iap_hook = MlflowIapAuthHook()
 mlflow_tags_hook = MlflowTagsHook()
+in_memory_datasets_hook = InMemoryDatasetsHook()
+intermediate_datasets_hook = IntermediateDatasetsHook()
@@ -1,50 +1,115 @@
+import hashlib
+import json
 import logging
-import uuid
-from tempfile import NamedTemporaryFile
-from typing import Dict, Optional
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import Decimal
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from typing import Dict, List, Optional
 
+import yaml
 from kfp import Client
 from kfp.compiler import Compiler
 from tabulate import tabulate
 
+from kedro_kubeflow.generators.grouped_pipeline_generator import (
+    GroupedPipelineGenerator,
+)
 from kedro_kubeflow.generators.one_pod_pipeline_generator import (
     OnePodPipelineGenerator,
 )
 from kedro_kubeflow.generators.pod_per_node_pipeline_generator import (
     PodPerNodePipelineGenerator,
 )
+from kedro_kubeflow.generators.template_deduplication import (
+    DeduplicatingCompiler,
+)
 
-from .auth import AuthHandler
-from .config import NodeMergeStrategyEnum, PluginConfig
+from .auth import AuthHandler, FileTokenCache
+from .cache import CompiledPipelineCache
+from .config import NodeMergeStrategyEnum, PluginConfig, WorkflowSizeActionEnum
+from .profiling import profile_phase
+from .quantities import format_total, parse_quantity
 from .utils import clean_name
+from .workflow_size import format_size_report, serialized_size
 
+COMPILATION_TIME_ANNOTATION = "pipelines.kubeflow.org/pipeline_compilation_time"
+VERSION_DIGEST_LENGTH = 32
+
+_worker_client = None
+
+
+def _init_compile_worker(client):
+    global _worker_client
+    _worker_client = client
+
+
+def _compile_in_worker(pipeline, image, image_pull_policy, output):
+    _worker_client._compile(pipeline, image, image_pull_policy, output)
 
-class KubeflowClient(object):
 
+def resource_totals(workflow: dict) -> Dict[str, Dict[str, Decimal]]:
+    """Sums of requests and limits of all steps of the compiled workflow,
+    with the largest request of a single step. Templates are counted once per
+    DAG task running them, as steps can share one template."""
+    templates = workflow["spec"]["templates"]
+    runs = defaultdict(int)
+    for template in templates:
+        for task in (template.get("dag") or {}).get("tasks", []):
+            runs[task["template"]] += 1
+    totals = defaultdict(lambda: {"requests": Decimal(0), "limits": Decimal(0), "largest_request": Decimal(0)})
+    for template in templates:
+        resources = (template.get("container") or {}).get("resources") or {}
+        count = runs.get(template.get("name"), 1)
+        for kind in ("requests", "limits"):
+            for resource, value in (resources.get(kind) or {}).items():
+                quantity = parse_quantity(value)
+                totals[resource][kind] += count * quantity
+                if kind == "requests":
+                    totals[resource]["largest_request"] = max(totals[resource]["largest_request"], quantity)
+    return dict(totals)
+
+
+class KubeflowClient(object):
     log = logging.getLogger(__name__)
 
     def __init__(self, config: PluginConfig, project_name, context):
         client_params = {}
-        token = AuthHandler().obtain_id_token()
-        if token is not None:
-            client_params = {"existing_token": token}
-        dex_authservice_session = AuthHandler().obtain_dex_authservice_session(
-            kfp_api=config.host,
-        )
-        if dex_authservice_session is not None:
-            client_params = {"cookies": f"authservice_session={dex_authservice_session}"}
+        with profile_phase("auth"):
+            auth_handler = AuthHandler(token_cache=FileTokenCache())
+            token = auth_handler.obtain_id_token()
+            if token is not None:
+                client_params = {"existing_token": token}
+            dex_authservice_session = auth_handler.obtain_dex_authservice_session(
+                kfp_api=config.host,
+            )
+            if dex_authservice_session is not None:
+                client_params = {"cookies": f"authservice_session={dex_authservice_session}"}
         self.host = config.host
-        self.client = Client(host=self.host, **client_params)
+        with profile_phase("kfp.api.connect"):
+            self.client = Client(host=self.host, **client_params)
 
         self.project_name = project_name
         self.pipeline_description = config.run_config.description
+        self.workflow_size = config.run_config.workflow_size
+        self.compiler_class = DeduplicatingCompiler if config.run_config.deduplicate_templates else Compiler
         if config.run_config.node_merge_strategy == NodeMergeStrategyEnum.none:
-            self.generator = PodPerNodePipelineGenerator(config, project_name, context)
+            self.generator = PodPerNodePipelineGenerator(config, project_name, context, self.compiler_class)
         elif config.run_config.node_merge_strategy == NodeMergeStrategyEnum.full:
             self.generator = OnePodPipelineGenerator(config, project_name, context)
+        elif config.run_config.node_merge_strategy == NodeMergeStrategyEnum.grouped:
+            self.generator = GroupedPipelineGenerator(config, project_name, context, self.compiler_class)
+        self.cache = (
+            CompiledPipelineCache(config.run_config.compilation_cache.path)
+            if config.run_config.compilation_cache is not None
+            else None
+        )
 
     def list_pipelines(self):
-        pipelines = self.client.list_pipelines(page_size=30).pipelines
+        with profile_phase("kfp.api.list_pipelines"):
+            pipelines = self.client.list_pipelines(page_size=30).pipelines
         return tabulate(map(lambda x: [x.name, x.id], pipelines), headers=["Name", "ID"])
 
     def run_once(
@@ -59,39 +124,190 @@ class KubeflowClient(object):
         image_pull_policy="IfNotPresent",
         parameters={},
     ) -> Optional[Dict[str, str]]:
-        run = self.client.create_run_from_pipeline_func(
-            self.generator.generate_pipeline(pipeline, image, image_pull_policy),
-            arguments=parameters,
-            experiment_name=experiment_name,
-            namespace=experiment_namespace,
-            run_name=run_name.format(**parameters),
-        )
+        with NamedTemporaryFile(suffix=".yaml") as f:
+            self._compile(pipeline, image, image_pull_policy, f.name)
+            with profile_phase("kfp.api.create_run"):
+                run = self.client.create_run_from_pipeline_package(
+                    f.name,
+                    arguments=parameters,
+                    experiment_name=experiment_name,
+                    namespace=experiment_namespace,
+                    run_name=run_name.format(**parameters),
+                )
 
         if wait:
-            ret = run.wait_for_run_completion(timeout=timeout)
+            with profile_phase("kfp.api.wait_for_run_completion"):
+                ret = run.wait_for_run_completion(timeout=timeout)
             return {"status": ret.run.status, "error": ret.run.error}
         return None
 
+    def run_stage(
+        self,
+        pipeline,
+        image,
+        image_pull_policy,
+        stage,
+        run_id,
+        volume_name,
+        experiment_name,
+        experiment_namespace,
+        run_name,
+        parameters,
+        mlflow_run_id=None,
+    ):
+        """Starts the run of the stage of a pipeline split into stages, with the
+        parameters of the run of the previous stage."""
+        with NamedTemporaryFile(suffix=".yaml") as f:
+            self._compile(
+                pipeline,
+                image,
+                image_pull_policy,
+                f.name,
+                stage=stage,
+                run_id=run_id,
+                volume_name=volume_name,
+                mlflow_run_id=mlflow_run_id,
+            )
+            with profile_phase("kfp.api.create_run"):
+                run = self.client.create_run_from_pipeline_package(
+                    f.name,
+                    arguments=parameters,
+                    experiment_name=experiment_name,
+                    namespace=experiment_namespace,
+                    run_name=f"{self._format_run_name(run_name, parameters)} (stage {stage + 1})",
+                )
+        self.log.info("Started stage %s of pipeline %s: %s", stage + 1, pipeline, run.run_id)
+        return run.run_id
+
+    def _format_run_name(self, run_name, parameters):
+        """Run name filled with the parameters, or as configured if it cannot
+        be filled, as the run of a stage is started from the exit handler and
+        failing there would silently end the chain of runs."""
+        try:
+            return run_name.format(**parameters)
+        except (KeyError, IndexError, ValueError) as e:
+            self.log.warning("Cannot fill run name %s with parameters: %r", run_name, e)
+            return run_name
+
     def compile(self, pipeline, image, output, image_pull_policy="IfNotPresent"):
-        Compiler().compile(
-            self.generator.generate_pipeline(pipeline, image, image_pull_policy),
-            output,
-        )
+        self._compile(pipeline, image, image_pull_policy, output)
         self.log.info("Generated pipeline definition was saved to %s" % output)
+        self._report(pipeline, output)
+
+    def _report(self, pipeline, pipeline_file):
+        with open(pipeline_file) as f:
+            workflow = yaml.safe_load(f)
+        self._report_resources(pipeline, workflow)
+        self.log.info(
+            "Size of pipeline %s:\n%s",
+            pipeline,
+            format_size_report(workflow, int(parse_quantity(self.workflow_size.budget))),
+        )
+
+    def _report_resources(self, pipeline, workflow):
+        totals = resource_totals(workflow)
+        table = tabulate(
+            [
+                [resource] + [format_total(resource, value[key]) for key in ("requests", "limits", "largest_request")]
+                for resource, value in sorted(totals.items())
+            ],
+            headers=["Resource", "Total requests", "Total limits", "Largest step request"],
+        )
+        self.log.info("Resources of all steps of pipeline %s:\n%s", pipeline, table)
+
+    def _compile(self, pipeline, image, image_pull_policy, output, **stage):
+        """Compiles the pipeline, or the stage of the pipeline split into stages
+        selected with `stage` arguments of the generator (not cached)."""
+        key = None
+        if self.cache is not None and not stage:
+            with profile_phase("compilation_cache.get"):
+                key = self.generator.fingerprint(pipeline, image, image_pull_policy)
+                if self.cache.get(key, output):
+                    self._check_workflow_size(pipeline, output)
+                    return
+
+        with profile_phase("generate_pipeline"):
+            pipeline_func = self.generator.generate_pipeline(pipeline, image, image_pull_policy, **stage)
+        with profile_phase("kfp.compile"):
+            self.compiler_class().compile(pipeline_func, output)
+
+        if key is not None:
+            with profile_phase("compilation_cache.put"):
+                self.cache.put(key, output)
+        self._check_workflow_size(pipeline, output)
+
+    def _check_workflow_size(self, pipeline, pipeline_file):
+        """Warns about (or fails on) compiled workflows exceeding the size
+        budget, before they are sent to Kubeflow Pipelines."""
+        with profile_phase("workflow_size.check"):
+            with open(pipeline_file) as f:
+                workflow = yaml.safe_load(f)
+            budget = int(parse_quantity(self.workflow_size.budget))
+            if serialized_size(workflow) <= budget:
+                return
+        message = f"Workflow of pipeline {pipeline} exceeds the size budget:\n{format_size_report(workflow, budget)}"
+        if self.workflow_size.on_exceeded == WorkflowSizeActionEnum.fail:
+            raise ValueError(message)
+        self.log.warning(message)
 
     def get_full_pipeline_name(self, pipeline_name, env):
         return f"[{self.project_name}] {pipeline_name} (env: {env})"[:100]
 
+    def compile_all(self, outputs: Dict[str, str], image, image_pull_policy="IfNotPresent", max_workers=None):
+        """Compiles multiple pipelines (mapping of pipeline name to output file)
+        in parallel processes."""
+        with profile_phase("compile_all"):
+            self._compile_many(outputs, image, image_pull_policy, max_workers)
+        for pipeline, output in outputs.items():
+            self.log.info("Generated definition of pipeline %s was saved to %s", pipeline, output)
+            self._report(pipeline, output)
+
+    def _compile_many(self, outputs: Dict[str, str], image, image_pull_policy, max_workers):
+        if "fork" not in multiprocessing.get_all_start_methods():
+            # spawned workers would need to bootstrap the Kedro project again
+            for pipeline, output in outputs.items():
+                self._compile(pipeline, image, image_pull_policy, output)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_compile_worker,
+            initargs=(self,),
+        ) as executor:
+            futures = [
+                executor.submit(_compile_in_worker, pipeline, image, image_pull_policy, output)
+                for pipeline, output in outputs.items()
+            ]
+            for future in futures:
+                future.result()
+
     def upload(self, pipeline_name, image, image_pull_policy, env):
-        pipeline = self.generator.generate_pipeline(pipeline_name, image, image_pull_policy)
+        with NamedTemporaryFile(suffix=".yaml") as f:
+            self._compile(pipeline_name, image, image_pull_policy, f.name)
+            self._upload_compiled(pipeline_name, f.name, env)
 
+    def upload_all(self, pipeline_names: List[str], image, image_pull_policy, env, max_workers=None):
+        """Compiles multiple pipelines in parallel processes and uploads them
+        using a pool of threads."""
+        with TemporaryDirectory() as compiled_dir:
+            outputs = {name: os.path.join(compiled_dir, f"{i}.yaml") for i, name in enumerate(pipeline_names)}
+            with profile_phase("compile_all"):
+                self._compile_many(outputs, image, image_pull_policy, max_workers)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(self._upload_compiled, name, output, env) for name, output in outputs.items()]
+                for future in futures:
+                    future.result()
+
+    def _upload_compiled(self, pipeline_name, pipeline_file, env):
         full_pipeline_name = self.get_full_pipeline_name(pipeline_name, env)
         if self._pipeline_exists(full_pipeline_name):
-            pipeline_id = self.client.get_pipeline_id(full_pipeline_name)
-            version_id = self._upload_pipeline_version(pipeline, pipeline_id)
-            self.log.info("New version of pipeline created: %s", version_id)
+            with profile_phase("kfp.api.get_pipeline_id"):
+                pipeline_id = self.client.get_pipeline_id(full_pipeline_name)
+            version_id = self._upload_pipeline_version(pipeline_file, pipeline_id)
+            self.log.info("Pipeline version: %s", version_id)
         else:
-            (pipeline_id, version_id) = self._upload_pipeline(pipeline, full_pipeline_name)
+            (pipeline_id, version_id) = self._upload_pipeline(pipeline_file, full_pipeline_name)
             self.log.info("Pipeline created")
 
         self.log.info(
@@ -101,29 +317,63 @@ class KubeflowClient(object):
         )
 
     def _pipeline_exists(self, pipeline_name):
-        return self.client.get_pipeline_id(pipeline_name) is not None
+        with profile_phase("kfp.api.get_pipeline_id"):
+            return self.client.get_pipeline_id(pipeline_name) is not None
 
-    def _upload_pipeline_version(self, pipeline_func, pipeline_id):
-        version_name = f"{clean_name(self.project_name)}-{uuid.uuid4()}"[:100]
-        with NamedTemporaryFile(suffix=".yaml") as f:
-            Compiler().compile(pipeline_func, f.name)
+    @staticmethod
+    def _pipeline_digest(pipeline_file):
+        """Digest of the compiled pipeline, ignoring the compilation timestamp."""
+        with open(pipeline_file) as f:
+            workflow = yaml.safe_load(f)
+        workflow.get("metadata", {}).get("annotations", {}).pop(COMPILATION_TIME_ANNOTATION, None)
+        return hashlib.sha256(json.dumps(workflow, sort_keys=True).encode()).hexdigest()
+
+    def _find_pipeline_version(self, pipeline_id, version_name):
+        # public Client.list_pipeline_versions does not support filtering
+        with profile_phase("kfp.api.list_pipeline_versions"):
+            versions = self.client._pipelines_api.list_pipeline_versions(
+                resource_key_type="PIPELINE",
+                resource_key_id=pipeline_id,
+                filter=json.dumps({"predicates": [{"op": 1, "key": "name", "stringValue": version_name}]}),
+                page_size=1,
+            ).versions
+        return versions[0].id if versions else None
+
+    def _set_default_pipeline_version(self, pipeline_id, version_id):
+        with profile_phase("kfp.api.get_pipeline"):
+            default_version = self.client.get_pipeline(pipeline_id).default_version
+        if default_version is not None and default_version.id == version_id:
+            return
+        # Client has no public method to change the default version
+        with profile_phase("kfp.api.update_pipeline_default_version"):
+            self.client._pipelines_api.update_pipeline_default_version(pipeline_id=pipeline_id, version_id=version_id)
+
+    def _upload_pipeline_version(self, pipeline_file, pipeline_id):
+        digest = self._pipeline_digest(pipeline_file)[:VERSION_DIGEST_LENGTH]
+        version_name = f"{clean_name(self.project_name)[: 99 - VERSION_DIGEST_LENGTH]}-{digest}"
+        if existing_version_id := self._find_pipeline_version(pipeline_id, version_name):
+            self.log.info("Identical version of pipeline already exists: %s", version_name)
+            # the reused version may be older than the current default one
+            self._set_default_pipeline_version(pipeline_id, existing_version_id)
+            return existing_version_id
+
+        with profile_phase("kfp.api.upload_pipeline_version"):
             return self.client.pipeline_uploads.upload_pipeline_version(
-                f.name,
+                pipeline_file,
                 name=version_name,
                 pipelineid=pipeline_id,
                 _request_timeout=10000,
             ).id
 
-    def _upload_pipeline(self, pipeline_func, pipeline_name):
-        with NamedTemporaryFile(suffix=".yaml") as f:
-            Compiler().compile(pipeline_func, f.name)
+    def _upload_pipeline(self, pipeline_file, pipeline_name):
+        with profile_phase("kfp.api.upload_pipeline"):
             pipeline = self.client.pipeline_uploads.upload_pipeline(
-                f.name,
+                pipeline_file,
                 name=pipeline_name,
                 description=self.pipeline_description,
                 _request_timeout=10000,
             )
-            return (pipeline.id, pipeline.default_version.id)
+        return (pipeline.id, pipeline.default_version.id)
 
     def _ensure_experiment_exists(self, experiment_name, experiment_namespace):
         try:
@@ -151,17 +401,18 @@ class KubeflowClient(object):
         parameters,
         env,
     ):
-        experiment_id = self._ensure_experiment_exists(experiment_name, experiment_namespace)
-        pipeline_id = self.client.get_pipeline_id(self.get_full_pipeline_name(pipeline, env))
-        formatted_run_name = run_name.format(**parameters)
-        self._disable_runs(experiment_id, formatted_run_name)
-        self.client.create_recurring_run(
-            experiment_id,
-            formatted_run_name,
-            cron_expression=cron_expression,
-            pipeline_id=pipeline_id,
-            params=parameters,
-        )
+        with profile_phase("kfp.api.schedule"):
+            experiment_id = self._ensure_experiment_exists(experiment_name, experiment_namespace)
+            pipeline_id = self.client.get_pipeline_id(self.get_full_pipeline_name(pipeline, env))
+            formatted_run_name = run_name.format(**parameters)
+            self._disable_runs(experiment_id, formatted_run_name)
+            self.client.create_recurring_run(
+                experiment_id,
+                formatted_run_name,
+                cron_expression=cron_expression,
+                pipeline_id=pipeline_id,
+                params=parameters,
+            )
         self.log.info("Pipeline scheduled to %s", cron_expression)
 
     def _disable_runs(self, experiment_id, run_name):
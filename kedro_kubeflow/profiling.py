@@ -0,0 +1,165 @@
+"""Wall time and peak memory of the plugin phases (`kedro kubeflow --profile`)"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+class _Phase(object):
+    def __init__(self, name, thread, depth, start):
+        self.name = name
+        self.thread = thread
+        self.depth = depth
+        self.start = start
+        self.end = None
+        self.start_memory = tracemalloc.get_traced_memory()[0]
+        self.peak_memory = 0
+
+    def as_dict(self, origin) -> dict:
+        return {
+            "name": self.name,
+            "thread": self.thread,
+            "depth": self.depth,
+            "start_s": round(self.start - origin, 6),
+            "wall_time_s": round(self.end - self.start, 6),
+            "peak_memory_bytes": max(self.peak_memory - self.start_memory, 0),
+        }
+
+
+class Profiler(object):
+    """Records nested phases of the plugin execution.
+
+    Phases are recorded only after `start` is called, otherwise `phase` is a
+    no-op, so the instrumentation stays in the code paths permanently. Peak
+    memory is tracked with `tracemalloc`: the peak is reset when a phase is
+    entered and propagated to the enclosing phase when it is left, so every
+    phase reports the peak reached while it was active (relative to the
+    memory allocated at its start). Peaks of phases running concurrently in
+    threads are approximate, and phases recorded in worker processes are not
+    collected - the parent phase covers their duration.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.origin = None
+        self.phases: List[_Phase] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def start(self):
+        self.enabled = True
+        self.origin = time.perf_counter()
+        self.phases = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self):
+        self.enabled = False
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @property
+    def _stack(self) -> List[_Phase]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        stack = self._stack
+        with self._lock:
+            if stack:
+                stack[-1].peak_memory = max(stack[-1].peak_memory, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            current = _Phase(name, threading.current_thread().name, len(stack), time.perf_counter())
+            self.phases.append(current)
+        stack.append(current)
+        try:
+            yield
+        finally:
+            stack.pop()
+            with self._lock:
+                current.end = time.perf_counter()
+                current.peak_memory = max(current.peak_memory, tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1].peak_memory = max(stack[-1].peak_memory, current.peak_memory)
+                tracemalloc.reset_peak()
+
+    def _finished(self) -> List[_Phase]:
+        return [phase for phase in self.phases if phase.end is not None]
+
+    def report(self) -> Dict:
+        return {
+            "pid": os.getpid(),
+            "total_wall_time_s": round(time.perf_counter() - self.origin, 6),
+            "phases": [phase.as_dict(self.origin) for phase in self._finished()],
+        }
+
+    def speedscope(self) -> Dict:
+        """Report in the evented format of https://www.speedscope.app,
+        with one profile per thread."""
+        frames = []
+        frame_ids = {}
+        events_by_thread = {}
+        for phase in self._finished():
+            if phase.name not in frame_ids:
+                frame_ids[phase.name] = len(frames)
+                frames.append({"name": phase.name})
+            events = events_by_thread.setdefault(phase.thread, [])
+            frame = frame_ids[phase.name]
+            # closing events sort before opening ones at the same time,
+            # deeper phases open after and close before the enclosing ones
+            events.append(((phase.start - self.origin) * 1000, 1, phase.depth, "O", frame))
+            events.append(((phase.end - self.origin) * 1000, 0, -phase.depth, "C", frame))
+
+        profiles = []
+        for thread, events in events_by_thread.items():
+            events.sort()
+            profiles.append(
+                {
+                    "type": "evented",
+                    "name": thread,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": max(at for at, *_ in events),
+                    "events": [{"type": kind, "frame": frame, "at": at} for at, _, _, kind, frame in events],
+                }
+            )
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+            "exporter": "kedro-kubeflow",
+        }
+
+    def summary(self) -> str:
+        lines = [f"{'Phase':<50} {'Wall time [s]':>14} {'Peak memory [MiB]':>18}"]
+        for phase in self._finished():
+            stats = phase.as_dict(self.origin)
+            name = "  " * phase.depth + phase.name
+            lines.append(f"{name:<50} {stats['wall_time_s']:>14.3f} {stats['peak_memory_bytes'] / 2**20:>18.1f}")
+        return "\n".join(lines)
+
+    def write(self, output):
+        """Writes the report to a file, in the speedscope format if the file
+        name ends with `.speedscope.json`, as plain JSON otherwise."""
+        report = self.speedscope() if str(output).endswith(".speedscope.json") else self.report()
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+profiler = Profiler()
+
+
+def profile_phase(name):
+    """Context manager recording the enclosed block as a phase of the global profiler"""
+    return profiler.phase(name)
@@ -0,0 +1,95 @@
+"""Kubernetes resource quantities, like `500m` CPU or `1.5Gi` of memory"""
+import difflib
+import math
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Union
+
+SUFFIXES = {
+    "Ki": Decimal(2**10),
+    "Mi": Decimal(2**20),
+    "Gi": Decimal(2**30),
+    "Ti": Decimal(2**40),
+    "Pi": Decimal(2**50),
+    "Ei": Decimal(2**60),
+    "n": Decimal("1e-9"),
+    "u": Decimal("1e-6"),
+    "m": Decimal("1e-3"),
+    "": Decimal(1),
+    "k": Decimal("1e3"),
+    "M": Decimal("1e6"),
+    "G": Decimal("1e9"),
+    "T": Decimal("1e12"),
+    "P": Decimal("1e15"),
+    "E": Decimal("1e18"),
+}
+
+QUANTITY_PATTERN = re.compile(r"^([+-]?[0-9.]+(?:[eE][+-]?[0-9]+)?)(" + "|".join(sorted(SUFFIXES, key=len)[::-1]) + ")$")
+
+
+def parse_quantity(value: Union[str, int, float]) -> Decimal:
+    """Value of the quantity in base units (cores, bytes)"""
+    match = QUANTITY_PATTERN.match(str(value).strip())
+    if not match:
+        raise ValueError(f"Invalid Kubernetes quantity: {value}")
+    try:
+        return Decimal(match.group(1)) * SUFFIXES[match.group(2)]
+    except InvalidOperation:
+        raise ValueError(f"Invalid Kubernetes quantity: {value}")
+
+
+def format_cpu(cores: Decimal, step_millicores: int = 50) -> str:
+    """CPU quantity rounded up to a multiple of `step_millicores`"""
+    millicores = max(step_millicores, math.ceil(cores * 1000 / step_millicores) * step_millicores)
+    return str(millicores // 1000) if millicores % 1000 == 0 else f"{millicores}m"
+
+
+def format_memory(size: Decimal, step_mebibytes: int = 64) -> str:
+    """Memory quantity rounded up to a multiple of `step_mebibytes`"""
+    mebibytes = max(step_mebibytes, math.ceil(size / 2**20 / step_mebibytes) * step_mebibytes)
+    return f"{mebibytes // 1024}Gi" if mebibytes % 1024 == 0 else f"{mebibytes}Mi"
+
+
+def scale_quantity(value: Union[str, int, float], factor: float) -> str:
+    """Quantity multiplied by the factor, keeping the unit suffix (`500m` * 4 = `2000m`)"""
+    match = QUANTITY_PATTERN.match(str(value).strip())
+    if not match:
+        raise ValueError(f"Invalid Kubernetes quantity: {value}")
+    number = Decimal(match.group(1)) * Decimal(str(factor))
+    return f"{number.normalize():f}{match.group(2)}"
+
+
+STANDARD_RESOURCES = ("cpu", "memory", "ephemeral-storage")
+HUGEPAGES_PREFIX = "hugepages-"
+
+
+def normalize_resource(resource: str, value: Union[str, int, float]) -> str:
+    """Validates the resource name and quantity, returning the quantity as a
+    string. Extended resources (domain-prefixed names like `nvidia.com/gpu`)
+    accept only whole numbers, as Kubernetes does not allow overcommitting them.
+    """
+    if resource.startswith(HUGEPAGES_PREFIX):
+        parse_quantity(resource[len(HUGEPAGES_PREFIX) :])
+    elif "/" not in resource and resource not in STANDARD_RESOURCES:
+        suggestions = difflib.get_close_matches(resource, STANDARD_RESOURCES, n=1)
+        hint = f" (did you mean {suggestions[0]}?)" if suggestions else ""
+        raise ValueError(
+            f"Unknown resource {resource}{hint}. Expected one of {', '.join(STANDARD_RESOURCES)}, "
+            f"{HUGEPAGES_PREFIX}<page size> or a domain-prefixed extended resource"
+        )
+
+    quantity = parse_quantity(value)
+    if quantity < 0:
+        raise ValueError(f"Negative quantity of {resource}: {value}")
+    if "/" in resource and quantity != quantity.to_integral_value():
+        raise ValueError(f"Quantity of extended resource {resource} must be a whole number: {value}")
+    return str(value).strip()
+
+
+def format_total(resource: str, value: Decimal) -> str:
+    """Human readable sum of quantities: cores, gibibytes or a plain count"""
+    if resource == "cpu":
+        return f"{value.quantize(Decimal('0.001')).normalize():f}"
+    if resource in STANDARD_RESOURCES or resource.startswith(HUGEPAGES_PREFIX):
+        return f"{value / 2**30:.2f}Gi"
+    return f"{value.normalize():f}"
@@ -0,0 +1,98 @@
+"""Recommendation of step resources from the usage observed in previous runs"""
+import csv
+import json
+import logging
+import math
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+import yaml
+
+from .quantities import format_cpu, format_memory, parse_quantity
+from .utils import workflow_step_name
+
+log = logging.getLogger(__name__)
+
+OVERLAY_HEADER = """\
+# Generated by `kedro kubeflow tune-resources` from the usage of previous runs.
+# Entries of run_config.resources take precedence over the tuned values.
+"""
+
+
+def workflow_pod_names(workflow: dict) -> Dict[str, str]:
+    """Maps names of the pods run by an Argo workflow (as exported with
+    `kubectl get workflow -o json`) to the names of the steps."""
+    workflow_name = workflow["metadata"]["name"]
+    pods = {}
+    for node_id, node in workflow.get("status", {}).get("nodes", {}).items():
+        if node.get("type") != "Pod":
+            continue
+        step = workflow_step_name(node)
+        # pod names are equal to node ids before Argo 3.4 (and with
+        # POD_NAMES=v1), include the template name since then
+        pods[node_id] = step
+        pods[f"{workflow_name}-{node['templateName']}-{node_id.rsplit('-', 1)[-1]}"] = step
+    return pods
+
+
+def _read_records(path: str) -> List[dict]:
+    with open(path) as f:
+        if path.endswith(".csv"):
+            return list(csv.DictReader(f))
+        records = json.load(f)
+    return records if isinstance(records, list) else [records]
+
+
+def load_usage(
+    usage_files: Iterable[str], workflow_files: Iterable[str] = ()
+) -> Dict[str, List[Tuple[Decimal, Decimal]]]:
+    """Peak CPU (cores) and memory (bytes) usage of the steps, one sample per pod.
+
+    Usage files are CSV or JSON lists of records with `cpu` and `memory`
+    peak usage (in Kubernetes quantities or base units) and either `step`
+    name or `pod` name, resolved with the given Argo workflow files.
+    """
+    pods = {}
+    for path in workflow_files:
+        with open(path) as f:
+            pods.update(workflow_pod_names(json.load(f)))
+
+    usage = defaultdict(list)
+    for path in usage_files:
+        for record in _read_records(path):
+            step = record.get("step") or pods.get(record.get("pod"))
+            if not step:
+                log.warning("Skipping usage of unknown pod %s", record.get("pod"))
+                continue
+            usage[step].append((parse_quantity(record["cpu"]), parse_quantity(record["memory"])))
+    return dict(usage)
+
+
+def _percentile(values: List[Decimal], percentile: float) -> Decimal:
+    values = sorted(values)
+    return values[min(len(values) - 1, math.ceil(percentile / 100 * len(values)) - 1)]
+
+
+def recommend_resources(
+    usage: Dict[str, List[Tuple[Decimal, Decimal]]],
+    cpu_percentile: float = 90,
+    cpu_margin: float = 1.2,
+    memory_margin: float = 1.3,
+) -> Dict[str, Dict[str, str]]:
+    """CPU is sized for a percentile of the observed peaks, as exceeding it
+    only slows the step down, while memory is sized for the highest peak,
+    as exceeding it gets the pod killed."""
+    return {
+        step: {
+            "cpu": format_cpu(_percentile([cpu for cpu, _ in samples], cpu_percentile) * Decimal(str(cpu_margin))),
+            "memory": format_memory(max(memory for _, memory in samples) * Decimal(str(memory_margin))),
+        }
+        for step, samples in sorted(usage.items())
+    }
+
+
+def write_overlay(path: str, resources: Dict[str, Dict[str, str]]):
+    with open(path, "w") as f:
+        f.write(OVERLAY_HEADER)
+        yaml.safe_dump({"tuned_resources": resources}, f, default_flow_style=False)
@@ -9,6 +9,12 @@ def clean_name(name: str) -> str:
     return re.sub(r"[\W_]+", "-", name).strip("-")
 
 
+def workflow_step_name(node: dict) -> str:
+    """Name of the step run by a node of an Argo workflow status, without the
+    `(n)` suffix of the attempts of retried steps."""
+    return re.sub(r"\(\d+\)$", "", node.get("displayName") or node["templateName"])
+
+
 def is_mlflow_enabled() -> bool:
     try:
         import kedro_mlflow  # NOQA
@@ -0,0 +1,142 @@
+"""Exclusive use of persistent volume claims reused between pipeline runs"""
+import logging
+import time
+from typing import List, Optional
+
+from kubernetes.client import (
+    V1ObjectMeta,
+    V1PersistentVolumeClaim,
+    V1PersistentVolumeClaimSpec,
+    V1ResourceRequirements,
+)
+from kubernetes.client.rest import ApiException
+
+# the lock owner is the name of the Argo workflow of the run holding the claim
+LOCK_ANNOTATION = "kedro-kubeflow.getindata.com/locked-by"
+WORKFLOW_FINISHED_PHASES = {"Succeeded", "Failed", "Error"}
+
+log = logging.getLogger(__name__)
+
+
+def _is_workflow_finished(workflows_api, namespace: str, workflow: str) -> bool:
+    """Checks if the Argo workflow finished or no longer exists, so its exit
+    handler releasing the locks will never run."""
+    try:
+        status = workflows_api.get_namespaced_custom_object(
+            "argoproj.io", "v1alpha1", namespace, "workflows", workflow
+        ).get("status", {})
+    except ApiException as e:
+        if e.status != 404:
+            raise
+        return True
+    return status.get("phase") in WORKFLOW_FINISHED_PHASES or bool(status.get("finishedAt"))
+
+
+def _try_lock(
+    core_api, namespace: str, claim: str, owner: str, spec: V1PersistentVolumeClaimSpec, workflows_api=None
+) -> bool:
+    try:
+        pvc = core_api.read_namespaced_persistent_volume_claim(claim, namespace)
+    except ApiException as e:
+        if e.status != 404:
+            raise
+        try:
+            core_api.create_namespaced_persistent_volume_claim(
+                namespace,
+                V1PersistentVolumeClaim(
+                    metadata=V1ObjectMeta(name=claim, annotations={LOCK_ANNOTATION: owner}),
+                    spec=spec,
+                ),
+            )
+            log.info("Created volume claim %s", claim)
+            return True
+        except ApiException as e:
+            if e.status != 409:
+                raise
+            return False
+
+    locked_by = (pvc.metadata.annotations or {}).get(LOCK_ANNOTATION)
+    if locked_by == owner:
+        # a retried step of the same run already holds the lock
+        return True
+    if locked_by:
+        if workflows_api is None or not _is_workflow_finished(workflows_api, namespace, locked_by):
+            return False
+        log.warning("Breaking lock of volume claim %s held by finished workflow %s", claim, locked_by)
+
+    try:
+        # the resource version makes the update fail if another run
+        # locked the claim after it was read
+        core_api.patch_namespaced_persistent_volume_claim(
+            claim,
+            namespace,
+            {
+                "metadata": {
+                    "annotations": {LOCK_ANNOTATION: owner},
+                    "resourceVersion": pvc.metadata.resource_version,
+                }
+            },
+        )
+        return True
+    except ApiException as e:
+        if e.status != 409:
+            raise
+        return False
+
+
+def acquire_claim(
+    core_api,
+    namespace: str,
+    claims: List[str],
+    owner: str,
+    spec: V1PersistentVolumeClaimSpec,
+    timeout: int,
+    poll_interval: int = 10,
+    workflows_api=None,
+) -> str:
+    """Locks the first free claim from the pool for the owner (creating
+    missing claims with the given spec), waiting up to `timeout` seconds
+    for one of the claims to be released. With `workflows_api` (Kubernetes
+    CustomObjectsApi), locks held by workflows that finished or were deleted
+    without running their exit handler are broken.
+
+    :return: name of the locked claim
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        for claim in claims:
+            if _try_lock(core_api, namespace, claim, owner, spec, workflows_api):
+                log.info("Locked volume claim %s for %s", claim, owner)
+                return claim
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"No volume claim released within {timeout} seconds: {', '.join(claims)}")
+        log.info("All volume claims are in use, retrying in %s seconds", poll_interval)
+        time.sleep(poll_interval)
+
+
+def release_claims(core_api, namespace: str, claims: List[str], owner: str) -> Optional[str]:
+    """Removes the lock of the owner from the claims.
+
+    :return: name of the released claim, None if the owner held no lock
+    """
+    for claim in claims:
+        try:
+            pvc = core_api.read_namespaced_persistent_volume_claim(claim, namespace)
+        except ApiException as e:
+            if e.status != 404:
+                raise
+            continue
+        if (pvc.metadata.annotations or {}).get(LOCK_ANNOTATION) == owner:
+            core_api.patch_namespaced_persistent_volume_claim(
+                claim, namespace, {"metadata": {"annotations": {LOCK_ANNOTATION: None}}}
+            )
+            return claim
+    return None
+
+
+def claim_spec(size: str, access_modes: List[str], storage_class: Optional[str]) -> V1PersistentVolumeClaimSpec:
+    return V1PersistentVolumeClaimSpec(
+        access_modes=access_modes,
+        resources=V1ResourceRequirements(requests={"storage": size}),
+        storage_class_name=storage_class,
+    )
@@ -0,0 +1,63 @@
+"""Incremental copy of the data baked into the image to the pipeline volume"""
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Tuple
+
+log = logging.getLogger(__name__)
+
+
+def _files(source: str, path: str) -> Iterator[str]:
+    full_path = os.path.join(source, path)
+    if os.path.isdir(full_path):
+        for root, _, files in os.walk(full_path):
+            for name in files:
+                yield os.path.relpath(os.path.join(root, name), source)
+    elif os.path.exists(full_path):
+        yield path
+    else:
+        log.warning("Path %s does not exist in %s, skipping", path, source)
+
+
+def _is_up_to_date(source_file: str, target_file: str) -> bool:
+    try:
+        source_stat, target_stat = os.stat(source_file), os.stat(target_file)
+    except FileNotFoundError:
+        return False
+    return source_stat.st_size == target_stat.st_size and int(source_stat.st_mtime) == int(target_stat.st_mtime)
+
+
+def _copy(source: str, target: str, path: str) -> bool:
+    source_file, target_file = os.path.join(source, path), os.path.join(target, path)
+    if _is_up_to_date(source_file, target_file):
+        return False
+    os.makedirs(os.path.dirname(target_file), exist_ok=True)
+    shutil.copy2(source_file, target_file)
+    return True
+
+
+def sync_paths(source: str, target: str, paths: Iterable[str], max_workers: int = None) -> Tuple[int, int]:
+    """Copies files and directories (relative to `source`) to `target` in
+    parallel, skipping files already present with the same size and
+    modification time (preserved by the copy).
+
+    :return: number of copied and skipped files
+    """
+    files = sorted({file for path in paths for file in _files(source, path.strip("/"))})
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        copied = sum(executor.map(lambda file: _copy(source, target, file), files))
+    return copied, len(files) - copied
+
+
+def remove_paths(target: str, paths: Iterable[str]):
+    """Removes files and directories (relative to `target`), if they exist."""
+    for path in paths:
+        full_path = os.path.join(target, path.strip("/"))
+        if os.path.isdir(full_path):
+            shutil.rmtree(full_path)
+        elif os.path.exists(full_path):
+            os.remove(full_path)
+        else:
+            continue
+        log.info("Removed %s from %s", path, target)
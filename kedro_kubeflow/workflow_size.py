@@ -0,0 +1,67 @@
+"""Size of the compiled Argo workflow, limited by the maximum size of
+Kubernetes objects stored in etcd (1.5MiB by default)"""
+import json
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from tabulate import tabulate
+
+
+def serialized_size(value) -> int:
+    """Size in bytes of the value serialized as compact JSON, as the API server stores it"""
+    return len(json.dumps(value, separators=(",", ":")).encode())
+
+
+def _field_size(mapping: dict, key: str) -> int:
+    return serialized_size(mapping[key]) if key in mapping else 0
+
+
+def workflow_size_breakdown(workflow: dict) -> Dict[str, int]:
+    """Bytes of the serialized workflow contributed by arguments, environment
+    variables, file outputs and metadata, with the remaining bytes of the
+    templates and of the workflow counted separately, so the contributions
+    sum up to the total size."""
+    spec = workflow.get("spec", {})
+    templates = spec.get("templates", [])
+    contributions = defaultdict(int)
+    for template in templates:
+        container = template.get("container") or {}
+        contributions["arguments"] += _field_size(container, "args") + sum(
+            _field_size(task, "arguments") for task in (template.get("dag") or {}).get("tasks", [])
+        )
+        contributions["env vars"] += _field_size(container, "env")
+        contributions["file outputs"] += _field_size(template, "outputs")
+        contributions["annotations and labels"] += _field_size(template, "metadata")
+    contributions["templates (other)"] = serialized_size(templates) - sum(contributions.values())
+    contributions["arguments"] += _field_size(spec, "arguments")
+    contributions["annotations and labels"] += _field_size(workflow, "metadata")
+    contributions["other"] = serialized_size(workflow) - sum(contributions.values())
+    return dict(contributions)
+
+
+def largest_templates(workflow: dict, count: int = 5) -> List[Tuple[str, int]]:
+    sizes = [(template["name"], serialized_size(template)) for template in workflow["spec"]["templates"]]
+    return sorted(sizes, key=lambda item: item[1], reverse=True)[:count]
+
+
+def format_size_report(workflow: dict, budget: int) -> str:
+    total = serialized_size(workflow)
+    breakdown = workflow_size_breakdown(workflow)
+    return "\n".join(
+        [
+            f"Workflow size: {total / 1024:.1f}KiB ({100 * total / budget:.0f}% of {budget / 1024:.0f}KiB budget)",
+            "",
+            tabulate(
+                [
+                    [contributor, f"{size / 1024:.1f}KiB", f"{100 * size / total:.0f}%"]
+                    for contributor, size in sorted(breakdown.items(), key=lambda item: item[1], reverse=True)
+                ],
+                headers=["Contributor", "Size", "Share"],
+            ),
+            "",
+            tabulate(
+                [[name, f"{size / 1024:.1f}KiB"] for name, size in largest_templates(workflow)],
+                headers=["Largest templates", "Size"],
+            ),
+        ]
+    )
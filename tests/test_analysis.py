@@ -0,0 +1,139 @@
+import unittest
+from decimal import Decimal
+
+from kedro.pipeline import Pipeline, node
+
+from kedro_kubeflow.config import PluginConfig
+from kedro_kubeflow.generators.analysis import (
+    analyze_steps,
+    format_report,
+    mean_durations,
+    pipeline_steps,
+    step_requests,
+    workflow_durations,
+)
+from tests.common import MinimalConfigMixin
+
+
+def identity(input1: str):
+    return input1  # pragma: no cover
+
+
+# a -> b -> d, a -> c -> d, with e independent
+STEP_DEPENDENCIES = {"a": set(), "b": {"a"}, "c": {"a"}, "d": {"b", "c"}, "e": set()}
+REQUESTS = {step: {"cpu": Decimal(1), "memory": Decimal(2**30)} for step in STEP_DEPENDENCIES}
+
+
+class TestAnalysis(unittest.TestCase, MinimalConfigMixin):
+    def test_should_analyze_levels_without_durations(self):
+        # when
+        report = analyze_steps(STEP_DEPENDENCIES, REQUESTS)
+
+        # then
+        assert report["steps"] == 5
+        assert report["level_widths"] == [2, 2, 1]
+        assert len(report["critical_path"]) == 3
+        assert report["critical_path"][0] == "a" and report["critical_path"][-1] == "d"
+        assert report["max_concurrent_pods"] == 2
+        assert report["peak_requests"] == {"cpu": 2, "memory": 2**31}
+        assert report["total_requests"] == {"cpu": 5, "memory": 5 * 2**30}
+        assert report["wall_time_s"] is None
+
+    def test_should_predict_wall_time_from_durations(self):
+        # when
+        report = analyze_steps(STEP_DEPENDENCIES, REQUESTS, {"a": 10, "b": 100, "c": 20, "d": 5, "e": 200})
+
+        # then
+        assert report["critical_path"] == ["e"]
+        assert report["wall_time_s"] == 200
+        assert report["max_concurrent_pods"] == 3
+        assert report["peak_requests"]["cpu"] == 3
+        assert report["steps_without_estimates"] == []
+
+    def test_should_assume_median_duration_for_steps_without_estimates(self):
+        # when
+        report = analyze_steps(STEP_DEPENDENCIES, REQUESTS, {"a": 10, "b": 100, "c": 20})
+
+        # then
+        assert report["critical_path"] == ["a", "b", "d"]
+        assert report["wall_time_s"] == 130
+        assert report["steps_without_estimates"] == ["d", "e"]
+        assert "Predicted wall time: 0:02:10" in format_report(report)
+
+    def test_should_read_durations_of_workflow_steps(self):
+        # given
+        workflow = {
+            "status": {
+                "nodes": {
+                    "wf": {"type": "DAG", "displayName": "wf", "templateName": "pipeline"},
+                    "wf-1": {
+                        "type": "Pod",
+                        "displayName": "node1",
+                        "templateName": "node1",
+                        "startedAt": "2026-01-01T10:00:00Z",
+                        "finishedAt": "2026-01-01T10:01:30Z",
+                    },
+                    "wf-2": {"type": "Pod", "displayName": "node2", "templateName": "node2"},
+                    "wf-3": {
+                        "type": "Pod",
+                        "displayName": "node3(0)",
+                        "templateName": "node3",
+                        "startedAt": "2026-01-01T10:00:00Z",
+                        "finishedAt": "2026-01-01T10:00:10Z",
+                    },
+                    "wf-4": {
+                        "type": "Pod",
+                        "displayName": "node3(1)",
+                        "templateName": "node3",
+                        "startedAt": "2026-01-01T10:00:20Z",
+                        "finishedAt": "2026-01-01T10:00:40Z",
+                    },
+                }
+            }
+        }
+
+        # when
+        durations = mean_durations([workflow_durations(workflow), {"node1": 30}])
+
+        # then
+        assert durations == {"node1": 60, "node3": 30}
+
+    def test_should_follow_node_merge_strategy(self):
+        # given
+        pipeline = Pipeline(
+            [
+                node(identity, "A", "B", name="node1"),
+                node(identity, "B", "C", name="node2"),
+                node(identity, "C", "D", name="node3"),
+            ]
+        )
+        for strategy, expected in [
+            ("none", {"node1": set(), "node2": {"node1"}, "node3": {"node2"}}),
+            ("full", {"pipeline": set()}),
+        ]:
+            with self.subTest(strategy=strategy):
+                config = PluginConfig(**self.minimal_config({"run_config": {"node_merge_strategy": strategy}}))
+
+                # when
+                steps, dependencies = pipeline_steps("pipeline", pipeline.node_dependencies, config.run_config)
+
+                # then
+                assert dependencies == expected
+                assert step_requests(config.run_config, steps)[next(iter(steps))] == {
+                    "cpu": Decimal("0.5"),
+                    "memory": 2**30,
+                }
+
+    def test_should_read_step_requests_by_op_name(self):
+        # given
+        config = PluginConfig(
+            **self.minimal_config({"run_config": {"resources": {"train-model": {"cpu": "4"}, "Other": {"cpu": "2"}}}})
+        )
+
+        # when
+        requests = step_requests(config.run_config, ["Train_Model", "Other", "node3"])
+
+        # then
+        assert requests["Train_Model"]["cpu"] == 4
+        assert requests["Other"]["cpu"] == 2
+        assert requests["node3"]["cpu"] == Decimal("0.5")
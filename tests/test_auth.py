@@ -1,11 +1,26 @@
+import base64
+import json
 import os
+import stat
+import time
 import unittest
+from tempfile import TemporaryDirectory
 from unittest.mock import patch
 
 import responses
 from google.auth.exceptions import DefaultCredentialsError
 
-from kedro_kubeflow.auth import AuthHandler
+from kedro_kubeflow.auth import (
+    AuthHandler,
+    FileTokenCache,
+    InMemoryTokenCache,
+    jwt_expiry,
+)
+
+
+def create_jwt(expires_in):
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": int(time.time()) + expires_in}).encode())
+    return f"header.{payload.decode().rstrip('=')}.signature"
 
 
 class TestAuthHandler(unittest.TestCase):
@@ -52,6 +67,59 @@ class TestAuthHandler(unittest.TestCase):
         # then
         assert token == "TOKEN"
 
+    def test_should_read_jwt_expiry(self):
+        token = create_jwt(3600)
+
+        assert jwt_expiry(token) > time.time()
+        assert jwt_expiry("not-a-jwt") is None
+
+    @patch("google.oauth2.id_token.fetch_id_token")
+    def test_should_reuse_cached_token_until_it_expires(self, fetch_id_token_mock):
+        # given
+        os.environ["IAP_CLIENT_ID"] = "unittest-client-id"
+        fetch_id_token_mock.return_value = create_jwt(3600)
+        cache = InMemoryTokenCache()
+
+        # when
+        first = AuthHandler(token_cache=cache).obtain_id_token()
+        second = AuthHandler(token_cache=cache).obtain_id_token()
+
+        # then
+        assert first == second
+        fetch_id_token_mock.assert_called_once()
+
+    @patch("google.oauth2.id_token.fetch_id_token")
+    def test_should_refresh_token_about_to_expire(self, fetch_id_token_mock):
+        # given
+        os.environ["IAP_CLIENT_ID"] = "unittest-client-id"
+        fetch_id_token_mock.return_value = create_jwt(60)
+        cache = InMemoryTokenCache()
+
+        # when
+        AuthHandler(token_cache=cache).obtain_id_token()
+        AuthHandler(token_cache=cache).obtain_id_token()
+
+        # then
+        assert fetch_id_token_mock.call_count == 2
+
+    @patch("google.oauth2.id_token.fetch_id_token")
+    def test_should_persist_tokens_in_file_cache(self, fetch_id_token_mock):
+        with TemporaryDirectory() as cache_dir:
+            # given
+            os.environ["IAP_CLIENT_ID"] = "unittest-client-id"
+            token = create_jwt(3600)
+            fetch_id_token_mock.return_value = token
+            cache_path = f"{cache_dir}/tokens.json"
+
+            # when
+            AuthHandler(token_cache=FileTokenCache(cache_path)).obtain_id_token()
+            cached = AuthHandler(token_cache=FileTokenCache(cache_path)).obtain_id_token()
+
+            # then
+            assert cached == token
+            fetch_id_token_mock.assert_called_once()
+            assert stat.S_IMODE(os.stat(cache_path).st_mode) == 0o600
+
     def test_should_skip_dex_auth_if_env_is_not_set(self):
         # given
         # no env set
@@ -132,3 +200,65 @@ class TestAuthHandler(unittest.TestCase):
         # then
         assert session == "sessionID"
         assert responses.calls[2].request.body == "login=user%40example.com&password=pa%24%24"
+
+    @responses.activate
+    def test_should_reuse_cached_dex_session(self):
+        # given
+        os.environ["DEX_USERNAME"] = "user@example.com"
+        os.environ["DEX_PASSWORD"] = "pa$$"
+        responses.add(
+            responses.GET,
+            "https://kubeflow.local/pipeline",
+            body='<a href="/dex/auth/local?req=qjrrnpg3hngdu6odii3hcmfae" target="_self"',
+        )
+        responses.add(
+            responses.POST,
+            "https://kubeflow.local/dex/auth/local?req=qjrrnpg3hngdu6odii3hcmfae",
+            headers={"Set-cookie": "authservice_session=sessionID"},
+        )
+        responses.add(responses.GET, "https://kubeflow.local/pipeline/apis/v1beta1/healthz", json={})
+        cache = InMemoryTokenCache()
+
+        # when
+        first = AuthHandler(token_cache=cache).obtain_dex_authservice_session("https://kubeflow.local/pipeline")
+        second = AuthHandler(token_cache=cache).obtain_dex_authservice_session("https://kubeflow.local/pipeline")
+
+        # then
+        assert first == second == "sessionID"
+        assert len(responses.calls) == 3
+        assert responses.calls[2].request.headers["Cookie"] == "authservice_session=sessionID"
+
+    @responses.activate
+    def test_should_log_in_again_if_cached_dex_session_is_rejected(self):
+        for rejection in [
+            {"status": 401},
+            {"status": 302, "headers": {"Location": "/dex/auth?client_id=kubeflow-oidc-authservice"}},
+        ]:
+            with self.subTest(rejection=rejection), TemporaryDirectory() as cache_dir:
+                # given
+                os.environ["DEX_USERNAME"] = "user@example.com"
+                os.environ["DEX_PASSWORD"] = "pa$$"
+                responses.reset()
+                responses.add(
+                    responses.GET,
+                    "https://kubeflow.local/pipeline",
+                    body='<a href="/dex/auth/local?req=qjrrnpg3hngdu6odii3hcmfae" target="_self"',
+                )
+                responses.add(
+                    responses.POST,
+                    "https://kubeflow.local/dex/auth/local?req=qjrrnpg3hngdu6odii3hcmfae",
+                    headers={"Set-cookie": "authservice_session=newSessionID"},
+                )
+                responses.add(responses.GET, "https://kubeflow.local/pipeline/apis/v1beta1/healthz", **rejection)
+                cache = FileTokenCache(f"{cache_dir}/tokens.json")
+                cache_key = "dex:https://kubeflow.local/pipeline:user@example.com"
+                cache.put(cache_key, "revokedSessionID", time.time() + 3600)
+
+                # when
+                session = AuthHandler(token_cache=cache).obtain_dex_authservice_session(
+                    "https://kubeflow.local/pipeline"
+                )
+
+                # then
+                assert session == "newSessionID"
+                assert FileTokenCache(f"{cache_dir}/tokens.json").get(cache_key) == "newSessionID"
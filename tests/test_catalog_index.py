@@ -0,0 +1,60 @@
+import unittest
+
+from kedro_kubeflow.generators.catalog_index import CatalogIndex
+
+
+class TestCatalogIndex(unittest.TestCase):
+    CATALOG = {
+        "_csv": {"type": "pandas.CSVDataset"},
+        "local": {"type": "pandas.CSVDataset", "filepath": "data/01_raw/local.csv"},
+        "remote": {"type": "pandas.CSVDataset", "filepath": "gs://bucket/remote.csv"},
+        "table": {"type": "pandas.SQLTableDataset", "table_name": "table"},
+        "{namespace}.{name}": {"type": "pandas.CSVDataset", "filepath": "data/02_intermediate/{namespace}/{name}.csv"},
+        "{name}_model": {"type": "pickle.PickleDataset", "filepath": "data/06_models/{name}.pkl"},
+        "{name}@remote": {"type": "pandas.CSVDataset", "filepath": "s3://bucket/{name}.csv"},
+    }
+
+    def test_should_resolve_declared_datasets(self):
+        index = CatalogIndex(self.CATALOG)
+
+        assert index.local_filepath("local") == "data/01_raw/local.csv"
+        assert index.local_filepath("remote") is None
+        assert index.local_filepath("table") is None
+        assert index.is_declared("table")
+
+    def test_should_skip_undeclared_datasets_and_anchors(self):
+        index = CatalogIndex(self.CATALOG)
+
+        assert index.local_filepath("undeclared") is None
+        assert not index.is_declared("undeclared")
+        assert not index.is_declared("_csv")
+
+    def test_should_resolve_dataset_factories(self):
+        index = CatalogIndex(self.CATALOG)
+
+        assert index.local_filepath("features.train") == "data/02_intermediate/features/train.csv"
+        assert index.local_filepath("regressor_model") == "data/06_models/regressor.pkl"
+        assert index.local_filepath("predictions@remote") is None
+        assert index.config("predictions@remote")["filepath"] == "s3://bucket/predictions.csv"
+
+    def test_should_prefer_most_specific_pattern(self):
+        index = CatalogIndex(
+            {
+                "{name}": {"type": "MemoryDataset"},
+                "{name}_model": {"type": "pickle.PickleDataset", "filepath": "data/06_models/{name}.pkl"},
+            }
+        )
+
+        assert index.local_filepath("regressor_model") == "data/06_models/regressor.pkl"
+        assert index.config("regressor")["type"] == "MemoryDataset"
+
+    def test_should_handle_missing_catalog(self):
+        assert CatalogIndex(None).local_filepath("dataset") is None
+
+    def test_should_detect_memory_datasets(self):
+        index = CatalogIndex({**self.CATALOG, "memory": {"type": "kedro.io.MemoryDataset"}})
+
+        assert index.is_memory("memory")
+        assert index.is_memory("undeclared")
+        assert not index.is_memory("local")
+        assert not index.is_memory("features.train")
@@ -1,4 +1,7 @@
+import json
 import os
+import subprocess
+import sys
 import unittest
 import unittest.mock as um
 from collections import namedtuple
@@ -10,15 +13,24 @@ from click.testing import CliRunner
 
 from kedro_kubeflow.cli import (
     WAIT_TIMEOUT,
+    analyze,
     compile,
     delete_pipeline_volume,
+    find_mlflow_run,
     init,
     kubeflow_group,
     list_pipelines,
+    lock_pipeline_volume,
     mlflow_start,
+    record_dataset_sizes,
+    run_next_stage,
+    run_node,
     run_once,
     schedule,
+    sync_data_volume,
+    tune_resources,
     ui,
+    unlock_pipeline_volume,
     upload_pipeline,
 )
 from kedro_kubeflow.config import PluginConfig
@@ -173,6 +185,51 @@ class TestPluginCLI(unittest.TestCase):
             pipeline="pipe",
         )
 
+    @patch("kedro.framework.project.pipelines", new={"__default__": None, "data_processing": None})
+    def test_compile_all(self):
+        context_helper = MagicMock(ContextHelper)
+        context_helper.config = test_config
+        config = dict(context_helper=context_helper)
+        runner = CliRunner()
+
+        result = runner.invoke(
+            compile,
+            ["--all", "-i", "img", "-o", "out/pipeline.yml", "--max-workers", "2"],
+            obj=config,
+        )
+
+        assert result.exit_code == 0
+        context_helper.kfp_client.compile.assert_not_called()
+        context_helper.kfp_client.compile_all.assert_called_with(
+            outputs={
+                "__default__": "out/pipeline-default.yml",
+                "data_processing": "out/pipeline-data-processing.yml",
+            },
+            image="img",
+            image_pull_policy="Always",
+            max_workers=2,
+        )
+
+    @patch("kedro.framework.project.pipelines", new={"__default__": None, "data_processing": None})
+    def test_upload_all_pipelines(self):
+        context_helper = MagicMock(ContextHelper)
+        context_helper.config = test_config
+        context_helper.env = "kubeflow-env"
+        config = dict(context_helper=context_helper)
+        runner = CliRunner()
+
+        result = runner.invoke(upload_pipeline, ["--all"], obj=config)
+
+        assert result.exit_code == 0
+        context_helper.kfp_client.upload.assert_not_called()
+        context_helper.kfp_client.upload_all.assert_called_with(
+            pipeline_names=["__default__", "data_processing"],
+            image="gcr.io/project-image/test",
+            image_pull_policy="Always",
+            env="kubeflow-env",
+            max_workers=None,
+        )
+
     def test_upload_pipeline(self):
         context_helper = MagicMock(ContextHelper)
         context_helper.config = test_config
@@ -310,6 +367,276 @@ class TestPluginCLI(unittest.TestCase):
             core_api = k8s_client_mock.CoreV1Api()
             core_api.delete_namespaced_persistent_volume_claim.assert_called_with("workflow-name", "unittest-namespace")
 
+    @patch("kedro_kubeflow.cli.find_mlflow_run", return_value="mlflow-run")
+    @patch("kedro_kubeflow.cli.is_mlflow_enabled", return_value=True)
+    def test_run_next_stage(self, is_mlflow_enabled_mock, find_mlflow_run_mock):
+        context_helper = MagicMock(ContextHelper)
+        context_helper.config = test_config
+
+        runner = CliRunner()
+        result = runner.invoke(
+            run_next_stage,
+            self.next_stage_args("Succeeded"),
+            obj=dict(context_helper=context_helper),
+        )
+
+        assert result.exit_code == 0
+        find_mlflow_run_mock.assert_called_with(context_helper, "first-run")
+        context_helper.kfp_client.run_stage.assert_called_with(
+            pipeline="pipe",
+            image="img",
+            image_pull_policy="IfNotPresent",
+            stage=1,
+            run_id="first-run",
+            volume_name="first-volume",
+            mlflow_run_id="mlflow-run",
+            experiment_name="Test Experiment",
+            experiment_namespace=None,
+            run_name="test run",
+            parameters={"param1": "0.3"},
+        )
+
+    @patch("kedro_kubeflow.cli.find_mlflow_run")
+    @patch("kedro_kubeflow.cli.is_mlflow_enabled", return_value=True)
+    def test_run_next_stage_with_mlflow_run_of_first_stage(self, is_mlflow_enabled_mock, find_mlflow_run_mock):
+        context_helper = MagicMock(ContextHelper)
+        context_helper.config = test_config
+
+        runner = CliRunner()
+        result = runner.invoke(
+            run_next_stage,
+            ["--mlflow-run-id", "mlflow-run"] + self.next_stage_args("Succeeded"),
+            obj=dict(context_helper=context_helper),
+        )
+
+        assert result.exit_code == 0
+        find_mlflow_run_mock.assert_not_called()
+        _, kwargs = context_helper.kfp_client.run_stage.call_args
+        assert kwargs["mlflow_run_id"] == "mlflow-run"
+
+    @patch("mlflow.search_runs")
+    @patch("mlflow.get_experiment_by_name")
+    def test_find_mlflow_run(self, get_experiment_by_name_mock, search_runs_mock):
+        get_experiment_by_name_mock.return_value = type("obj", (object,), {"experiment_id": 47})
+        search_runs_mock.return_value = [namedtuple("Run", "info")(namedtuple("RunInfo", "run_id")("MLFLOW_RUN_ID"))]
+
+        run_id = find_mlflow_run(MagicMock(ContextHelper), "KUBEFLOW_RUN_ID")
+
+        assert run_id == "MLFLOW_RUN_ID"
+        search_runs_mock.assert_called_with(
+            experiment_ids=[47], filter_string="tags.kubeflow_run_id = 'KUBEFLOW_RUN_ID'", output_format="list"
+        )
+
+    @patch("kubernetes.client")
+    @patch("kubernetes.config")
+    def test_run_next_stage_after_failed_stage(self, k8s_config_mock, k8s_client_mock):
+        context_helper = MagicMock(ContextHelper)
+        context_helper.config = PluginConfig(
+            **{**test_config.dict(), "run_config": {**test_config.run_config.dict(), "on_exit_pipeline": "notify"}}
+        )
+        session = context_helper.create_session.return_value.__enter__.return_value
+
+        with um.patch("builtins.open", um.mock_open(read_data="unittest-namespace")):
+            runner = CliRunner()
+            result = runner.invoke(
+                run_next_stage,
+                ["--failures", '[{"displayName": "node1"}]'] + self.next_stage_args("Failed"),
+                obj=dict(context_helper=context_helper),
+            )
+
+        assert result.exit_code == 0
+        context_helper.kfp_client.run_stage.assert_not_called()
+        k8s_client_mock.CoreV1Api().delete_namespaced_persistent_volume_claim.assert_called_with(
+            "first-volume", "unittest-namespace"
+        )
+        context_helper.create_session.assert_called_with(
+            {"param1": 0.3, "status": "Failed", "failures": [{"displayName": "node1"}]}
+        )
+        session.run.assert_called_with(pipeline_name="notify")
+
+    @staticmethod
+    def next_stage_args(status):
+        return [
+            "--pipeline",
+            "pipe",
+            "--stage",
+            "1",
+            "--image",
+            "img",
+            "--run-id",
+            "first-run",
+            "--volume",
+            "first-volume",
+            "--status",
+            status,
+            "--",
+            "param1",
+            "0.3",
+        ]
+
+    @patch("kedro_kubeflow.volume_claims.acquire_claim", return_value="data-1")
+    @patch("kubernetes.client")
+    @patch("kubernetes.config")
+    def test_lock_pipeline_volume(self, k8s_config_mock, k8s_client_mock, acquire_claim):
+        with TemporaryDirectory() as tmp_dir:
+            output = Path(tmp_dir) / "claim"
+            with um.patch("builtins.open", um.mock_open(read_data="unittest-namespace")) as open_mock:
+                runner = CliRunner()
+                result = runner.invoke(
+                    lock_pipeline_volume,
+                    ["--size", "5Gi", "--output", str(output), "workflow-name", "data-0", "data-1"],
+                )
+
+            assert result.exit_code == 0
+            assert "Volume locked: data-1" in result.output
+            core_api, namespace, claims, owner, spec, timeout = acquire_claim.call_args[0]
+            assert namespace == "unittest-namespace"
+            assert (claims, owner, timeout) == (["data-0", "data-1"], "workflow-name", 3600)
+            assert spec.resources.requests == {"storage": "5Gi"}
+            assert acquire_claim.call_args[1]["workflows_api"] == k8s_client_mock.CustomObjectsApi()
+            open_mock().write.assert_called_with("data-1")
+
+    @patch("kedro_kubeflow.volume_claims.release_claims", return_value="data-1")
+    @patch("kubernetes.client")
+    @patch("kubernetes.config")
+    def test_unlock_pipeline_volume(self, k8s_config_mock, k8s_client_mock, release_claims):
+        with um.patch("builtins.open", um.mock_open(read_data="unittest-namespace")):
+            runner = CliRunner()
+            result = runner.invoke(unlock_pipeline_volume, ["workflow-name", "data-0", "data-1"])
+
+            assert result.exit_code == 0
+            assert "Volume unlocked: data-1" in result.output
+            release_claims.assert_called_once_with(
+                k8s_client_mock.CoreV1Api(), "unittest-namespace", ["data-0", "data-1"], "workflow-name"
+            )
+
+    def test_record_dataset_sizes(self):
+        context_helper = MagicMock(ContextHelper)
+        context_helper.config = test_config
+        context_helper.context.config_loader.get.return_value = {
+            "A": {"type": "pandas.CSVDataset", "filepath": "data/01_raw/a.csv"},
+        }
+        pipeline = MagicMock()
+        pipeline.datasets.return_value = {"A", "B", "C"}
+        runner = CliRunner()
+
+        with runner.isolated_filesystem(), patch("kedro.framework.project.pipelines", new={"__default__": pipeline}):
+            # run from another directory than the project one
+            project = Path("project").absolute()
+            context_helper.context.project_path = project
+            (project / "data/01_raw").mkdir(parents=True)
+            (project / "data/01_raw/a.csv").write_text("a,b")
+            (project / "data/kubeflow-intermediate/run-1").mkdir(parents=True)
+            (project / "data/kubeflow-intermediate/run-1/B.pkl").write_text("12345")
+            Path("src").mkdir()
+            os.chdir("src")
+
+            result = runner.invoke(
+                record_dataset_sizes,
+                ["--history", "sizes.json", "--intermediate-data", "data/kubeflow-intermediate/run-1"],
+                obj=dict(context_helper=context_helper),
+            )
+
+            assert result.exit_code == 0
+            assert f"Recorded sizes of 2 datasets in {project / 'sizes.json'}" in result.output
+            assert json.loads((project / "sizes.json").read_text()) == {"A": 3, "B": 5}
+
+    def test_record_dataset_sizes_without_history(self):
+        context_helper = MagicMock(ContextHelper)
+        context_helper.config = test_config
+        runner = CliRunner()
+
+        result = runner.invoke(record_dataset_sizes, [], obj=dict(context_helper=context_helper))
+
+        assert result.exit_code == 1
+        assert "Provide --history or configure volume.size_history" in result.output
+
+    def test_tune_resources(self):
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            Path("usage.csv").write_text("step,cpu,memory\nnode1,200m,600Mi\n")
+
+            result = runner.invoke(tune_resources, ["--usage", "usage.csv", "--output", "tuned.yml"])
+
+            assert result.exit_code == 0
+            assert "node1: cpu 250m, memory 832Mi" in result.output
+            assert "tuned_resources:" in Path("tuned.yml").read_text()
+
+    def test_analyze(self):
+        from kedro.pipeline import Pipeline, node
+
+        context_helper = MagicMock(ContextHelper)
+        context_helper.config = test_config
+        pipeline = Pipeline([node(len, "A", "B", name="node1"), node(len, "B", "C", name="node2")])
+        runner = CliRunner()
+
+        with runner.isolated_filesystem(), patch("kedro.framework.project.pipelines", new={"__default__": pipeline}):
+            Path("durations.json").write_text(json.dumps({"node1": 60, "node2": 30}))
+
+            result = runner.invoke(analyze, ["--durations", "durations.json"], obj=dict(context_helper=context_helper))
+            json_result = runner.invoke(analyze, ["--json"], obj=dict(context_helper=context_helper))
+
+            assert result.exit_code == 0
+            assert "Critical path (2 steps): node1 -> node2" in result.output
+            assert "Predicted wall time: 0:01:30" in result.output
+            assert json_result.exit_code == 0
+            assert json.loads(json_result.output)["level_widths"] == [1, 1]
+
+    def test_sync_data_volume(self):
+        with TemporaryDirectory() as source, TemporaryDirectory() as target:
+            Path(source, "01_raw").mkdir()
+            Path(source, "01_raw", "input.csv").write_text("a,b")
+            Path(source, "02_intermediate.csv").write_text("c,d")
+
+            runner = CliRunner()
+            result = runner.invoke(sync_data_volume, ["--source", source, "--target", target, "01_raw"])
+
+            assert result.exit_code == 0
+            assert "1 files copied, 0 up to date" in result.output
+            assert Path(target, "01_raw", "input.csv").read_text() == "a,b"
+            assert not Path(target, "02_intermediate.csv").exists()
+
+    def test_run_node(self):
+        context_helper = MagicMock(ContextHelper)
+        session = context_helper.create_session.return_value.__enter__.return_value
+
+        runner = CliRunner()
+        result = runner.invoke(
+            run_node,
+            ["--pipeline", "pipe", "--nodes", "node1,node2", "--", "learning_rate", "0.3", "name", "--a"],
+            obj=dict(context_helper=context_helper),
+        )
+
+        assert result.exit_code == 0
+        context_helper.create_session.assert_called_with({"learning_rate": 0.3, "name": "--a"})
+        session.run.assert_called_with(pipeline_name="pipe", node_names=["node1", "node2"])
+
+    def test_run_node_with_default_node_names(self):
+        context_helper = MagicMock(ContextHelper)
+        session = context_helper.create_session.return_value.__enter__.return_value
+
+        runner = CliRunner()
+        result = runner.invoke(
+            run_node,
+            ["--pipeline", "pipe", "--nodes", "identity([A,B]) -> [C,D],node2", "--"],
+            obj=dict(context_helper=context_helper),
+        )
+
+        assert result.exit_code == 0
+        session.run.assert_called_with(pipeline_name="pipe", node_names=["identity([A,B]) -> [C,D]", "node2"])
+
+    def test_run_node_with_unpaired_parameters(self):
+        context_helper = MagicMock(ContextHelper)
+
+        runner = CliRunner()
+        result = runner.invoke(
+            run_node, ["--pipeline", "pipe", "--", "learning_rate"], obj=dict(context_helper=context_helper)
+        )
+
+        assert result.exit_code == 2
+        assert "name and value pairs" in result.output
+        context_helper.create_session.assert_not_called()
+
     @patch.object(ContextHelper, "init")
     def test_handle_env_arguments(self, context_helper_init):
         for testname, env_var, cli, expected in [
@@ -335,3 +662,29 @@ class TestPluginCLI(unittest.TestCase):
 
                 runner.invoke(kubeflow_group, cli + ["compile", "--help"], env=env)
                 context_helper_init.assert_called_with(None, expected)
+
+    def test_should_not_import_heavy_modules_on_startup(self):
+        heavy_modules = ["kfp", "kubernetes", "pydantic", "tabulate", "requests"]
+        probe = (
+            "import sys, kedro_kubeflow.cli, kedro_kubeflow.context_helper; "
+            f"print('loaded:' + ','.join(m for m in {heavy_modules!r} if m in sys.modules))"
+        )
+
+        result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+
+        assert "loaded:\n" in result.stdout
+
+    @patch("webbrowser.open_new_tab")
+    @patch.object(ContextHelper, "init")
+    def test_should_write_profile(self, context_helper_init, open_new_tab):
+        context_helper_init.return_value.config = test_config
+        runner = CliRunner()
+
+        with TemporaryDirectory() as temp_dir:
+            output = f"{temp_dir}/profile.json"
+            result = runner.invoke(kubeflow_group, ["--profile-output", output, "ui"])
+
+            assert result.exit_code == 0
+            assert "Wall time" in result.output
+            with open(output) as f:
+                assert "phases" in json.load(f)
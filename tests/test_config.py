@@ -133,6 +133,105 @@ class TestPluginConfig(unittest.TestCase, MinimalConfigMixin):
             },
         )
 
+    def test_resources_requirements(self):
+        cfg = PluginConfig(
+            **self.minimal_config(
+                {
+                    "run_config": {
+                        "resources": {
+                            "__default__": {"cpu": "200m", "memory": "64Mi", "limit_ratio": {"cpu": 2.5}},
+                            "node2": {"requests": {"memory": "128Mi"}, "limits": {"cpu": None}},
+                            "node3": {"memory": "256Mi", "limit_ratio": {"memory": 1.5}},
+                            "node4": {"cpu": "1"},
+                        }
+                    }
+                }
+            )
+        )
+        resources = cfg.run_config.resources
+        assert resources.requirements("node1") == ({"cpu": "200m", "memory": "64Mi"}, {"cpu": "500m", "memory": "64Mi"})
+        # the limit inherited from __default__ is raised to the request
+        assert resources.requirements("node2") == ({"cpu": "200m", "memory": "128Mi"}, {"memory": "128Mi"})
+        assert resources.requirements("node3") == (
+            {"cpu": "200m", "memory": "256Mi"},
+            {"cpu": "500m", "memory": "384Mi"},
+        )
+        assert resources.requirements("node4") == ({"cpu": "1", "memory": "64Mi"}, {"cpu": "1", "memory": "64Mi"})
+
+    def test_resources_requests_raise_inherited_limits(self):
+        cfg = PluginConfig(
+            **self.minimal_config({"run_config": {"resources": {"node1": {"requests": {"cpu": "2", "memory": "4Gi"}}}}})
+        )
+        assert cfg.run_config.resources.requirements("node1") == (
+            {"cpu": "2", "memory": "4Gi"},
+            {"cpu": "2", "memory": "4Gi"},
+        )
+
+    def test_resources_validation(self):
+        for resources, error in [
+            ({"node1": {"memroy": "1Gi"}}, "Unknown resource memroy (did you mean memory?)"),
+            ({"node1": {"memory": "1GB"}}, "Invalid Kubernetes quantity: 1GB"),
+            ({"node1": {"limits": {"cpu": "-1"}}}, "Negative quantity of cpu: -1"),
+            ({"node1": {"nvidia.com/gpu": 0.5}}, "must be a whole number: 0.5"),
+            ({"node1": {"hugepages-2MB": "1Gi"}}, "Invalid Kubernetes quantity: 2MB"),
+            ({"node1": {"limit_ratio": {"cpu": 0}}}, "Limit ratio of cpu must be a positive number: 0"),
+            (
+                {"node1": {"requests": {"cpu": "2"}, "limits": {"cpu": "1"}}},
+                "Requests of node1 exceed limits: cpu 2 > 1",
+            ),
+            ({"node1": {"limit_ratio": {"memory": 0.5}}}, "Requests of node1 exceed limits: memory 1024Mi > 512Mi"),
+        ]:
+            with self.subTest(resources=resources):
+                with self.assertRaises(ValidationError) as raised:
+                    PluginConfig(**self.minimal_config({"run_config": {"resources": resources}}))
+                assert "Invalid resources of node1" in str(raised.exception)
+                assert error in str(raised.exception)
+
+    def test_resources_normalization(self):
+        cfg = PluginConfig(
+            **self.minimal_config(
+                {
+                    "run_config": {
+                        "resources": {
+                            "node1": {
+                                "cpu": 2,
+                                "ephemeral-storage": "10Gi",
+                                "hugepages-2Mi": "512Mi",
+                                "example.com/foo": 1,
+                                "limits": {"memory": None},
+                            }
+                        }
+                    }
+                }
+            )
+        )
+        assert cfg.run_config.resources.requirements("node1") == (
+            {
+                "cpu": "2",
+                "memory": "1024Mi",
+                "ephemeral-storage": "10Gi",
+                "hugepages-2Mi": "512Mi",
+                "example.com/foo": "1",
+            },
+            {"cpu": "2", "ephemeral-storage": "10Gi", "hugepages-2Mi": "512Mi", "example.com/foo": "1"},
+        )
+
+    def test_tuned_resources_under_explicit_resources(self):
+        cfg = PluginConfig(
+            **self.minimal_config(
+                {
+                    "run_config": {"resources": {"node2": {"cpu": "100m"}}},
+                    "tuned_resources": {
+                        "node1": {"cpu": "250m", "memory": "640Mi"},
+                        "node2": {"cpu": "300m", "memory": "2Gi"},
+                    },
+                }
+            )
+        )
+        self.assertDictEqual(cfg.run_config.resources["node1"], {"cpu": "250m", "memory": "640Mi"})
+        self.assertDictEqual(cfg.run_config.resources["node2"], {"cpu": "100m", "memory": "2Gi"})
+        self.assertDictEqual(cfg.run_config.resources["node3"], {"cpu": "500m", "memory": "1024Mi"})
+
     def test_tolerations_default_only(self):
         toleration_config = [
             {
@@ -209,6 +308,25 @@ class TestPluginConfig(unittest.TestCase, MinimalConfigMixin):
         cfg = PluginConfig(**self.minimal_config(override={"run_config": {"volume": {}}}))
         assert cfg.run_config.volume.keep is False
 
+    def test_workflow_size_budget(self):
+        cfg = PluginConfig(**self.minimal_config())
+        assert cfg.run_config.workflow_size.budget == "1Mi"
+        assert cfg.run_config.workflow_size.on_exceeded == "warn"
+        with self.assertRaises(ValidationError):
+            PluginConfig(**self.minimal_config({"run_config": {"workflow_size": {"budget": "1 MB"}}}))
+
+    def test_stages_require_multiple_steps(self):
+        cfg = PluginConfig(**self.minimal_config({"run_config": {"stages": {"max_steps": 500}}}))
+        assert cfg.run_config.stages.max_steps == 500
+        assert PluginConfig(**self.minimal_config({"run_config": {"stages": {}}})).run_config.stages.max_steps is None
+        for stages_config in [
+            {"stages": {"max_steps": 0}},
+            {"stages": {"max_steps": 500}, "node_merge_strategy": "full"},
+            {"stages": {"max_steps": 500}, "volume": {"claims": ["data-1"]}},
+        ]:
+            with self.subTest(msg=str(stages_config)), self.assertRaises(ValidationError):
+                PluginConfig(**self.minimal_config({"run_config": stages_config}))
+
     def test_reuse_run_name_for_scheduled_run_name(self):
         cfg = PluginConfig(**self.minimal_config({"run_config": {"run_name": "some run"}}))
         self.assertEqual(cfg.run_config.run_name, "some run")
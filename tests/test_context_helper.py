@@ -43,7 +43,7 @@ class TestContextHelper(unittest.TestCase, MinimalConfigMixin):
             create().load_context.return_value = "sample_context"
             helper = ContextHelper.init(metadata, "test")
             assert helper.context == "sample_context"
-            create.assert_called_with("test_package", env="test")
+            create.assert_called_with("test_package", env="test", extra_params=None)
 
     # def test_config(self):
     #     metadata = Mock()
@@ -0,0 +1,63 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import pandas as pd
+
+from kedro_kubeflow.datasets import IntermediateDataset
+
+
+class TestIntermediateDataset(unittest.TestCase):
+    def test_should_store_data_frames_as_parquet(self):
+        with TemporaryDirectory() as tmp_dir:
+            # given
+            dataset = IntermediateDataset(f"{tmp_dir}/run-id/frame")
+            frame = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+
+            # when
+            dataset.save(frame)
+
+            # then
+            assert os.path.exists(f"{tmp_dir}/run-id/frame.parquet")
+            pd.testing.assert_frame_equal(dataset.load(), frame)
+
+    def test_should_pickle_data_frames_not_convertible_to_parquet(self):
+        with TemporaryDirectory() as tmp_dir:
+            # given
+            dataset = IntermediateDataset(f"{tmp_dir}/run-id/frame")
+            frame = pd.DataFrame({"a": [1, "x"]})
+
+            # when
+            dataset.save(frame)
+
+            # then
+            assert not os.path.exists(f"{tmp_dir}/run-id/frame.parquet")
+            assert os.path.exists(f"{tmp_dir}/run-id/frame.pkl")
+            pd.testing.assert_frame_equal(dataset.load(), frame)
+
+    def test_should_pickle_other_objects(self):
+        with TemporaryDirectory() as tmp_dir:
+            dataset = IntermediateDataset(f"{tmp_dir}/run-id/model")
+
+            dataset.save({"weights": [1.0, 2.0]})
+
+            assert os.path.exists(f"{tmp_dir}/run-id/model.pkl")
+            assert dataset.load() == {"weights": [1.0, 2.0]}
+            assert dataset.exists()
+
+    def test_should_replace_data_saved_in_other_format(self):
+        with TemporaryDirectory() as tmp_dir:
+            dataset = IntermediateDataset(f"{tmp_dir}/data")
+            dataset.save(pd.DataFrame({"a": [1]}))
+
+            dataset.save([1, 2, 3])
+
+            assert not os.path.exists(f"{tmp_dir}/data.parquet")
+            assert dataset.load() == [1, 2, 3]
+
+    def test_should_support_remote_file_systems(self):
+        dataset = IntermediateDataset("memory://bucket/run-id/data")
+
+        dataset.save([1, 2, 3])
+
+        assert dataset.load() == [1, 2, 3]
@@ -1,6 +1,7 @@
 """Test utils"""
 
 import unittest
+from unittest.mock import patch
 
 from kedro_kubeflow.generators.utils import (
     is_local_fs,
@@ -17,6 +18,36 @@ def gcsfs_is_missing():
         return True
 
 
+class TestIsLocalFs(unittest.TestCase):
+    def test_should_detect_local_paths(self):
+        for path in [
+            "data/01_raw/file.csv",
+            "/data/01_raw/file.csv",
+            "file:///data/01_raw/file.csv",
+            "local://data/01_raw/file.csv",
+            "C:\\data\\file.csv",
+        ]:
+            with self.subTest(path=path):
+                assert is_local_fs(path) is True
+
+    def test_should_detect_remote_paths(self):
+        for path in [
+            "gs://bucket/file.csv",
+            "s3a://bucket/file.csv",
+            "abfs://container/file.csv",
+            "memory://file.csv",
+            "simplecache::s3://bucket/file.csv",
+        ]:
+            with self.subTest(path=path):
+                assert is_local_fs(path) is False
+
+    @patch("fsspec.open")
+    def test_should_not_create_file_systems(self, fsspec_open):
+        is_local_fs("gs://bucket/not-instantiated.csv")
+
+        fsspec_open.assert_not_called()
+
+
 @unittest.skipIf(gcsfs_is_missing(), "Package gcsfs is not installed")
 class TestGeneratorUtils(unittest.TestCase):
     def test_is_local(self):
@@ -0,0 +1,278 @@
+"""Test generator"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import kfp
+from kedro.pipeline import Pipeline, node
+
+from kedro_kubeflow.config import PluginConfig
+from kedro_kubeflow.generators.grouped_pipeline_generator import (
+    GroupedPipelineGenerator,
+)
+from kedro_kubeflow.generators.grouping import (
+    group_datasets,
+    group_nodes,
+    split_into_stages,
+)
+from tests.common import MinimalConfigMixin
+
+
+def identity(input1: str):
+    return input1  # pragma: no cover
+
+
+def merge(input1: str, input2: str):
+    return input1 + input2  # pragma: no cover
+
+
+class TestGroupNodes(unittest.TestCase):
+    def test_should_put_each_node_in_own_group_by_default(self):
+        pipeline = Pipeline(
+            [
+                node(identity, "A", "B", name="node1"),
+                node(identity, "B", "C", name="node2"),
+            ]
+        )
+
+        groups, dependencies = group_nodes(pipeline.node_dependencies)
+
+        assert {name: [n.name for n in nodes] for name, nodes in groups.items()} == {
+            "node1": ["node1"],
+            "node2": ["node2"],
+        }
+        assert dependencies == {"node1": set(), "node2": {"node1"}}
+
+    def test_should_fuse_linear_chains(self):
+        pipeline = Pipeline(
+            [
+                node(identity, "A", "B", name="node1"),
+                node(identity, "B", "C", name="node2"),
+                node(identity, "C", "D", name="node3"),
+                node(identity, "C", "E", name="node4"),
+                node(identity, "E", "F", name="node5"),
+                node(merge, ["D", "F"], "G", name="node6"),
+            ]
+        )
+
+        groups, dependencies = group_nodes(pipeline.node_dependencies, fuse_chains=True)
+
+        assert {name: [n.name for n in nodes] for name, nodes in groups.items()} == {
+            "node1": ["node1", "node2"],
+            "node3": ["node3"],
+            "node4": ["node4", "node5"],
+            "node6": ["node6"],
+        }
+        assert dependencies == {
+            "node1": set(),
+            "node3": {"node1"},
+            "node4": {"node1"},
+            "node6": {"node3", "node4"},
+        }
+
+    def test_should_group_nodes_by_tags(self):
+        pipeline = Pipeline(
+            [
+                node(identity, "A", "B", name="node1", tags=["prep"]),
+                node(identity, "A", "C", name="node2", tags=["prep"]),
+                node(merge, ["B", "C"], "D", name="node3"),
+            ]
+        )
+
+        groups, dependencies = group_nodes(pipeline.node_dependencies, {"preprocessing": ["prep"]})
+
+        assert {name: [n.name for n in nodes] for name, nodes in groups.items()} == {
+            "preprocessing": ["node1", "node2"],
+            "node3": ["node3"],
+        }
+        assert dependencies == {"preprocessing": set(), "node3": {"preprocessing"}}
+
+    def test_should_raise_if_grouping_creates_cycle(self):
+        pipeline = Pipeline(
+            [
+                node(identity, "A", "B", name="node1", tags=["group"]),
+                node(identity, "B", "C", name="node2"),
+                node(identity, "C", "D", name="node3", tags=["group"]),
+            ]
+        )
+
+        with self.assertRaises(ValueError) as raises:
+            group_nodes(pipeline.node_dependencies, {"group": ["group"]})
+        assert "cycle" in str(raises.exception)
+
+    def test_should_raise_if_node_matches_multiple_groups(self):
+        pipeline = Pipeline([node(identity, "A", "B", name="node1", tags=["a", "b"])])
+
+        with self.assertRaises(ValueError):
+            group_nodes(pipeline.node_dependencies, {"group_a": ["a"], "group_b": ["b"]})
+
+    def test_should_find_datasets_passed_between_groups(self):
+        pipeline = Pipeline(
+            [
+                node(identity, "A", "B", name="node1", tags=["prep"]),
+                node(identity, "B", "C", name="node2", tags=["prep"]),
+                node(merge, ["B", "C"], "D", name="node3"),
+            ]
+        )
+        groups, _ = group_nodes(pipeline.node_dependencies, {"preprocessing": ["prep"]})
+
+        assert group_datasets(groups) == {
+            "B": ("preprocessing", {"preprocessing", "node3"}),
+            "C": ("preprocessing", {"node3"}),
+        }
+
+    def test_should_split_groups_into_stages_in_topological_order(self):
+        dependencies = {"g4": {"g2", "g3"}, "g3": {"g1"}, "g2": {"g1"}, "g1": set(), "g5": set()}
+
+        stages = split_into_stages(dependencies, 2)
+
+        assert stages == [["g1", "g5"], ["g3", "g2"], ["g4"]]
+
+    def test_should_split_groups_into_stages_fitting_budget(self):
+        dependencies = {"g1": set(), "g2": {"g1"}, "g3": {"g2"}, "g4": {"g3"}}
+        sizes = {"g1": 300, "g2": 500, "g3": 1500, "g4": 100}
+
+        stages = split_into_stages(dependencies, step_sizes=sizes, budget=1000)
+
+        assert stages == [["g1", "g2"], ["g3"], ["g4"]]
+
+
+class TestGroupedGenerator(unittest.TestCase, MinimalConfigMixin):
+    def test_should_run_fused_nodes_in_one_step(self):
+        # given
+        self.create_generator()
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "Always")
+            with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                pipeline()
+
+            # then
+            assert set(dsl_pipeline.ops.keys()) == {"node1", "node3", "node4"}
+            assert "node1,node2" == self._nodes_arg(dsl_pipeline.ops["node1"])
+            assert "node3" == self._nodes_arg(dsl_pipeline.ops["node3"])
+            assert dsl_pipeline.ops["node3"].dependent_names == ["node1"]
+
+    def test_should_run_tagged_nodes_in_one_step(self):
+        # given
+        self.create_generator(config={"node_grouping": {"training": ["train"]}})
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "Always")
+            with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                pipeline()
+
+            # then
+            assert set(dsl_pipeline.ops.keys()) == {"node1", "training"}
+            assert "node3,node4" == self._nodes_arg(dsl_pipeline.ops["training"])
+
+    def test_should_register_artifacts_of_all_nodes_in_group(self):
+        # given
+        self.create_generator(
+            catalog={
+                "B": {"type": "pandas.CSVDataSet", "filepath": "data/02_intermediate/b.csv"},
+                "C": {"type": "pandas.CSVDataSet", "filepath": "data/02_intermediate/c.csv"},
+            }
+        )
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "Always")
+            with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                pipeline()
+
+            # then
+            assert set(dsl_pipeline.ops["node1"].file_outputs.keys()) == {"B", "C"}
+
+    def test_should_keep_datasets_internal_to_group_in_memory(self):
+        # given
+        self.create_generator(
+            config={"keep_group_datasets_in_memory": True},
+            catalog={
+                "B": {"type": "pandas.CSVDataSet", "filepath": "data/02_intermediate/b.csv"},
+                "C": {"type": "pandas.CSVDataSet", "filepath": "data/02_intermediate/c.csv"},
+            },
+        )
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "Always")
+            with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                pipeline()
+
+            # then
+            env = {e.name: e.value for e in dsl_pipeline.ops["node1"].container.env}
+            assert env["KEDRO_KUBEFLOW_IN_MEMORY_DATASETS"] == "B"
+            assert set(dsl_pipeline.ops["node1"].file_outputs.keys()) == {"C"}
+            assert "KEDRO_KUBEFLOW_IN_MEMORY_DATASETS" not in {e.name for e in dsl_pipeline.ops["node3"].container.env}
+
+    @staticmethod
+    def _nodes_arg(op):
+        args = op.container.args
+        return args[args.index("--nodes") + 1]
+
+    def create_generator(self, config=None, params=None, catalog=None):
+        if catalog is None:
+            catalog = {"C": {"type": "pandas.CSVDataSet", "filepath": "gs://unittest-bucket/c.csv"}}
+        config_loader = MagicMock()
+        config_loader.get.return_value = catalog
+        context = type(
+            "obj",
+            (object,),
+            {
+                "env": "unittests",
+                "params": params or {},
+                "config_loader": config_loader,
+            },
+        )
+        self.pipelines_under_test = {
+            "pipeline": Pipeline(
+                [
+                    node(identity, "A", "B", name="node1"),
+                    node(identity, "B", "C", name="node2"),
+                    node(identity, "C", "D", name="node3", tags=["train"]),
+                    node(identity, "C", "E", name="node4", tags=["train"]),
+                ]
+            )
+        }
+        self.generator_under_test = GroupedPipelineGenerator(
+            PluginConfig(
+                **self.minimal_config(
+                    {
+                        "host": "http://unittest",
+                        "run_config": {"node_merge_strategy": "grouped", **(config or {})},
+                    }
+                )
+            ),
+            "my-awesome-project",
+            context,
+        )
+
+    def mock_mlflow(self, enabled=False):
+        def fakeimport(name, *args, **kw):
+            if not enabled and name == "mlflow":
+                raise ImportError
+            return self.realimport(name, *args, **kw)
+
+        __builtins__["__import__"] = fakeimport
+
+    def setUp(self):
+        self.realimport = __builtins__["__import__"]
+        self.mock_mlflow(False)
+
+    def tearDown(self):
+        __builtins__["__import__"] = self.realimport
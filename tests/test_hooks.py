@@ -3,9 +3,16 @@ import unittest
 from unittest.mock import patch
 
 import mlflow
+from kedro.io import DataCatalog, MemoryDataset
 
 from kedro_kubeflow.auth import AuthHandler
-from kedro_kubeflow.hooks import MlflowIapAuthHook, MlflowTagsHook  # NOQA
+from kedro_kubeflow.datasets import IntermediateDataset
+from kedro_kubeflow.hooks import (  # NOQA
+    InMemoryDatasetsHook,
+    IntermediateDatasetsHook,
+    MlflowIapAuthHook,
+    MlflowTagsHook,
+)
 
 from .utils import environment
 
@@ -18,6 +25,12 @@ class TestMlflowIapAuthHook(unittest.TestCase):
         assert os.environ["MLFLOW_TRACKING_TOKEN"] == "TEST_TOKEN"
         obtain_id_token.assert_called_with()
 
+    @patch.object(AuthHandler, "obtain_id_token", return_value="REFRESHED_TOKEN")
+    def test_should_refresh_token_before_node_run(self, obtain_id_token):
+        MlflowIapAuthHook().before_node_run()
+
+        assert os.environ["MLFLOW_TRACKING_TOKEN"] == "REFRESHED_TOKEN"
+
 
 @patch.object(mlflow, "set_tag")
 class TestMlflowTagsHook(unittest.TestCase):
@@ -59,3 +72,45 @@ class TestMlflowTagsHook(unittest.TestCase):
 
         # cleanup
         __builtins__["__import__"] = real_import
+
+
+class TestInMemoryDatasetsHook(unittest.TestCase):
+    def test_should_replace_listed_datasets_with_memory_datasets(self):
+        catalog = DataCatalog.from_config(
+            {
+                "B": {"type": "pickle.PickleDataset", "filepath": "data/b.pkl"},
+                "C": {"type": "pickle.PickleDataset", "filepath": "data/c.pkl"},
+            }
+        )
+
+        with environment({"KEDRO_KUBEFLOW_IN_MEMORY_DATASETS": "B"}):
+            InMemoryDatasetsHook().after_catalog_created(catalog=catalog)
+
+        assert isinstance(catalog._get_dataset("B"), MemoryDataset)
+        assert not isinstance(catalog._get_dataset("C"), MemoryDataset)
+
+    def test_should_keep_catalog_if_env_is_not_set(self):
+        catalog = DataCatalog.from_config({"B": {"type": "pickle.PickleDataset", "filepath": "data/b.pkl"}})
+
+        with environment({}, delete_keys=["KEDRO_KUBEFLOW_IN_MEMORY_DATASETS"]):
+            InMemoryDatasetsHook().after_catalog_created(catalog=catalog)
+
+        assert not isinstance(catalog._get_dataset("B"), MemoryDataset)
+
+
+class TestIntermediateDatasetsHook(unittest.TestCase):
+    def test_should_persist_listed_datasets(self):
+        catalog = DataCatalog()
+
+        with environment(
+            {
+                "KEDRO_KUBEFLOW_INTERMEDIATE_DATASETS": "B,C",
+                "KEDRO_KUBEFLOW_INTERMEDIATE_DATA_PATH": "data/kubeflow-intermediate/run-id",
+            }
+        ):
+            IntermediateDatasetsHook().after_catalog_created(catalog=catalog)
+
+        dataset = catalog._get_dataset("B")
+        assert isinstance(dataset, IntermediateDataset)
+        assert dataset._describe() == {"path": "data/kubeflow-intermediate/run-id/B"}
+        assert isinstance(catalog._get_dataset("C"), IntermediateDataset)
@@ -1,17 +1,22 @@
 """Test kedro_kubeflow module."""
 
+import json
 import os
 import unittest
-from tempfile import NamedTemporaryFile
+from decimal import Decimal
+from tempfile import NamedTemporaryFile, TemporaryDirectory
 from unittest.mock import patch
 
 from kfp import dsl
 
 from kedro_kubeflow.config import PluginConfig
+from kedro_kubeflow.generators.grouped_pipeline_generator import (
+    GroupedPipelineGenerator,
+)
 from kedro_kubeflow.generators.one_pod_pipeline_generator import (
     OnePodPipelineGenerator,
 )
-from kedro_kubeflow.kfpclient import KubeflowClient
+from kedro_kubeflow.kfpclient import KubeflowClient, resource_totals
 from kedro_kubeflow.utils import strip_margin
 from tests.common import MinimalConfigMixin
 
@@ -71,7 +76,7 @@ class TestKubeflowClient(unittest.TestCase, MinimalConfigMixin):
     def test_should_run_pipeline_without_waiting(self):
         # given
         run_mock = unittest.mock.MagicMock()
-        self.kfp_client_mock.create_run_from_pipeline_func.return_value = run_mock
+        self.kfp_client_mock.create_run_from_pipeline_package.return_value = run_mock
 
         # when
         self.client_under_test.run_once(
@@ -85,12 +90,12 @@ class TestKubeflowClient(unittest.TestCase, MinimalConfigMixin):
         )
 
         # then
-        self.kfp_client_mock.create_run_from_pipeline_func.assert_called()
+        self.kfp_client_mock.create_run_from_pipeline_package.assert_called()
         run_mock.wait_for_run_completion.assert_not_called()
         (
             args,
             kwargs,
-        ) = self.kfp_client_mock.create_run_from_pipeline_func.call_args
+        ) = self.kfp_client_mock.create_run_from_pipeline_package.call_args
         assert kwargs == {
             "arguments": {},
             "experiment_name": "experiment",
@@ -101,7 +106,7 @@ class TestKubeflowClient(unittest.TestCase, MinimalConfigMixin):
     def test_should_run_pipeline_and_wait(self):
         # given
         run_mock = unittest.mock.MagicMock()
-        self.kfp_client_mock.create_run_from_pipeline_func.return_value = run_mock
+        self.kfp_client_mock.create_run_from_pipeline_package.return_value = run_mock
 
         # when
         self.client_under_test.run_once(
@@ -115,13 +120,13 @@ class TestKubeflowClient(unittest.TestCase, MinimalConfigMixin):
         )
 
         # then
-        self.kfp_client_mock.create_run_from_pipeline_func.assert_called()
+        self.kfp_client_mock.create_run_from_pipeline_package.assert_called()
         run_mock.wait_for_run_completion.assert_called()
 
     def test_should_run_pipeline_adjusting_the_name(self):
         # given
         run_mock = unittest.mock.MagicMock()
-        self.kfp_client_mock.create_run_from_pipeline_func.return_value = run_mock
+        self.kfp_client_mock.create_run_from_pipeline_package.return_value = run_mock
 
         # when
         self.client_under_test.run_once(
@@ -136,12 +141,12 @@ class TestKubeflowClient(unittest.TestCase, MinimalConfigMixin):
         )
 
         # then
-        self.kfp_client_mock.create_run_from_pipeline_func.assert_called()
+        self.kfp_client_mock.create_run_from_pipeline_package.assert_called()
         run_mock.wait_for_run_completion.assert_not_called()
         (
             args,
             kwargs,
-        ) = self.kfp_client_mock.create_run_from_pipeline_func.call_args
+        ) = self.kfp_client_mock.create_run_from_pipeline_package.call_args
         assert kwargs == {
             "arguments": {"region": "ABC"},
             "experiment_name": "experiment",
@@ -149,6 +154,61 @@ class TestKubeflowClient(unittest.TestCase, MinimalConfigMixin):
             "namespace": "exp_namespace",
         }
 
+    def test_should_run_next_stage_of_pipeline(self):
+        # when
+        self.client_under_test.run_stage(
+            pipeline="pipeline",
+            image="unittest-image",
+            image_pull_policy="Always",
+            stage=1,
+            run_id="first-run",
+            volume_name="first-volume",
+            experiment_name="experiment",
+            experiment_namespace=None,
+            run_name="unittest for region {region}",
+            parameters={"region": "ABC"},
+            mlflow_run_id="mlflow-run",
+        )
+
+        # then
+        self.client_under_test.generator.generate_pipeline.assert_called_with(
+            "pipeline",
+            "unittest-image",
+            "Always",
+            stage=1,
+            run_id="first-run",
+            volume_name="first-volume",
+            mlflow_run_id="mlflow-run",
+        )
+        _, kwargs = self.kfp_client_mock.create_run_from_pipeline_package.call_args
+        assert kwargs == {
+            "arguments": {"region": "ABC"},
+            "experiment_name": "experiment",
+            "namespace": None,
+            "run_name": "unittest for region ABC (stage 2)",
+        }
+
+    def test_should_run_next_stage_with_configured_name_if_parameters_are_missing(self):
+        # when
+        with self.assertLogs("kedro_kubeflow.kfpclient", level="WARNING") as logs:
+            self.client_under_test.run_stage(
+                pipeline="pipeline",
+                image="unittest-image",
+                image_pull_policy="Always",
+                stage=1,
+                run_id="first-run",
+                volume_name="first-volume",
+                experiment_name="experiment",
+                experiment_namespace=None,
+                run_name="unittest for region {region}",
+                parameters={},
+            )
+
+        # then
+        _, kwargs = self.kfp_client_mock.create_run_from_pipeline_package.call_args
+        assert kwargs["run_name"] == "unittest for region {region} (stage 2)"
+        assert "Cannot fill run name" in "\n".join(logs.output)
+
     def test_should_compile_pipeline(self):
         with NamedTemporaryFile(suffix=".yaml") as f:
             # when
@@ -158,6 +218,164 @@ class TestKubeflowClient(unittest.TestCase, MinimalConfigMixin):
             with open(f.name) as yamlfile:
                 assert "generateName: my-awesome-project-" in yamlfile.read()
 
+    def test_should_report_resources_of_compiled_pipeline(self):
+        with NamedTemporaryFile(suffix=".yaml") as f:
+            # when
+            with self.assertLogs("kedro_kubeflow.kfpclient", level="INFO") as logs:
+                self.client_under_test.compile(pipeline="pipeline", image="unittest-image", output=f.name)
+
+            # then
+            assert "Resources of all steps of pipeline pipeline" in "\n".join(logs.output)
+
+    def test_should_warn_if_workflow_exceeds_size_budget(self):
+        # given
+        self.create_client({"workflow_size": {"budget": "100"}})
+
+        with NamedTemporaryFile(suffix=".yaml") as f:
+            # when
+            with self.assertLogs("kedro_kubeflow.kfpclient", level="WARNING") as logs:
+                self.client_under_test.compile(pipeline="pipeline", image="unittest-image", output=f.name)
+
+        # then
+        assert "Workflow of pipeline pipeline exceeds the size budget" in "\n".join(logs.output)
+
+    def test_should_not_run_pipeline_exceeding_size_budget(self):
+        # given
+        self.create_client({"workflow_size": {"budget": "100", "on_exceeded": "fail"}})
+
+        # when
+        with self.assertRaises(ValueError) as raises:
+            self.client_under_test.run_once(
+                pipeline="new_pipeline",
+                image="unittest-image",
+                experiment_name="experiment",
+                experiment_namespace=None,
+                run_name="unittest",
+                wait=False,
+                timeout=10,
+            )
+
+        # then
+        assert "exceeds the size budget" in str(raises.exception)
+        self.kfp_client_mock.create_run_from_pipeline_package.assert_not_called()
+
+    def test_should_sum_resources_of_workflow_steps(self):
+        # given
+        workflow = {
+            "spec": {
+                "templates": [
+                    {"name": "pipeline", "dag": {"tasks": []}},
+                    {"container": {"resources": {"requests": {"cpu": "500m", "memory": "1Gi"}}}},
+                    {
+                        "container": {
+                            "resources": {
+                                "requests": {"cpu": "2", "memory": "512Mi"},
+                                "limits": {"cpu": "4", "nvidia.com/gpu": "1"},
+                            }
+                        }
+                    },
+                ]
+            }
+        }
+
+        # when
+        totals = resource_totals(workflow)
+
+        # then
+        assert totals == {
+            "cpu": {"requests": Decimal("2.5"), "limits": 4, "largest_request": 2},
+            "memory": {"requests": 3 * 2**29, "limits": 0, "largest_request": 2**30},
+            "nvidia.com/gpu": {"requests": 0, "limits": 1, "largest_request": 0},
+        }
+
+    def test_should_compile_all_pipelines(self):
+        with TemporaryDirectory() as output_dir:
+            # when
+            self.client_under_test.compile_all(
+                outputs={
+                    "pipeline1": f"{output_dir}/pipeline1.yaml",
+                    "pipeline2": f"{output_dir}/pipeline2.yaml",
+                },
+                image="unittest-image",
+                max_workers=2,
+            )
+
+            # then
+            for name in ["pipeline1", "pipeline2"]:
+                with open(f"{output_dir}/{name}.yaml") as yamlfile:
+                    assert "generateName: my-awesome-project-" in yamlfile.read()
+
+    def test_should_upload_all_pipelines(self):
+        # given
+        self.kfp_client_mock.get_pipeline_id.return_value = None
+
+        # when
+        self.client_under_test.upload_all(
+            pipeline_names=["pipeline1", "pipeline2"],
+            image="unittest-image",
+            image_pull_policy="Always",
+            env="kubeflow-env",
+            max_workers=2,
+        )
+
+        # then
+        uploaded = {kwargs["name"] for _, kwargs in self.kfp_client_mock.pipeline_uploads.upload_pipeline.call_args_list}
+        assert uploaded == {
+            "[my-awesome-project] pipeline1 (env: kubeflow-env)",
+            "[my-awesome-project] pipeline2 (env: kubeflow-env)",
+        }
+
+    def test_should_reuse_cached_compiled_pipeline(self):
+        with TemporaryDirectory() as cache_dir, TemporaryDirectory() as output_dir:
+            # given
+            self.create_client({"compilation_cache": {"path": cache_dir}})
+            generator = self.client_under_test.generator
+            generator.fingerprint.return_value = "fingerprint"
+
+            # when
+            self.client_under_test.compile(pipeline="pipeline", image="unittest-image", output=f"{output_dir}/1.yaml")
+            self.client_under_test.compile(pipeline="pipeline", image="unittest-image", output=f"{output_dir}/2.yaml")
+
+            # then
+            generator.generate_pipeline.assert_called_once()
+            assert os.path.exists(f"{cache_dir}/fingerprint.yaml")
+            with open(f"{output_dir}/1.yaml") as first, open(f"{output_dir}/2.yaml") as second:
+                assert first.read() == second.read()
+
+    def test_should_compile_again_if_fingerprint_changes(self):
+        with TemporaryDirectory() as cache_dir, TemporaryDirectory() as output_dir:
+            # given
+            self.create_client({"compilation_cache": {"path": cache_dir}})
+            generator = self.client_under_test.generator
+            generator.fingerprint.side_effect = ["fingerprint1", "fingerprint2"]
+
+            # when
+            self.client_under_test.compile(pipeline="pipeline", image="image1", output=f"{output_dir}/1.yaml")
+            self.client_under_test.compile(pipeline="pipeline", image="image2", output=f"{output_dir}/2.yaml")
+
+            # then
+            assert generator.generate_pipeline.call_count == 2
+
+    def test_should_not_use_cache_by_default(self):
+        with NamedTemporaryFile(suffix=".yaml") as f:
+            # when
+            self.client_under_test.compile(pipeline="pipeline", image="unittest-image", output=f.name)
+
+            # then
+            self.client_under_test.generator.fingerprint.assert_not_called()
+
+    @patch("kedro_kubeflow.kfpclient.DeduplicatingCompiler")
+    def test_should_compile_with_deduplicated_templates_if_enabled(self, compiler_mock):
+        # given
+        self.create_client({"deduplicate_templates": True})
+
+        with NamedTemporaryFile(suffix=".yaml") as f:
+            # when
+            self.client_under_test._compile("pipeline", "unittest-image", "Always", f.name)
+
+        # then
+        compiler_mock.return_value.compile.assert_called_once()
+
     @patch("kedro_kubeflow.kfpclient.AuthHandler")
     @patch("kedro_kubeflow.kfpclient.PodPerNodePipelineGenerator")
     @patch("kedro_kubeflow.kfpclient.Client")
@@ -322,6 +540,24 @@ class TestKubeflowClient(unittest.TestCase, MinimalConfigMixin):
 
         assert isinstance(client.generator, OnePodPipelineGenerator)
 
+    @patch("kedro_kubeflow.kfpclient.Client")
+    @patch("kedro.framework.context.context.KedroContext")
+    def test_can_create_client_with_node_strategy_grouped(self, context, _):
+        client = KubeflowClient(
+            PluginConfig(
+                **self.minimal_config(
+                    {
+                        "host": "http://unittest",
+                        "run_config": {"node_merge_strategy": "grouped"},
+                    }
+                )
+            ),
+            "unit-test-project",
+            context,
+        )
+
+        assert isinstance(client.generator, GroupedPipelineGenerator)
+
     def test_should_truncated_the_pipeline_name_to_100_characters_on_upload(
         self,
     ):
@@ -349,6 +585,7 @@ class TestKubeflowClient(unittest.TestCase, MinimalConfigMixin):
     def test_should_upload_new_version_of_existing_pipeline(self):
         # given
         self.kfp_client_mock.get_pipeline_id.return_value = "123"
+        self.kfp_client_mock._pipelines_api.list_pipeline_versions.return_value.versions = None
 
         # when
         self.client_under_test.upload(
@@ -361,6 +598,80 @@ class TestKubeflowClient(unittest.TestCase, MinimalConfigMixin):
         # then
         self.kfp_client_mock.pipeline_uploads.upload_pipeline.assert_not_called()
         self.kfp_client_mock.pipeline_uploads.upload_pipeline_version.assert_called()
+        (
+            args,
+            kwargs,
+        ) = self.kfp_client_mock.pipeline_uploads.upload_pipeline_version.call_args
+        assert kwargs["name"].startswith("my-awesome-project-")
+        assert len(kwargs["name"]) == len("my-awesome-project-") + 32
+        assert kwargs["pipelineid"] == "123"
+
+    @patch.object(KubeflowClient, "_pipeline_digest", return_value="0" * 64)
+    def test_should_skip_upload_of_identical_pipeline_version(self, _):
+        # given
+        self.kfp_client_mock.get_pipeline_id.return_value = "123"
+        self.kfp_client_mock._pipelines_api.list_pipeline_versions.return_value.versions = [
+            type("obj", (object,), {"id": "existing-version"})
+        ]
+        self.kfp_client_mock.get_pipeline.return_value.default_version.id = "newer-version"
+
+        # when
+        self.client_under_test.upload(
+            pipeline_name="pipeline",
+            image="unittest-image",
+            image_pull_policy="Always",
+            env="kubeflow-env",
+        )
+
+        # then
+        self.kfp_client_mock.pipeline_uploads.upload_pipeline.assert_not_called()
+        self.kfp_client_mock.pipeline_uploads.upload_pipeline_version.assert_not_called()
+        self.kfp_client_mock._pipelines_api.list_pipeline_versions.assert_called_once_with(
+            resource_key_type="PIPELINE",
+            resource_key_id="123",
+            filter=json.dumps(
+                {"predicates": [{"op": 1, "key": "name", "stringValue": "my-awesome-project-" + "0" * 32}]}
+            ),
+            page_size=1,
+        )
+        self.kfp_client_mock._pipelines_api.update_pipeline_default_version.assert_called_with(
+            pipeline_id="123", version_id="existing-version"
+        )
+
+    @patch.object(KubeflowClient, "_pipeline_digest", return_value="0" * 64)
+    def test_should_keep_default_version_if_identical_to_uploaded_one(self, _):
+        # given
+        self.kfp_client_mock.get_pipeline_id.return_value = "123"
+        self.kfp_client_mock._pipelines_api.list_pipeline_versions.return_value.versions = [
+            type("obj", (object,), {"id": "existing-version"})
+        ]
+        self.kfp_client_mock.get_pipeline.return_value.default_version.id = "existing-version"
+
+        # when
+        self.client_under_test.upload(
+            pipeline_name="pipeline",
+            image="unittest-image",
+            image_pull_policy="Always",
+            env="kubeflow-env",
+        )
+
+        # then
+        self.kfp_client_mock.pipeline_uploads.upload_pipeline_version.assert_not_called()
+        self.kfp_client_mock._pipelines_api.update_pipeline_default_version.assert_not_called()
+
+    def test_should_compute_pipeline_digest_ignoring_compilation_time(self):
+        with TemporaryDirectory() as output_dir:
+            # when
+            self.client_under_test.compile(pipeline="pipeline", image="unittest-image", output=f"{output_dir}/1.yaml")
+            with open(f"{output_dir}/1.yaml") as f:
+                content = f.read()
+            with open(f"{output_dir}/2.yaml", "w") as f:
+                f.write(content.replace("pipeline_compilation_time: '", "pipeline_compilation_time: '1999"))
+
+            # then
+            assert KubeflowClient._pipeline_digest(f"{output_dir}/1.yaml") == KubeflowClient._pipeline_digest(
+                f"{output_dir}/2.yaml"
+            )
 
     @patch("kedro_kubeflow.kfpclient.Client")
     def test_should_raise_error_if_invalid_node_merge_strategy(self, kfp_client_mock):
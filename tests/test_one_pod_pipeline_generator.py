@@ -48,6 +48,12 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
                 "param3": datetime.date(2022, 2, 24),
             }
         )
+        self.pipelines_under_test["pipeline"] = Pipeline(
+            [
+                node(lambda a, p: a, ["A", "params:param1"], "B", name="node1"),
+                node(lambda b, p: b, ["B", "params:param3"], "C", name="node2"),
+            ]
+        )
 
         # when
         with patch(
@@ -64,11 +70,10 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
             assert default_params["param1"].default == 0.3
             assert default_params["param2"].default == 42
             assert default_params["param3"].default == "2022-02-24"
-            assert dsl_pipeline.ops["pipeline"].container.args[1:] == [
+            args = dsl_pipeline.ops["pipeline"].container.args
+            assert args[args.index("--") + 1 :] == [
                 "param1",
                 "{{pipelineparam:op=;name=param1}}",
-                "param2",
-                "{{pipelineparam:op=;name=param2}}",
                 "param3",
                 "{{pipelineparam:op=;name=param3}}",
             ]
@@ -82,6 +87,9 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
                 "param3": datetime.date(2022, 2, 24),
             }
         )
+        self.pipelines_under_test["pipeline"] = Pipeline(
+            [node(lambda a, p: a, ["A", "params:param1.nested1.nested2"], "B", name="node1")]
+        )
 
         # when
         with patch(
@@ -98,13 +106,10 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
             assert default_params["param1"].default == {"nested1": {"nested2": 1, "nested3": 2}}
             assert default_params["param2"].default == 42
             assert default_params["param3"].default == "2022-02-24"
-            assert dsl_pipeline.ops["pipeline"].container.args[1:] == [
+            args = dsl_pipeline.ops["pipeline"].container.args
+            assert args[args.index("--") + 1 :] == [
                 "param1",
                 "{{pipelineparam:op=;name=param1}}",
-                "param2",
-                "{{pipelineparam:op=;name=param2}}",
-                "param3",
-                "{{pipelineparam:op=;name=param3}}",
             ]
 
     def test_should_support_namespaced_params_and_inject_them_to_the_node(
@@ -121,6 +126,12 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
                 "param1": 42,
             }
         )
+        self.pipelines_under_test["pipeline"] = Pipeline(
+            [
+                node(lambda a, p: a, ["A", "params:outer_namespace.inner_namespace1.param1"], "B", name="node1"),
+                node(lambda b, p: b, ["B", "params:param1"], "C", name="node2"),
+            ]
+        )
 
         # when
         with patch(
@@ -146,7 +157,8 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
                 "param": "outer_namespace.param",
             }
             assert default_params["param1"].default == 42
-            assert dsl_pipeline.ops["pipeline"].container.args[1:] == [
+            args = dsl_pipeline.ops["pipeline"].container.args
+            assert args[args.index("--") + 1 :] == [
                 "outer_namespace",
                 "{{pipelineparam:op=;name=outer_namespace}}",
                 "param1",
@@ -286,6 +298,36 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
             # then
             assert dsl_pipeline.ops["pipeline"].file_outputs == {"B": "/home/kedro/data/02_intermediate/b.csv"}
 
+    def test_should_register_only_pipeline_outputs_as_artifacts(self):
+        # given
+        self.create_generator(
+            catalog={
+                "A": {
+                    "type": "pandas.CSVDataSet",
+                    "filepath": "data/01_raw/a.csv",
+                },
+                "{name}": {
+                    "type": "pandas.CSVDataSet",
+                    "filepath": "data/02_intermediate/{name}.csv",
+                },
+            }
+        )
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "Always")
+            with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                pipeline()
+
+            # then
+            assert dsl_pipeline.ops["pipeline"].file_outputs == {
+                "B": "/home/kedro/data/02_intermediate/B.csv",
+                "C": "/home/kedro/data/02_intermediate/C.csv",
+            }
+
     def test_should_skip_artifact_registration_if_requested(self):
         # given
         self.create_generator(
@@ -372,7 +414,7 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
             assert (
                 dsl_pipeline.ops["on-exit"]
                 .container.command[-1]
-                .endswith("kedro run --config config.yaml " "--env unittests --pipeline notify_via_slack")
+                .endswith('kedro kubeflow --env unittests run-node --pipeline notify_via_slack -- "$@"')
             )
 
     def test_should_generate_exit_handler_with_max_staleness(self):
@@ -385,7 +427,10 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
         )
 
         # when
-        with kfp.dsl.Pipeline(None) as dsl_pipeline:
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ), kfp.dsl.Pipeline(None) as dsl_pipeline:
             pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "Always")
             pipeline()
 
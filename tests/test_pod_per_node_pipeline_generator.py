@@ -1,8 +1,11 @@
 """Test generator"""
 
+import json
 import os
 import unittest
 from inspect import signature
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from unittest.mock import MagicMock, patch
 
 import kfp
@@ -66,13 +69,115 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
             self.assertEqual(volume_init_spec.image, "unittest-image")
             self.assertEqual(volume_init_spec.image_pull_policy, "IfNotPresent")
             self.assertEqual(volume_init_spec.security_context.run_as_user, 0)
-            assert volume_init_spec.args[0].startswith("cp --verbose -r")
+            self.assertEqual(volume_init_spec.command, ["kedro"])
+            self.assertEqual(
+                volume_init_spec.args,
+                [
+                    "kubeflow",
+                    "--env",
+                    "unittests",
+                    "sync-data-volume",
+                    "--source",
+                    "/home/kedro/data",
+                    "--target",
+                    "/home/kedro/datavolume",
+                    ".",
+                ],
+            )
             for node_name in ["data-volume-init", "node1", "node2"]:
                 volumes = dsl_pipeline.ops[node_name].container.volume_mounts
                 self.assertEqual(len(volumes), 1)
                 self.assertEqual(volumes[0].name, "data-volume-create")
                 assert dsl_pipeline.ops[node_name].container.security_context.run_as_user == 0
 
+    def test_should_sync_only_local_pipeline_inputs_to_volume(self):
+        # given
+        self.create_generator(
+            config={"volume": {"copy_inputs_only": True}},
+            catalog={
+                "A": {"type": "pandas.CSVDataSet", "filepath": "data/01_raw/a.csv"},
+                "B": {"type": "pandas.CSVDataSet", "filepath": "data/02_intermediate/b.csv"},
+                "C": {"type": "pandas.CSVDataSet", "filepath": "gs://unittest-bucket/c.csv"},
+            },
+        )
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "IfNotPresent")
+            with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                pipeline()
+
+            # then
+            volume_init_spec = dsl_pipeline.ops["data-volume-init"].container
+            self.assertEqual(volume_init_spec.args[-3:], ["--target", "/home/kedro/datavolume", "01_raw/a.csv"])
+
+    def test_should_estimate_volume_size(self):
+        with TemporaryDirectory() as tmp_dir:
+            # given
+            # paths are relative to the project directory
+            history = os.path.join(tmp_dir, "sizes.json")
+            with open(history, "w") as f:
+                json.dump({"A": 2 * 2**30}, f)
+            os.makedirs(os.path.join(tmp_dir, "data"))
+            with open(os.path.join(tmp_dir, "data", "c.csv"), "w") as f:
+                f.truncate(2**30)
+            self.create_generator(
+                config={"volume": {"size": "auto", "size_history": "sizes.json"}},
+                catalog={"C": {"type": "pandas.CSVDataset", "filepath": "data/c.csv"}},
+                project_path=tmp_dir,
+            )
+
+            # when
+            with patch(
+                "kedro.framework.project.pipelines",
+                new=self.pipelines_under_test,
+            ):
+                pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "IfNotPresent")
+                with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                    pipeline()
+                fingerprint = self.generator_under_test.fingerprint("pipeline", "unittest-image", "IfNotPresent")
+
+                # then
+                volume_spec = dsl_pipeline.ops["data-volume-create"].k8s_resource.spec
+                self.assertEqual(volume_spec.resources.requests["storage"], "5Gi")
+                with open(history, "w") as f:
+                    json.dump({"A": 4 * 2**30}, f)
+                assert fingerprint != self.generator_under_test.fingerprint("pipeline", "unittest-image", "IfNotPresent")
+
+    def test_should_reuse_locked_volume_claim(self):
+        # given
+        self.create_generator(config={"volume": {"claims": ["data-0", "data-1"], "size": "5Gi"}})
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "IfNotPresent")
+            with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                pipeline()
+            workflow = kfp.compiler.Compiler()._create_workflow(pipeline)
+
+            # then
+            assert "data-volume-create" not in dsl_pipeline.ops
+            lock_spec = dsl_pipeline.ops["data-volume-lock"].container
+            self.assertEqual(lock_spec.args[-3:], ["{{workflow.name}}", "data-0", "data-1"])
+            assert "5Gi" in lock_spec.args
+            assert "--remove" in dsl_pipeline.ops["data-volume-init"].container.args
+            assert (
+                dsl_pipeline.ops["on-exit"]
+                .container.command[-1]
+                .endswith("kedro kubeflow unlock-pipeline-volume {{workflow.name}} data-0 data-1")
+            )
+            templates = {t["name"]: t for t in workflow["spec"]["templates"]}
+            claim = templates["node1"]["volumes"][0]["persistentVolumeClaim"]["claimName"]
+            self.assertEqual(claim, "{{inputs.parameters.data-volume-lock-claim}}")
+            dag = {t["name"]: t for t in templates["exit-handler-1"]["dag"]["tasks"]}
+            self.assertEqual(dag["data-volume-init"]["dependencies"], ["data-volume-lock"])
+
     def test_should_generate_on_exit_pipeline_run(self):
         # given
         self.create_generator(config={"on_exit_pipeline": "notify_via_slack"})
@@ -91,9 +196,36 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
             assert (
                 dsl_pipeline.ops["on-exit"]
                 .container.command[-1]
-                .endswith("kedro run --config config.yaml " "--env unittests --pipeline notify_via_slack")
+                .endswith('kedro kubeflow --env unittests run-node --pipeline notify_via_slack -- "$@"')
             )
 
+    def test_should_pass_on_exit_pipeline_only_its_params(self):
+        # given
+        self.create_generator(config={"on_exit_pipeline": "notify_via_slack"}, params={"param1": 0.3, "channel": "#ml"})
+        self.pipelines_under_test["notify_via_slack"] = Pipeline(
+            [node(lambda p: None, "params:channel", None, name="notify")]
+        )
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "IfNotPresent")
+            with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                pipeline()
+
+            # then
+            assert dsl_pipeline.ops["on-exit"].container.args == [
+                "_",
+                "channel",
+                "{{pipelineparam:op=;name=channel}}",
+                "status",
+                "{{workflow.status}}",
+                "failures",
+                "{{workflow.failures}}",
+            ]
+
     def test_should_generate_volume_removal_and_on_exit_pipeline_run(self):
         # given
         self.create_generator(config={"volume": {}, "on_exit_pipeline": "notify_via_slack"})
@@ -115,8 +247,7 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
                 .endswith(
                     "kedro kubeflow delete-pipeline-volume "
                     "{{workflow.name}}-pipeline-data-volume;"
-                    "kedro run --config config.yaml "
-                    "--env unittests --pipeline notify_via_slack"
+                    'kedro kubeflow --env unittests run-node --pipeline notify_via_slack -- "$@"'
                 )
             )
 
@@ -237,6 +368,13 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
     def test_should_support_params_and_inject_them_to_the_nodes(self):
         # given
         self.create_generator(params={"param1": 0.3, "param2": 42})
+        self.pipelines_under_test["pipeline"] = Pipeline(
+            [
+                node(lambda a, p: a, ["A", "params:param1"], "B", name="node1"),
+                node(lambda b, p: b, ["B", "parameters"], "C", name="node2"),
+                node(identity, "B", "D", name="node3"),
+            ]
+        )
 
         # when
         with patch(
@@ -252,18 +390,34 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
             self.assertEqual(len(default_params), 2)
             self.assertEqual(default_params["param1"].default, 0.3)
             self.assertEqual(default_params["param2"].default, 42)
-            for node_name in ["node1", "node2"]:
-                args = dsl_pipeline.ops[node_name].container.args
-                self.assertEqual(
-                    args,
-                    [
-                        "_",
-                        "param1",
-                        "{{pipelineparam:op=;name=param1}}",
-                        "param2",
-                        "{{pipelineparam:op=;name=param2}}",
-                    ],
-                )
+            self.assertEqual(
+                dsl_pipeline.ops["node1"].container.args,
+                [
+                    "kubeflow",
+                    "--env",
+                    "unittests",
+                    "run-node",
+                    "--pipeline",
+                    "pipeline",
+                    "--nodes",
+                    "node1",
+                    "--",
+                    "param1",
+                    "{{pipelineparam:op=;name=param1}}",
+                ],
+            )
+            args = dsl_pipeline.ops["node2"].container.args
+            self.assertEqual(
+                args[args.index("--") + 1 :],
+                [
+                    "param1",
+                    "{{pipelineparam:op=;name=param1}}",
+                    "param2",
+                    "{{pipelineparam:op=;name=param2}}",
+                ],
+            )
+            args = dsl_pipeline.ops["node3"].container.args
+            self.assertEqual(args[-1], "--")
 
     def test_should_support_nested_params_and_inject_them_to_the_node(self):
         # given
@@ -273,6 +427,13 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
                 "param2": 42,
             }
         )
+        self.pipelines_under_test["pipeline"] = Pipeline(
+            [
+                node(lambda a, p: a, ["A", "params:param1.nested1.nested2"], "B", name="node1"),
+                node(lambda b, p: b, ["B", "params:param2"], "C", name="node2"),
+                node(lambda b, p, q: b, ["B", "params:param1.nested1", "params:param2"], "D", name="node3"),
+            ]
+        )
 
         # when
         with patch(
@@ -288,12 +449,11 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
             assert len(default_params) == 2
             assert default_params["param1"].default == {"nested1": {"nested2": 1, "nested3": 2}}
             assert default_params["param2"].default == 42
-            for node_name in ["node1", "node2", "node3"]:
-                assert dsl_pipeline.ops[node_name].container.args[1:] == [
-                    "param1",
-                    "{{pipelineparam:op=;name=param1}}",
-                    "param2",
-                    "{{pipelineparam:op=;name=param2}}",
+            expected_params = {"node1": ["param1"], "node2": ["param2"], "node3": ["param1", "param2"]}
+            for node_name, params in expected_params.items():
+                args = dsl_pipeline.ops[node_name].container.args
+                assert args[args.index("--") + 1 :] == [
+                    arg for param in params for arg in [param, f"{{{{pipelineparam:op=;name={param}}}}}"]
                 ]
 
     def test_should_support_namespaced_params_and_inject_them_to_the_node(
@@ -310,6 +470,13 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
                 "param1": 42,
             }
         )
+        self.pipelines_under_test["pipeline"] = Pipeline(
+            [
+                node(lambda a, p: a, ["A", "params:outer_namespace.inner_namespace2.param1"], "B", name="node1"),
+                node(lambda b, p: b, ["B", "params:param1"], "C", name="node2"),
+                node(identity, "B", "D", name="node3"),
+            ]
+        )
 
         # when
         with patch(
@@ -335,13 +502,11 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
                 "param": "outer_namespace.param",
             }
             assert default_params["param1"].default == 42
-            for node_name in ["node1", "node2", "node3"]:
-                assert dsl_pipeline.ops[node_name].container.args[1:] == [
-                    "outer_namespace",
-                    "{{pipelineparam:op=;name=outer_namespace}}",
-                    "param1",
-                    "{{pipelineparam:op=;name=param1}}",
-                ]
+            args = dsl_pipeline.ops["node1"].container.args
+            assert args[args.index("--") + 1 :] == ["outer_namespace", "{{pipelineparam:op=;name=outer_namespace}}"]
+            args = dsl_pipeline.ops["node2"].container.args
+            assert args[args.index("--") + 1 :] == ["param1", "{{pipelineparam:op=;name=param1}}"]
+            assert dsl_pipeline.ops["node3"].container.args[-1] == "--"
 
     def test_should_fallbackto_default_resources_spec_if_not_requested(self):
         # given
@@ -401,6 +566,86 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
             # self.assertEqual(node2_spec.limits , {"cpu": "100m"})
             # self.assertEqual(node2_spec.requests , {"cpu": "100m"})
 
+    def test_should_add_separate_requests_and_limits(self):
+        # given
+        self.create_generator(
+            config={
+                "resources": {
+                    "__default__": {"cpu": "500m", "memory": "1Gi", "limit_ratio": {"cpu": 4}},
+                    "node1": {"requests": {"cpu": "1"}, "limits": {"memory": "2Gi"}},
+                    "node2": {"cpu": "250m"},
+                }
+            }
+        )
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "Always")
+            with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                pipeline()
+
+            # then
+            node1_spec = dsl_pipeline.ops["node1"].container.resources
+            self.assertDictEqual(node1_spec.requests, {"cpu": "1", "memory": "1Gi"})
+            self.assertDictEqual(node1_spec.limits, {"cpu": "4", "memory": "2Gi"})
+            node2_spec = dsl_pipeline.ops["node2"].container.resources
+            self.assertDictEqual(node2_spec.requests, {"cpu": "250m", "memory": "1Gi"})
+            self.assertDictEqual(node2_spec.limits, {"cpu": "250m", "memory": "1Gi"})
+            node3_spec = dsl_pipeline.ops["node3"].container.resources
+            self.assertDictEqual(node3_spec.limits, {"cpu": "2000m", "memory": "1Gi"})
+
+    def test_should_group_tagged_nodes_and_apply_group_settings(self):
+        # given
+        self.create_generator(
+            config={
+                "node_grouping": {"training_group": ["training"]},
+                "resources": {
+                    "__default__": {"cpu": "100m"},
+                    "training_group": {"cpu": "4", "nvidia.com/gpu": "1"},
+                },
+                "tolerations": {
+                    "training_group": [
+                        {
+                            "key": "gpu",
+                            "operator": "Equal",
+                            "value": "true",
+                            "effect": "NoSchedule",
+                        }
+                    ]
+                },
+            }
+        )
+        self.pipelines_under_test["pipeline"] = Pipeline(
+            [
+                node(identity, "A", "B", name="node1"),
+                node(identity, "B", "C", name="node2", tags=["training"]),
+                node(identity, "B", "D", name="node3", tags=["training"]),
+            ]
+        )
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "Always")
+            with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                pipeline()
+
+            # then
+            assert set(dsl_pipeline.ops.keys()) == {"node1", "training-group"}
+            training_op = dsl_pipeline.ops["training-group"]
+            args = training_op.container.args
+            assert args[args.index("--nodes") + 1] == "node2,node3"
+            assert training_op.dependent_names == ["node1"]
+            self.assertDictEqual(training_op.container.resources.limits, {"cpu": "4", "nvidia.com/gpu": "1"})
+            assert [t.key for t in training_op.tolerations] == ["gpu"]
+            self.assertDictEqual(dsl_pipeline.ops["node1"].container.resources.limits, {"cpu": "100m"})
+            assert dsl_pipeline.ops["node1"].tolerations == []
+
     def test_can_add_extra_volumes(self):
         self.create_generator(
             config={
@@ -432,6 +677,195 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
             volume_mounts = dsl_pipeline.ops["node1"].container.volume_mounts
             self.assertEqual(len(volume_mounts), 1)
 
+    def test_should_fail_if_memory_dataset_is_passed_between_pods(self):
+        for testname, catalog in [
+            ("undeclared dataset", {}),
+            ("memory dataset", {"B": {"type": "MemoryDataset"}}),
+            ("memory dataset from factory", {"{name}": {"type": "kedro.io.MemoryDataset"}}),
+        ]:
+            with self.subTest(msg=testname):
+                # given
+                self.create_generator(catalog=catalog)
+
+                # when
+                with patch(
+                    "kedro.framework.project.pipelines",
+                    new=self.pipelines_under_test,
+                ), self.assertRaises(ValueError) as raises:
+                    pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "Always")
+                    with kfp.dsl.Pipeline(None):
+                        pipeline()
+
+                # then
+                assert str(raises.exception).endswith("to persist them: B")
+
+    def test_should_persist_memory_datasets_passed_between_pods(self):
+        for testname, config, expected_path in [
+            ("on volume", {"volume": {}}, "data/kubeflow-intermediate/{{workflow.uid}}"),
+            (
+                "under prefix",
+                {"intermediate_data_prefix": "gs://bucket/intermediate/"},
+                "gs://bucket/intermediate/{{workflow.uid}}",
+            ),
+        ]:
+            with self.subTest(msg=testname):
+                # given
+                self.create_generator(config=config, catalog={})
+
+                # when
+                with patch(
+                    "kedro.framework.project.pipelines",
+                    new=self.pipelines_under_test,
+                ):
+                    pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "Always")
+                    with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                        pipeline()
+
+                # then
+                for op_name in ["node1", "node2", "node3"]:
+                    env = {e.name: e.value for e in dsl_pipeline.ops[op_name].container.env}
+                    assert env["KEDRO_KUBEFLOW_INTERMEDIATE_DATASETS"] == "B"
+                    assert env["KEDRO_KUBEFLOW_INTERMEDIATE_DATA_PATH"] == expected_path
+
+    def test_should_generate_first_stage_of_pipeline_split_into_stages(self):
+        # given
+        self.create_generator(config={"volume": {}, "stages": {"max_steps": 2}}, catalog={}, params={"param1": 0.3})
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "Always")
+            with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                pipeline()
+
+            # then
+            assert {"node1", "node2", "data-volume-create", "data-volume-init"} <= dsl_pipeline.ops.keys()
+            assert "node3" not in dsl_pipeline.ops
+            args = dsl_pipeline.ops["on-exit"].container.args
+            assert args[args.index("run-next-stage") :] == [
+                "run-next-stage",
+                "--pipeline",
+                "pipeline",
+                "--stage",
+                "1",
+                "--image",
+                "unittest-image",
+                "--image-pull-policy",
+                "Always",
+                "--run-id",
+                "{{workflow.uid}}",
+                "--volume",
+                "{{workflow.name}}-pipeline-data-volume",
+                "--status",
+                "{{workflow.status}}",
+                "--failures",
+                "{{workflow.failures}}",
+                "--",
+                "param1",
+                "{{pipelineparam:op=;name=param1}}",
+            ]
+
+    def test_should_generate_next_stage_of_pipeline_split_into_stages(self):
+        # given
+        self.create_generator(config={"volume": {}, "stages": {"max_steps": 2}}, catalog={})
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline(
+                "pipeline", "unittest-image", "Always", stage=1, run_id="first-run-id", volume_name="first-volume"
+            )
+            with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                pipeline()
+
+            # then
+            assert "data-volume-create" not in dsl_pipeline.ops
+            assert "node1" not in dsl_pipeline.ops
+            node3 = dsl_pipeline.ops["node3"]
+            assert node3.pvolumes["/home/kedro/data"].persistent_volume_claim.claim_name == "first-volume"
+            env = {e.name: e.value for e in node3.container.env}
+            assert env["KEDRO_KUBEFLOW_INTERMEDIATE_DATA_PATH"] == "data/kubeflow-intermediate/first-run-id"
+            assert (
+                dsl_pipeline.ops["on-exit"]
+                .container.command[-1]
+                .endswith("kedro kubeflow delete-pipeline-volume first-volume")
+            )
+
+    def test_should_log_next_stages_to_mlflow_run_of_first_stage(self):
+        # given
+        self.mock_mlflow(True)
+        self.create_generator(config={"volume": {}, "stages": {"max_steps": 1}}, catalog={})
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline(
+                "pipeline",
+                "unittest-image",
+                "Always",
+                stage=1,
+                run_id="first-run-id",
+                volume_name="first-volume",
+                mlflow_run_id="mlflow-run",
+            )
+            with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                pipeline()
+
+            # then
+            assert "mlflow-start-run" not in dsl_pipeline.ops
+            env = {e.name: e.value for e in dsl_pipeline.ops["node2"].container.env}
+            assert env["MLFLOW_RUN_ID"] == "mlflow-run"
+            args = dsl_pipeline.ops["on-exit"].container.args
+            assert args[args.index("--mlflow-run-id") + 1] == "mlflow-run"
+
+    def test_should_split_pipeline_into_stages_fitting_size_budget(self):
+        for budget, expected_stages in [("1Mi", 1), ("1", 3)]:
+            with self.subTest(budget=budget):
+                # given
+                self.create_generator(config={"stages": {}, "workflow_size": {"budget": budget}})
+
+                # when
+                with patch(
+                    "kedro.framework.project.pipelines",
+                    new=self.pipelines_under_test,
+                ):
+                    pipeline = self.generator_under_test.generate_pipeline(
+                        "pipeline", "unittest-image", "Always", stage=expected_stages - 1
+                    )
+                    with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                        pipeline()
+                    missing_stage = self.generator_under_test.generate_pipeline(
+                        "pipeline", "unittest-image", "Always", stage=expected_stages
+                    )
+                    with kfp.dsl.Pipeline(None), self.assertRaises(ValueError) as raises:
+                        missing_stage()
+
+                # then
+                assert len({"node1", "node2", "node3"} & dsl_pipeline.ops.keys()) == 4 - expected_stages
+                assert f"Pipeline pipeline has {expected_stages} stages" in str(raises.exception)
+
+    def test_should_raise_error_if_stage_does_not_exist(self):
+        # given
+        self.create_generator(config={"stages": {"max_steps": 2}})
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "Always", stage=2)
+            with kfp.dsl.Pipeline(None), self.assertRaises(ValueError) as raises:
+                pipeline()
+
+        # then
+        assert "Pipeline pipeline has 2 stages, there is no stage 3" in str(raises.exception)
+
     def test_should_not_add_retry_policy_if_not_requested(self):
         # given
         self.create_generator(config={})
@@ -552,6 +986,30 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
             outputs2 = dsl_pipeline.ops["node2"].file_outputs
             self.assertEqual(len(outputs2), 0)  # output "C" is missing in the catalog)
 
+    def test_artifact_registration_with_dataset_factories(self):
+        # given
+        self.create_generator(
+            catalog={
+                "{name}": {
+                    "type": "pandas.CSVDataSet",
+                    "filepath": "data/02_intermediate/{name}.csv",
+                }
+            }
+        )
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "Always")
+            with kfp.dsl.Pipeline(None) as dsl_pipeline:
+                pipeline()
+
+            # then
+            assert dsl_pipeline.ops["node1"].file_outputs == {"B": "/home/kedro/data/02_intermediate/B.csv"}
+            assert dsl_pipeline.ops["node2"].file_outputs == {"C": "/home/kedro/data/02_intermediate/C.csv"}
+
     def test_should_skip_artifact_registration_if_requested(self):
         # given
         self.create_generator(
@@ -593,6 +1051,43 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
             # then
             assert "schedule-volume-termination" not in dsl_pipeline.ops
 
+    def test_should_compute_stable_fingerprint(self):
+        # given
+        self.create_generator(params={"param1": 0.3}, catalog={"B": {"type": "pickle.PickleDataset", "filepath": "b"}})
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            fingerprint = self.generator_under_test.fingerprint("pipeline", "unittest-image", "Always")
+
+            # then
+            assert fingerprint == self.generator_under_test.fingerprint("pipeline", "unittest-image", "Always")
+            assert fingerprint != self.generator_under_test.fingerprint("pipeline", "other-image", "Always")
+            self.pipelines_under_test["pipeline"] = self.pipelines_under_test["pipeline"] + Pipeline(
+                [node(identity, "D", "E", name="node4")]
+            )
+            assert fingerprint != self.generator_under_test.fingerprint("pipeline", "unittest-image", "Always")
+
+    def test_should_change_fingerprint_with_on_exit_pipeline(self):
+        # given
+        self.create_generator(config={"on_exit_pipeline": "notify_via_slack"}, params={"param1": 0.3, "channel": "#ml"})
+        self.pipelines_under_test["notify_via_slack"] = Pipeline([node(identity, "A", None, name="notify")])
+
+        # when
+        with patch(
+            "kedro.framework.project.pipelines",
+            new=self.pipelines_under_test,
+        ):
+            fingerprint = self.generator_under_test.fingerprint("pipeline", "unittest-image", "Always")
+
+            # then
+            self.pipelines_under_test["notify_via_slack"] = Pipeline(
+                [node(identity, "params:channel", None, name="notify")]
+            )
+            assert fingerprint != self.generator_under_test.fingerprint("pipeline", "unittest-image", "Always")
+
     def test_should_pass_kedro_config_env_to_nodes(self):
         # given
         self.create_generator()
@@ -619,10 +1114,13 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
             del os.environ["KEDRO_CONFIG_MY_KEY"]
             del os.environ["SOME_VALUE"]
 
-    def create_generator(self, config=None, params=None, catalog=None):
+    def create_generator(self, config=None, params=None, catalog=None, project_path="."):
         project_name = "my-awesome-project"
+        if catalog is None:
+            # B is passed between pods, so it cannot be a memory dataset
+            catalog = {"B": {"type": "pandas.CSVDataSet", "filepath": "gs://unittest-bucket/b.csv"}}
         config_loader = MagicMock()
-        config_loader.get.return_value = catalog or {}
+        config_loader.get.return_value = catalog
         context = type(
             "obj",
             (object,),
@@ -630,6 +1128,7 @@ class TestGenerator(unittest.TestCase, MinimalConfigMixin):
                 "env": "unittests",
                 "params": params or {},
                 "config_loader": config_loader,
+                "project_path": Path(project_path),
             },
         )
         self.pipelines_under_test = {
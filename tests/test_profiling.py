@@ -0,0 +1,86 @@
+import json
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from kedro_kubeflow.profiling import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = Profiler()
+
+    def tearDown(self):
+        self.profiler.stop()
+
+    def test_should_not_record_phases_when_disabled(self):
+        with self.profiler.phase("phase"):
+            pass
+
+        assert self.profiler.phases == []
+
+    def test_should_record_nested_phases(self):
+        # given
+        self.profiler.start()
+
+        # when
+        with self.profiler.phase("outer"):
+            with self.profiler.phase("inner"):
+                allocated = bytearray(4 * 2**20)
+            del allocated
+
+        # then
+        phases = {phase["name"]: phase for phase in self.profiler.report()["phases"]}
+        assert phases["outer"]["depth"] == 0
+        assert phases["inner"]["depth"] == 1
+        assert phases["outer"]["wall_time_s"] >= phases["inner"]["wall_time_s"]
+        assert phases["inner"]["peak_memory_bytes"] >= 4 * 2**20
+        assert phases["outer"]["peak_memory_bytes"] >= phases["inner"]["peak_memory_bytes"]
+
+    def test_should_record_phase_interrupted_by_exception(self):
+        self.profiler.start()
+
+        with self.assertRaises(ValueError):
+            with self.profiler.phase("failing"):
+                raise ValueError("error")
+
+        assert [phase["name"] for phase in self.profiler.report()["phases"]] == ["failing"]
+
+    def test_should_write_speedscope_profile(self):
+        # given
+        self.profiler.start()
+        with self.profiler.phase("outer"):
+            with self.profiler.phase("inner"):
+                pass
+
+        with TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "profile.speedscope.json")
+
+            # when
+            self.profiler.write(output)
+
+            # then
+            with open(output) as f:
+                profile = json.load(f)
+        assert profile["shared"]["frames"] == [{"name": "outer"}, {"name": "inner"}]
+        (thread_profile,) = profile["profiles"]
+        assert [(e["type"], e["frame"]) for e in thread_profile["events"]] == [
+            ("O", 0),
+            ("O", 1),
+            ("C", 1),
+            ("C", 0),
+        ]
+
+    def test_should_write_json_report(self):
+        self.profiler.start()
+        with self.profiler.phase("phase"):
+            pass
+
+        with TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "profile.json")
+            self.profiler.write(output)
+            with open(output) as f:
+                report = json.load(f)
+
+        assert [phase["name"] for phase in report["phases"]] == ["phase"]
+        assert report["total_wall_time_s"] >= report["phases"][0]["wall_time_s"]
@@ -0,0 +1,38 @@
+import unittest
+from decimal import Decimal
+
+from kedro_kubeflow.quantities import (
+    format_cpu,
+    format_memory,
+    parse_quantity,
+    scale_quantity,
+)
+
+
+class TestQuantities(unittest.TestCase):
+    def test_should_parse_quantities(self):
+        assert parse_quantity("500m") == Decimal("0.5")
+        assert parse_quantity("2") == 2
+        assert parse_quantity(1.5) == Decimal("1.5")
+        assert parse_quantity("1.5Gi") == Decimal(3 * 2**29)
+        assert parse_quantity("128M") == 128 * 10**6
+        assert parse_quantity("1e3") == 1000
+
+    def test_should_reject_invalid_quantities(self):
+        for value in ["", "1GB", "one", "1.2.3Mi"]:
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_quantity(value)
+
+    def test_should_format_rounded_up_quantities(self):
+        assert format_cpu(Decimal("0.21")) == "250m"
+        assert format_cpu(Decimal("1.98")) == "2"
+        assert format_cpu(Decimal("0")) == "50m"
+        assert format_memory(Decimal(600 * 2**20)) == "640Mi"
+        assert format_memory(Decimal(2**31 - 1)) == "2Gi"
+
+    def test_should_scale_quantities_keeping_units(self):
+        assert scale_quantity("500m", 4) == "2000m"
+        assert scale_quantity("1Gi", 1.5) == "1.5Gi"
+        assert scale_quantity(2, 2.5) == "5"
+        with self.assertRaises(ValueError):
+            scale_quantity("2 cores", 2)
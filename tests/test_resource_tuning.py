@@ -0,0 +1,117 @@
+import json
+import os
+import unittest
+from decimal import Decimal
+from tempfile import TemporaryDirectory
+
+import yaml
+
+from kedro_kubeflow.resource_tuning import (
+    load_usage,
+    recommend_resources,
+    workflow_pod_names,
+    write_overlay,
+)
+
+WORKFLOW = {
+    "metadata": {"name": "pipeline-abcde"},
+    "status": {
+        "nodes": {
+            "pipeline-abcde": {"type": "DAG", "displayName": "pipeline-abcde", "templateName": "pipeline"},
+            "pipeline-abcde-1111": {"type": "Pod", "displayName": "node1", "templateName": "node1"},
+            "pipeline-abcde-2222": {"type": "Pod", "displayName": "node2", "templateName": "node2"},
+        }
+    },
+}
+
+
+class TestResourceTuning(unittest.TestCase):
+    def setUp(self):
+        self._tmp = TemporaryDirectory()
+        self.tmp = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmp, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_should_map_pod_names_to_steps(self):
+        assert workflow_pod_names(WORKFLOW) == {
+            "pipeline-abcde-1111": "node1",
+            "pipeline-abcde-node1-1111": "node1",
+            "pipeline-abcde-2222": "node2",
+            "pipeline-abcde-node2-2222": "node2",
+        }
+
+    def test_should_map_pods_of_retried_steps(self):
+        # given
+        workflow = {
+            "metadata": {"name": "pipeline-abcde"},
+            "status": {
+                "nodes": {
+                    "pipeline-abcde-1111": {"type": "Retry", "displayName": "node1", "templateName": "node1"},
+                    "pipeline-abcde-3333": {"type": "Pod", "displayName": "node1(0)", "templateName": "node1"},
+                    "pipeline-abcde-4444": {"type": "Pod", "displayName": "node1(1)", "templateName": "node1"},
+                }
+            },
+        }
+
+        # when
+        pods = workflow_pod_names(workflow)
+
+        # then
+        assert pods == {
+            "pipeline-abcde-3333": "node1",
+            "pipeline-abcde-node1-3333": "node1",
+            "pipeline-abcde-4444": "node1",
+            "pipeline-abcde-node1-4444": "node1",
+        }
+
+    def test_should_load_usage_of_steps_and_pods(self):
+        # given
+        workflow = self._write("workflow.json", json.dumps(WORKFLOW))
+        metrics = self._write(
+            "metrics.csv",
+            "pod,cpu,memory\npipeline-abcde-1111,0.5,1Gi\npipeline-abcde-node2-2222,250m,104857600\nunknown,1,1\n",
+        )
+        steps = self._write("steps.json", json.dumps([{"step": "node1", "cpu": "1", "memory": "512Mi"}]))
+
+        # when
+        usage = load_usage([metrics, steps], [workflow])
+
+        # then
+        assert usage == {
+            "node1": [(Decimal("0.5"), 2**30), (1, 2**29)],
+            "node2": [(Decimal("0.25"), 100 * 2**20)],
+        }
+
+    def test_should_recommend_resources(self):
+        # given
+        usage = {
+            "node1": [(Decimal(cpu) / 10, 2**30) for cpu in range(1, 11)] + [(Decimal(4), 2**29)],
+            "node2": [(Decimal("0.1"), 100 * 2**20)],
+        }
+
+        # when
+        resources = recommend_resources(usage, cpu_percentile=90, cpu_margin=1.2, memory_margin=1.3)
+
+        # then
+        assert resources == {
+            "node1": {"cpu": "1200m", "memory": "1344Mi"},
+            "node2": {"cpu": "150m", "memory": "192Mi"},
+        }
+
+    def test_should_write_config_overlay(self):
+        # given
+        path = os.path.join(self.tmp, "kubeflow-tuned-resources.yml")
+
+        # when
+        write_overlay(path, {"node1": {"cpu": "250m", "memory": "640Mi"}})
+
+        # then
+        with open(path) as f:
+            assert yaml.safe_load(f) == {"tuned_resources": {"node1": {"cpu": "250m", "memory": "640Mi"}}}
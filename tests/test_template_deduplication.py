@@ -0,0 +1,182 @@
+import unittest
+from decimal import Decimal
+from tempfile import TemporaryDirectory
+from unittest.mock import MagicMock, patch
+
+import yaml
+from kedro.pipeline import Pipeline, node
+from kfp.compiler import Compiler
+
+from kedro_kubeflow.config import PluginConfig
+from kedro_kubeflow.generators.pod_per_node_pipeline_generator import (
+    PodPerNodePipelineGenerator,
+)
+from kedro_kubeflow.generators.template_deduplication import (
+    DeduplicatingCompiler,
+    deduplicate_templates,
+)
+from kedro_kubeflow.kfpclient import resource_totals
+from kedro_kubeflow.workflow_size import serialized_size
+from tests.common import MinimalConfigMixin
+
+
+def identity(input1: str):
+    return input1  # pragma: no cover
+
+
+def node_template(name, env=None):
+    return {
+        "name": name,
+        "container": {
+            "args": ["kubeflow", "run-node", "--pipeline", "pipeline", "--nodes", name, "--"],
+            "env": env or [],
+            "image": "img",
+        },
+    }
+
+
+class TestTemplateDeduplication(unittest.TestCase, MinimalConfigMixin):
+    def test_should_share_template_between_steps_with_same_spec(self):
+        # given
+        self.create_generator(
+            config={
+                "store_kedro_outputs_as_kfp_artifacts": False,
+                "resources": {"node4": {"cpu": "2"}},
+            }
+        )
+
+        # when
+        workflow = self.compile()
+
+        # then
+        templates = {template["name"]: template for template in workflow["spec"]["templates"]}
+        assert not {"node1", "node2", "node3"} & templates.keys()
+        assert "node4" in templates
+        tasks = {task["name"]: task for task in templates["my-awesome-project"]["dag"]["tasks"]}
+        shared = tasks["node1"]["template"]
+        assert shared.startswith("run-nodes-")
+        assert tasks["node2"]["template"] == tasks["node3"]["template"] == shared
+        assert tasks["node4"]["template"] == "node4"
+        assert {"name": "kedro-nodes", "value": "node2"} in tasks["node2"]["arguments"]["parameters"]
+        assert "{{inputs.parameters.kedro-nodes}}" in templates[shared]["container"]["args"]
+        assert {"name": "kedro-nodes"} in templates[shared]["inputs"]["parameters"]
+
+    def test_should_keep_templates_of_steps_with_different_artifacts(self):
+        # given
+        self.create_generator()
+
+        # when
+        workflow = self.compile()
+
+        # then
+        names = {template["name"] for template in workflow["spec"]["templates"]}
+        # node1 and node2 register B and C as artifacts
+        assert {"node1", "node2"} <= names
+        assert len([name for name in names if name.startswith("run-nodes-")]) == 1
+        assert not {"node3", "node4"} & names
+
+    def test_should_pass_step_environment_as_parameters(self):
+        # given
+        workflow = {
+            "spec": {
+                "templates": [
+                    node_template("node1", [{"name": "KEDRO_KUBEFLOW_IN_MEMORY_DATASETS", "value": "A"}]),
+                    node_template("node2", [{"name": "KEDRO_KUBEFLOW_IN_MEMORY_DATASETS", "value": "B,C"}]),
+                    node_template("node3"),
+                    {
+                        "name": "pipeline",
+                        "dag": {"tasks": [{"name": f"node{i}", "template": f"node{i}"} for i in range(1, 4)]},
+                    },
+                ]
+            }
+        }
+
+        # when
+        removed = deduplicate_templates(workflow)
+
+        # then
+        assert removed == 1
+        templates = {template["name"]: template for template in workflow["spec"]["templates"]}
+        assert set(templates) == {"node3", "pipeline", workflow["spec"]["templates"][-1]["name"]}
+        tasks = templates["pipeline"]["dag"]["tasks"]
+        assert tasks[1]["arguments"]["parameters"] == [
+            {"name": "kedro-nodes", "value": "node2"},
+            {"name": "kedro-in-memory-datasets", "value": "B,C"},
+        ]
+        shared = templates[tasks[0]["template"]]
+        assert shared["container"]["env"] == [
+            {"name": "KEDRO_KUBEFLOW_IN_MEMORY_DATASETS", "value": "{{inputs.parameters.kedro-in-memory-datasets}}"}
+        ]
+
+    @patch("kedro_kubeflow.generators.pod_per_node_pipeline_generator.is_mlflow_enabled", return_value=True)
+    def test_should_count_resources_of_each_step_sharing_template(self, _):
+        # given
+        self.create_generator(
+            config={
+                "store_kedro_outputs_as_kfp_artifacts": False,
+                "resources": {"__default__": {"cpu": "500m", "memory": "1Gi"}},
+            }
+        )
+
+        # when
+        totals = resource_totals(self.compile())
+
+        # then
+        # 4 nodes sharing one template and the MLflow step
+        assert totals["cpu"]["requests"] == Decimal("2.5")
+        assert totals["memory"]["requests"] == 5 * 2**30
+        assert totals["cpu"]["largest_request"] == Decimal("0.5")
+
+    def test_should_measure_stages_with_shared_templates(self):
+        # given
+        config = {"store_kedro_outputs_as_kfp_artifacts": False}
+        self.create_generator(config=config)
+        budget = serialized_size(self.compile())
+
+        for compiler_class, expected_stages in [(DeduplicatingCompiler, 1), (Compiler, 2)]:
+            with self.subTest(compiler=compiler_class.__name__):
+                self.create_generator(
+                    config={**config, "stages": {}, "workflow_size": {"budget": str(budget)}},
+                    compiler_class=compiler_class,
+                )
+
+                # when
+                with patch("kedro.framework.project.pipelines", new=self.pipelines_under_test):
+                    step_sizes = self.generator_under_test._measure_steps("pipeline", "unittest-image", "Always")
+                    stages = self.generator_under_test._split_into_stages(
+                        {"node1": set(), "node2": {"node1"}, "node3": {"node2"}, "node4": {"node2"}}, step_sizes
+                    )
+
+                # then
+                assert len(stages) == expected_stages
+
+    def compile(self):
+        with patch("kedro.framework.project.pipelines", new=self.pipelines_under_test), TemporaryDirectory() as tmp:
+            pipeline = self.generator_under_test.generate_pipeline("pipeline", "unittest-image", "Always")
+            DeduplicatingCompiler().compile(pipeline, f"{tmp}/pipeline.yaml")
+            with open(f"{tmp}/pipeline.yaml") as f:
+                return yaml.safe_load(f)
+
+    def create_generator(self, config=None, compiler_class=DeduplicatingCompiler):
+        config_loader = MagicMock()
+        config_loader.get.return_value = {
+            "B": {"type": "pandas.CSVDataSet", "filepath": "data/02_intermediate/b.csv"},
+            "C": {"type": "pandas.CSVDataSet", "filepath": "data/02_intermediate/c.csv"},
+        }
+        context = type("obj", (object,), {"env": "unittests", "params": {}, "config_loader": config_loader})
+        self.pipelines_under_test = {
+            "pipeline": Pipeline(
+                [
+                    node(identity, "A", "B", name="node1"),
+                    node(identity, "B", "C", name="node2"),
+                    node(identity, "C", "D", name="node3"),
+                    node(identity, "C", "E", name="node4"),
+                ]
+            )
+        }
+        self.generator_under_test = PodPerNodePipelineGenerator(
+            PluginConfig(**self.minimal_config({"host": "http://unittest", "run_config": config or {}})),
+            "my-awesome-project",
+            context,
+            compiler_class,
+        )
@@ -0,0 +1,154 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from kubernetes.client import V1ObjectMeta, V1PersistentVolumeClaim
+from kubernetes.client.rest import ApiException
+
+from kedro_kubeflow.volume_claims import (
+    LOCK_ANNOTATION,
+    acquire_claim,
+    claim_spec,
+    release_claims,
+)
+
+
+def pvc(name, locked_by=None):
+    return V1PersistentVolumeClaim(
+        metadata=V1ObjectMeta(
+            name=name,
+            annotations={LOCK_ANNOTATION: locked_by} if locked_by else None,
+            resource_version="42",
+        )
+    )
+
+
+class TestVolumeClaims(unittest.TestCase):
+    def setUp(self):
+        self.claims = {}
+        self.core_api = MagicMock()
+
+        def read(name, namespace):
+            if name not in self.claims:
+                raise ApiException(status=404)
+            return self.claims[name]
+
+        self.core_api.read_namespaced_persistent_volume_claim.side_effect = read
+        self.spec = claim_spec("1Gi", ["ReadWriteOnce"], None)
+
+    def test_should_lock_first_free_claim(self):
+        # given
+        self.claims = {"data-0": pvc("data-0", locked_by="other-run"), "data-1": pvc("data-1")}
+
+        # when
+        claim = acquire_claim(self.core_api, "ns", ["data-0", "data-1"], "run", self.spec, timeout=0)
+
+        # then
+        assert claim == "data-1"
+        self.core_api.patch_namespaced_persistent_volume_claim.assert_called_once_with(
+            "data-1", "ns", {"metadata": {"annotations": {LOCK_ANNOTATION: "run"}, "resourceVersion": "42"}}
+        )
+
+    def test_should_create_missing_claim_locked(self):
+        # when
+        claim = acquire_claim(self.core_api, "ns", ["data-0"], "run", self.spec, timeout=0)
+
+        # then
+        assert claim == "data-0"
+        namespace, body = self.core_api.create_namespaced_persistent_volume_claim.call_args[0]
+        assert namespace == "ns"
+        assert body.metadata.annotations == {LOCK_ANNOTATION: "run"}
+        assert body.spec.resources.requests == {"storage": "1Gi"}
+
+    def test_should_keep_lock_of_the_same_run(self):
+        # given
+        self.claims = {"data-0": pvc("data-0", locked_by="run")}
+
+        # when
+        claim = acquire_claim(self.core_api, "ns", ["data-0"], "run", self.spec, timeout=0)
+
+        # then
+        assert claim == "data-0"
+        self.core_api.patch_namespaced_persistent_volume_claim.assert_not_called()
+
+    def test_should_skip_claim_locked_concurrently(self):
+        # given
+        self.claims = {"data-0": pvc("data-0"), "data-1": pvc("data-1")}
+        self.core_api.patch_namespaced_persistent_volume_claim.side_effect = [ApiException(status=409), None]
+
+        # when
+        claim = acquire_claim(self.core_api, "ns", ["data-0", "data-1"], "run", self.spec, timeout=0)
+
+        # then
+        assert claim == "data-1"
+
+    @patch("kedro_kubeflow.volume_claims.time.sleep")
+    def test_should_wait_for_released_claim(self, sleep):
+        # given
+        self.claims = {"data-0": pvc("data-0", locked_by="other-run")}
+        sleep.side_effect = lambda _: self.claims.update({"data-0": pvc("data-0")})
+
+        # when
+        claim = acquire_claim(self.core_api, "ns", ["data-0"], "run", self.spec, timeout=60)
+
+        # then
+        assert claim == "data-0"
+        sleep.assert_called_once()
+
+    def test_should_fail_if_no_claim_is_released_in_time(self):
+        # given
+        self.claims = {"data-0": pvc("data-0", locked_by="other-run")}
+
+        # when
+        with self.assertRaises(TimeoutError):
+            acquire_claim(self.core_api, "ns", ["data-0"], "run", self.spec, timeout=0)
+
+    def test_should_break_lock_of_finished_or_deleted_workflow(self):
+        workflows = {"running-run": {"status": {"phase": "Running"}}, "failed-run": {"status": {"phase": "Failed"}}}
+
+        def get_workflow(group, version, namespace, plural, name):
+            if name not in workflows:
+                raise ApiException(status=404)
+            return workflows[name]
+
+        workflows_api = MagicMock()
+        workflows_api.get_namespaced_custom_object.side_effect = get_workflow
+        for locked_by, expected_claim in [("failed-run", "data-1"), ("deleted-run", "data-1"), ("running-run", None)]:
+            with self.subTest(locked_by=locked_by):
+                # given
+                self.claims = {"data-0": pvc("data-0", locked_by="other-run"), "data-1": pvc("data-1", locked_by)}
+                workflows["other-run"] = {"status": {"phase": "Running"}}
+                self.core_api.patch_namespaced_persistent_volume_claim.reset_mock()
+
+                # when
+                try:
+                    claim = acquire_claim(
+                        self.core_api,
+                        "ns",
+                        ["data-0", "data-1"],
+                        "run",
+                        self.spec,
+                        timeout=0,
+                        workflows_api=workflows_api,
+                    )
+                except TimeoutError:
+                    claim = None
+
+                # then
+                assert claim == expected_claim
+                if expected_claim:
+                    self.core_api.patch_namespaced_persistent_volume_claim.assert_called_once_with(
+                        "data-1", "ns", {"metadata": {"annotations": {LOCK_ANNOTATION: "run"}, "resourceVersion": "42"}}
+                    )
+
+    def test_should_release_only_own_lock(self):
+        # given
+        self.claims = {"data-0": pvc("data-0", locked_by="other-run"), "data-1": pvc("data-1", locked_by="run")}
+
+        # when
+        claim = release_claims(self.core_api, "ns", ["missing", "data-0", "data-1"], "run")
+
+        # then
+        assert claim == "data-1"
+        self.core_api.patch_namespaced_persistent_volume_claim.assert_called_once_with(
+            "data-1", "ns", {"metadata": {"annotations": {LOCK_ANNOTATION: None}}}
+        )
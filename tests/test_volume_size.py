@@ -0,0 +1,101 @@
+import json
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from kedro_kubeflow.generators.catalog_index import CatalogIndex
+from kedro_kubeflow.generators.volume_size import (
+    estimate_volume_size,
+    load_size_history,
+    measure_datasets,
+    path_size,
+    record_size_history,
+)
+
+CATALOG = {
+    "raw": {"type": "pandas.CSVDataset", "filepath": "data/01_raw/raw.csv"},
+    "partitions": {"type": "partitions.PartitionedDataset", "path": "data/02_intermediate/partitions"},
+    "model": {"type": "pickle.PickleDataset", "filepath": "data/06_models/model.pkl"},
+    "remote": {"type": "pandas.CSVDataset", "filepath": "gs://bucket/remote.csv"},
+    "outside": {"type": "pandas.CSVDataset", "filepath": "conf/outside.csv"},
+}
+
+
+class TestVolumeSize(unittest.TestCase):
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        Path("data/01_raw").mkdir(parents=True)
+        Path("data/01_raw/raw.csv").write_bytes(b"x" * 100)
+        Path("data/02_intermediate/partitions/nested").mkdir(parents=True)
+        Path("data/02_intermediate/partitions/a.csv").write_bytes(b"x" * 10)
+        Path("data/02_intermediate/partitions/nested/b.csv").write_bytes(b"x" * 20)
+        Path("conf").mkdir()
+        Path("conf/outside.csv").write_bytes(b"x" * 1000)
+        self.catalog_index = CatalogIndex(CATALOG)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_should_measure_files_and_directories(self):
+        assert path_size("data/02_intermediate/partitions") == 30
+        assert path_size("data/missing.csv") == 0
+
+    def test_should_measure_only_existing_files_on_the_volume(self):
+        # when
+        sizes = measure_datasets(self.catalog_index, CATALOG.keys())
+
+        # then
+        assert sizes == {"raw": 100, "partitions": 30}
+
+    def test_should_merge_history_keeping_largest_sizes(self):
+        # given
+        record_size_history("history/sizes.json", {"raw": 200, "model": 5})
+
+        # when
+        record_size_history("history/sizes.json", {"raw": 100, "partitions": 30})
+
+        # then
+        assert load_size_history("history/sizes.json") == {"model": 5, "partitions": 30, "raw": 200}
+        assert load_size_history("missing.json") == {}
+        assert load_size_history(None) == {}
+
+    def test_should_estimate_size_from_local_files_and_history(self):
+        # given
+        history = {"model": 3 * 2**30, "raw": 50, "remote": 100 * 2**30, "intermediate": 2**30}
+
+        # when
+        size = estimate_volume_size(
+            self.catalog_index, ["raw", "partitions", "model", "remote", "intermediate"], history, 1.5
+        )
+
+        # then
+        assert size == "7Gi"
+
+    def test_should_estimate_size_with_whole_data_directory(self):
+        # given
+        with open("data/other.bin", "w") as f:
+            f.truncate(2**30)
+        history = {"raw": 2**30 + 100, "model": 2**30}
+
+        # when
+        with_data_directory = estimate_volume_size(self.catalog_index, ["raw", "model"], history, 1.0, "", True)
+        without_data_directory = estimate_volume_size(self.catalog_index, ["raw", "model"], history, 1.0)
+
+        # then
+        assert with_data_directory == "4Gi"
+        assert without_data_directory == "3Gi"
+
+    def test_should_estimate_at_least_minimal_size(self):
+        assert estimate_volume_size(self.catalog_index, ["raw"], {}, 1.5) == "1Gi"
+
+    def test_should_write_history_as_json(self):
+        # when
+        record_size_history("sizes.json", {"raw": 100})
+
+        # then
+        with open("sizes.json") as f:
+            assert json.load(f) == {"raw": 100}
@@ -0,0 +1,82 @@
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from kedro_kubeflow.volume_sync import remove_paths, sync_paths
+
+
+class TestVolumeSync(unittest.TestCase):
+    def setUp(self):
+        self._source = TemporaryDirectory()
+        self._target = TemporaryDirectory()
+        self.source = Path(self._source.name)
+        self.target = Path(self._target.name)
+        (self.source / "01_raw" / "nested").mkdir(parents=True)
+        (self.source / "01_raw" / "a.csv").write_text("a")
+        (self.source / "01_raw" / "nested" / "b.csv").write_text("b")
+        (self.source / "model.pkl").write_text("model")
+
+    def tearDown(self):
+        self._source.cleanup()
+        self._target.cleanup()
+
+    def test_should_copy_only_given_paths(self):
+        # when
+        copied, skipped = sync_paths(str(self.source), str(self.target), ["01_raw/"])
+
+        # then
+        assert (copied, skipped) == (2, 0)
+        assert (self.target / "01_raw" / "a.csv").read_text() == "a"
+        assert (self.target / "01_raw" / "nested" / "b.csv").read_text() == "b"
+        assert not (self.target / "model.pkl").exists()
+
+    def test_should_copy_whole_source_directory(self):
+        # when
+        copied, skipped = sync_paths(str(self.source), str(self.target), ["."])
+
+        # then
+        assert (copied, skipped) == (3, 0)
+        assert (self.target / "01_raw" / "nested" / "b.csv").read_text() == "b"
+        assert (self.target / "model.pkl").read_text() == "model"
+
+    def test_should_skip_files_up_to_date(self):
+        # given
+        sync_paths(str(self.source), str(self.target), ["01_raw", "model.pkl"])
+        (self.source / "model.pkl").write_text("new model")
+
+        # when
+        copied, skipped = sync_paths(str(self.source), str(self.target), ["01_raw", "model.pkl"])
+
+        # then
+        assert (copied, skipped) == (1, 2)
+        assert (self.target / "model.pkl").read_text() == "new model"
+
+    def test_should_recopy_file_modified_with_the_same_size(self):
+        # given
+        sync_paths(str(self.source), str(self.target), ["model.pkl"])
+        os.utime(self.target / "model.pkl", (0, 0))
+
+        # when
+        copied, skipped = sync_paths(str(self.source), str(self.target), ["model.pkl"])
+
+        # then
+        assert (copied, skipped) == (1, 0)
+
+    def test_should_ignore_missing_paths(self):
+        # when
+        with self.assertLogs("kedro_kubeflow.volume_sync", level="WARNING"):
+            copied, skipped = sync_paths(str(self.source), str(self.target), ["missing.csv"])
+
+        # then
+        assert (copied, skipped) == (0, 0)
+
+    def test_should_remove_paths_from_target(self):
+        # given
+        sync_paths(str(self.source), str(self.target), ["01_raw", "model.pkl"])
+
+        # when
+        remove_paths(str(self.target), ["01_raw", "model.pkl", "missing"])
+
+        # then
+        assert list(self.target.iterdir()) == []
@@ -0,0 +1,68 @@
+import unittest
+
+from kedro_kubeflow.workflow_size import (
+    format_size_report,
+    largest_templates,
+    serialized_size,
+    workflow_size_breakdown,
+)
+
+WORKFLOW = {
+    "metadata": {"annotations": {"pipelines.kubeflow.org/pipeline_spec": "{}"}},
+    "spec": {
+        "arguments": {"parameters": [{"name": "param1", "value": "1"}]},
+        "templates": [
+            {
+                "name": "node1",
+                "container": {
+                    "args": ["kubeflow", "run-node", "--nodes", "node1"],
+                    "env": [{"name": "KUBEFLOW_RUN_ID", "value": "{{workflow.uid}}"}],
+                    "image": "unittest-image",
+                },
+                "outputs": {"artifacts": [{"name": "node1-B", "path": "/home/kedro/data/b.csv"}]},
+                "metadata": {"labels": {"pipelines.kubeflow.org/enable_caching": "true"}},
+            },
+            {
+                "name": "pipeline",
+                "dag": {
+                    "tasks": [
+                        {
+                            "name": "node1",
+                            "template": "node1",
+                            "arguments": {"parameters": [{"name": "param1", "value": "{{inputs.parameters.param1}}"}]},
+                        }
+                    ]
+                },
+            },
+        ],
+    },
+}
+
+
+class TestWorkflowSize(unittest.TestCase):
+    def test_should_break_down_workflow_size_by_contributor(self):
+        # when
+        breakdown = workflow_size_breakdown(WORKFLOW)
+
+        # then
+        assert sum(breakdown.values()) == serialized_size(WORKFLOW)
+        assert breakdown["env vars"] == serialized_size(WORKFLOW["spec"]["templates"][0]["container"]["env"])
+        assert breakdown["file outputs"] == serialized_size(WORKFLOW["spec"]["templates"][0]["outputs"])
+        assert breakdown["arguments"] == (
+            serialized_size(["kubeflow", "run-node", "--nodes", "node1"])
+            + serialized_size(WORKFLOW["spec"]["templates"][1]["dag"]["tasks"][0]["arguments"])
+            + serialized_size(WORKFLOW["spec"]["arguments"])
+        )
+        assert all(size > 0 for size in breakdown.values())
+
+    def test_should_report_largest_templates(self):
+        # when
+        report = format_size_report(WORKFLOW, 1024)
+
+        # then
+        assert [name for name, _ in largest_templates(WORKFLOW)] == ["node1", "pipeline"]
+        assert f"Workflow size: {serialized_size(WORKFLOW) / 1024:.1f}KiB" in report
+        assert "file outputs" in report
+
+    def test_should_measure_compact_json(self):
+        assert serialized_size({"a": [1, "ż"]}) == len('{"a":[1,"\\u017c"]}')